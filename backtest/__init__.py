@@ -13,5 +13,8 @@ FinPackV2 回測模組（BTC-USD SMC 版）
     backtest/benchmark.py - 基準比較模式
 """
 # SMC 策略（BTC-USD 主要使用）
-from .smc_config import load_smc_config, DEFAULT_SMC_CONFIG, SMC_CONDITION_OPTIONS, SmcConfigError
+from .smc_config import (
+    load_smc_config, DEFAULT_SMC_CONFIG, SMC_CONDITION_OPTIONS, SmcConfigError, SmcRules,
+)
+from .smc_entries import compile_entry_masks, SmcEntryMasks, SmcEntrySide
 from .smc_engine import SmcEngine, SmcBacktestResult, SmcTrade, SmcPosition
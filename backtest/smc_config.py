@@ -46,7 +46,7 @@ SMC_CONDITION_OPTIONS = {
         },
         'max_holding_bars': {
             'name': '最大持倉 K 線數',
-            'description': '超過此根數仍未出場則強制平倉',
+            'description': '自進場 K 線起算超過此根數仍未出場則強制平倉',
         },
     },
 }
@@ -187,3 +187,65 @@ def _validate_smc_config(cfg: dict) -> None:
 
     if not cfg.get('allow_long') and not cfg.get('allow_short'):
         raise SmcConfigError('allow_long 和 allow_short 不能同時為 False')
+
+
+# =============================================================================
+# 編譯後的規則
+# =============================================================================
+
+class SmcRules:
+    """
+    由已驗證配置編譯出的唯讀進出場規則
+
+    load_smc_config() 的巢狀 dict 在回測開始前解析一次，成為布林旗標與數值；
+    進場條件再由 backtest.smc_entries 編譯成逐根遮罩，回測迴圈只讀屬性與陣列，不做 dict 查找。
+
+    Args:
+        config: load_smc_config() 返回的配置 dict
+    """
+
+    __slots__ = (
+        'allow_long', 'allow_short', 'risk_per_trade', 'fee_rate',
+        'require_bias', 'require_discount', 'require_ob', 'require_fvg',
+        'stop_loss_enabled', 'stop_loss_pct', 'take_profit_enabled',
+        'structure_exit', 'max_holding_enabled', 'max_holding_bars',
+    )
+
+    def __init__(self, config: dict):
+        entry = config['entry_conditions']
+        exit_ = config['exit_conditions']
+
+        def enabled(conditions: dict, key: str) -> bool:
+            return bool(conditions.get(key, {}).get('enabled', False))
+
+        max_holding = enabled(exit_, 'max_holding_bars')
+        values = {
+            'allow_long':          bool(config['allow_long']),
+            'allow_short':         bool(config['allow_short']),
+            'risk_per_trade':      float(config['risk_per_trade']),
+            'fee_rate':            float(config['fee_rate']),
+            'require_bias':        enabled(entry, 'require_bias'),
+            'require_discount':    enabled(entry, 'require_discount'),
+            'require_ob':          enabled(entry, 'require_ob'),
+            'require_fvg':         enabled(entry, 'require_fvg'),
+            # 止損緩衝即使停用止損出場，仍用來決定進場時的止損價
+            'stop_loss_pct':       float(exit_['stop_loss_pct']['pct']),
+            'stop_loss_enabled':   enabled(exit_, 'stop_loss_pct'),
+            'take_profit_enabled': enabled(exit_, 'take_profit_liquidity'),
+            'structure_exit':      enabled(exit_, 'structure_exit'),
+            'max_holding_enabled': max_holding,
+            'max_holding_bars':    exit_['max_holding_bars']['bars'] if max_holding else 0,
+        }
+
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'SmcRules 為唯讀，不可設定 {name}')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'SmcRules 為唯讀，不可刪除 {name}')
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'SmcRules({fields})'
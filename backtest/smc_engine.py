@@ -16,7 +16,10 @@ import pandas as pd
 from dataclasses import dataclass, field
 from typing import Optional, List
 
-from core.smc import SmcIndicators, FVG, OrderBlock
+from core.smc import SmcIndicators, FVG, OrderBlock, BIAS_BULLISH, BIAS_BEARISH
+from core.smc_cache import smc_cache, SMC_PARAM_KEYS
+from .smc_config import SmcRules
+from .smc_entries import SmcEntryMasks, compile_entry_masks
 
 logger = logging.getLogger(__name__)
 
@@ -78,6 +81,7 @@ class SmcPosition:
     """SMC 持倉（含槓桿）"""
     direction:   str
     entry_date:  str
+    entry_idx:   int            # 進場 K 線索引（持倉根數自此起算）
     entry_price: float
     qty:         float          # 名目 BTC 數量
     margin:      float          # 保證金（USD）
@@ -104,7 +108,19 @@ class SmcBacktestResult:
     avg_rr:            float
     leverage:          int
     trades:            list
-    equity_curve:      list
+    equity:            np.ndarray   # 每根 K 線收盤後權益（float64，取整到 0.01）
+    equity_dates:      np.ndarray   # 對應的 'YYYY-MM-DD' 標籤
+    _equity_curve:     Optional[list] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def equity_curve(self) -> list:
+        """[{'time', 'equity'}, ...]（API 序列化時才建立，之後快取）"""
+        if self._equity_curve is None:
+            self._equity_curve = [
+                {'time': t, 'equity': e}
+                for t, e in zip(self.equity_dates.tolist(), self.equity.tolist())
+            ]
+        return self._equity_curve
 
     def to_dict(self) -> dict:
         return {
@@ -170,11 +186,17 @@ class SmcEngine:
     BTC-USD Smart Money Concepts 合約回測引擎
 
     Args:
-        ohlcv:  OHLCV DataFrame（完整歷史，含回測起點前的 warmup 資料）
-        config: load_smc_config() 返回的配置 dict
+        ohlcv:      OHLCV DataFrame（完整歷史，含回測起點前的 warmup 資料）
+        config:     load_smc_config() 返回的配置 dict
+        indicators: 可共用的 SmcIndicators（例如 smc_service 的預計算結果）；
+                    僅在同一份 ohlcv 且 SMC 參數相同時採用，否則自 smc_cache 取得
+        fingerprint: ohlcv 的資料指紋（呼叫端已知時傳入，例如 smc_service.get_fingerprint）；
+                    查詢 smc_cache 時不必重新雜湊整份資料
     """
 
-    def __init__(self, ohlcv: pd.DataFrame, config: dict):
+    def __init__(self, ohlcv: pd.DataFrame, config: dict,
+                 indicators: Optional[SmcIndicators] = None,
+                 fingerprint: Optional[str] = None):
         if ohlcv.empty:
             raise ValueError('ohlcv 不得為空')
         if config is None:
@@ -182,29 +204,60 @@ class SmcEngine:
 
         self.ohlcv    = ohlcv
         self.config   = config
+        self.rules    = SmcRules(config)        # 進出場規則只解析一次，逐根迴圈不查 dict
         self.leverage = int(config.get('leverage', 1))
 
-        # SMC 指標（惰性計算）
-        self.smc = SmcIndicators(
-            ohlcv,
-            pivot_lookback   = config['pivot_lookback'],
-            fvg_min_size_atr = config['fvg_min_size_atr'],
-            displacement_atr = config['displacement_atr'],
-            lp_tolerance_pct = config['lp_tolerance_pct'],
-        )
+        # SMC 指標（惰性計算；偵測結果唯讀，可與其他回測共用）
+        params = {key: config[key] for key in SMC_PARAM_KEYS}
+        if indicators is not None and indicators.ohlcv is ohlcv and indicators.params == params:
+            self.smc = indicators
+        else:
+            self.smc = smc_cache.get_or_compute(
+                ohlcv, config.get('timeframe', '1d'), fingerprint=fingerprint, **params
+            )
+
+        # 本次回測專用的查詢游標（活躍區域 / 流動性池的推進狀態）
+        self.cursor = self.smc.cursor()
+
+        # 逐根迴圈直接讀連續陣列（與指標共用 SmcFeatures，不另外複製），
+        # 避免每根 K 線的 pandas 欄位查找與 .iloc 純量存取
+        features     = self.smc.features
+        self._high   = features.high
+        self._low    = features.low
+        self._close  = features.close
+        self._dates  = features.dates            # 'YYYY-MM-DD' 標籤
+        self._high_rq = features.range_query('high')
+        self._low_rq  = features.range_query('low')
+        self._next_bias: dict = {}               # 偏向代碼 -> 下一根該偏向 K 線的索引陣列
+        self._entry_masks: Optional[SmcEntryMasks] = None
 
         # 回測狀態
         self.equity: float                    = config['initial_capital']
         self.position: Optional[SmcPosition] = None
         self.trades:   List[SmcTrade]        = []
-        self.equity_curve: List[dict]        = []
+
+        # 權益曲線：run() 時依回測區間 [idx_start, idx_end] 預先配置，逐根寫入未取整的權益
+        self._curve_start        = 0
+        self._equity: np.ndarray = np.empty(0)
 
     # =========================================================================
     # 公開方法
     # =========================================================================
 
-    def run(self, start_date: str = None, end_date: str = None) -> SmcBacktestResult:
-        """執行回測"""
+    @property
+    def entry_masks(self) -> SmcEntryMasks:
+        """本配置的逐根進場遮罩與止損 / 止盈價（第一次存取時編譯）"""
+        if self._entry_masks is None:
+            self._entry_masks = compile_entry_masks(self.smc, self.rules)
+        return self._entry_masks
+
+    def bar_range(self, start_date: str = None, end_date: str = None) -> tuple:
+        """
+        回測區間對應的 K 線索引 (idx_start, idx_end)，閉區間
+
+        省略時取 config 的 start_date / end_date；無 end_date 則至最後一根。
+        idx_start 為 start_date 當天或之後第一根，idx_end 為 end_date 當天或之前最後一根。
+        """
         start = start_date or self.config['start_date']
         end   = end_date   or self.config.get('end_date')
 
@@ -213,6 +266,23 @@ class SmcEngine:
             idx_end = self.ohlcv.index.searchsorted(pd.Timestamp(end), side='right') - 1
         else:
             idx_end = len(self.ohlcv) - 1
+        return idx_start, idx_end
+
+    RUN_MODES = ('bar', 'event')
+
+    def run(self, start_date: str = None, end_date: str = None, mode: str = 'bar') -> SmcBacktestResult:
+        """
+        執行回測
+
+        Args:
+            mode: 'bar'   逐根處理每根 K 線
+                  'event' 事件驅動：空手時直接跳到下一根可能進場的 K 線，持倉時以首次穿越
+                          搜尋出場 K 線，中間略過的權益曲線整段填入；結果與 'bar' 完全相同，
+                          耗時與交易數而非 K 線數成正比
+        """
+        if mode not in self.RUN_MODES:
+            raise ValueError(f'mode 必須是 {self.RUN_MODES} 之一，收到 {mode!r}')
+        idx_start, idx_end = self.bar_range(start_date, end_date)
 
         logger.info('[SMC] 回測: %s ~ %s (leverage=%dx)',
                     self.ohlcv.index[idx_start].date(),
@@ -220,13 +290,16 @@ class SmcEngine:
                     self.leverage)
 
         # 預計算所有 SMC 訊號
-        _ = self.smc.structure
-        _ = self.smc.fvgs
-        _ = self.smc.order_blocks
-        _ = self.smc.liquidity_pools
+        self.smc.precompute()
+
+        self._curve_start = idx_start
+        self._equity      = np.full(max(idx_end - idx_start + 1, 0), np.nan)
 
-        for idx in range(idx_start, idx_end + 1):
-            self._process_bar(idx)
+        if mode == 'event':
+            self._run_events(idx_start, idx_end)
+        else:
+            for idx in range(idx_start, idx_end + 1):
+                self._process_bar(idx)
 
         return self._calculate_result(idx_start, idx_end)
 
@@ -235,9 +308,7 @@ class SmcEngine:
     # =========================================================================
 
     def _process_bar(self, idx: int) -> None:
-        date_str = str(self.ohlcv.index[idx])[:10]
-
-        self.smc.update_at(idx)
+        date_str = self._dates[idx]
 
         if self.position is not None:
             self._process_exit(idx, date_str)
@@ -248,92 +319,18 @@ class SmcEngine:
         if self.position is not None:
             self._update_peak(idx)
 
-        equity = self._calc_equity(idx)
-        self.equity_curve.append({
-            'time':   date_str,
-            'equity': round(equity, 2),
-        })
+        self._equity[idx - self._curve_start] = self._calc_equity(idx)
 
     def _process_entry(self, idx: int, date_str: str) -> None:
-        close  = self.ohlcv['Close'].iloc[idx]
-        signal = self.smc.get_signal_at(idx)
-        entry  = self.config['entry_conditions']
-        cfg    = self.config
-
-        if cfg['allow_long']:
-            ok, stop_price, tp_price = self._check_long_entry(idx, close, signal, entry)
-            if ok and stop_price > 0:
-                self._open_position('long', idx, date_str, close, stop_price, tp_price)
-                return
-
-        if cfg['allow_short']:
-            ok, stop_price, tp_price = self._check_short_entry(idx, close, signal, entry)
-            if ok and stop_price > 0:
-                self._open_position('short', idx, date_str, close, stop_price, tp_price)
-
-    def _check_long_entry(self, idx, close, signal, entry):
-        if entry.get('require_bias', {}).get('enabled'):
-            if signal.bias != 'bullish':
-                return False, 0, 0
-
-        if entry.get('require_discount', {}).get('enabled'):
-            if not self.smc.is_in_discount(close, idx):
-                return False, 0, 0
-
-        require_ob  = entry.get('require_ob',  {}).get('enabled', False)
-        require_fvg = entry.get('require_fvg', {}).get('enabled', False)
-
-        tp_price = signal.nearest_bsl
-        stop_loss_pct = self.config['exit_conditions']['stop_loss_pct']['pct']
-
-        if require_ob:
-            for ob in reversed(signal.active_bullish_obs):
-                if self.smc.price_in_ob(close, ob):
-                    stop_price = ob.bottom * (1 - stop_loss_pct)
-                    return True, stop_price, tp_price
-
-        if require_fvg:
-            for fvg in reversed(signal.active_bullish_fvgs):
-                if self.smc.price_in_fvg(close, fvg):
-                    stop_price = fvg.bottom * (1 - stop_loss_pct)
-                    return True, stop_price, tp_price
-
-        if require_ob or require_fvg:
-            return False, 0, 0
-
-        return False, 0, 0
-
-    def _check_short_entry(self, idx, close, signal, entry):
-        if entry.get('require_bias', {}).get('enabled'):
-            if signal.bias != 'bearish':
-                return False, 0, 0
-
-        if entry.get('require_discount', {}).get('enabled'):
-            if not self.smc.is_in_premium(close, idx):
-                return False, 0, 0
-
-        require_ob  = entry.get('require_ob',  {}).get('enabled', False)
-        require_fvg = entry.get('require_fvg', {}).get('enabled', False)
-
-        tp_price = signal.nearest_ssl
-        stop_loss_pct = self.config['exit_conditions']['stop_loss_pct']['pct']
-
-        if require_ob:
-            for ob in reversed(signal.active_bearish_obs):
-                if self.smc.price_in_ob(close, ob):
-                    stop_price = ob.top * (1 + stop_loss_pct)
-                    return True, stop_price, tp_price
-
-        if require_fvg:
-            for fvg in reversed(signal.active_bearish_fvgs):
-                if self.smc.price_in_fvg(close, fvg):
-                    stop_price = fvg.top * (1 + stop_loss_pct)
-                    return True, stop_price, tp_price
-
-        if require_ob or require_fvg:
-            return False, 0, 0
-
-        return False, 0, 0
+        """依預先編譯的進場遮罩開倉（兩側同時成立時做多優先）"""
+        masks = self.entry_masks
+        code  = masks.direction[idx]
+        if code == 0:
+            return
+        side = masks.long if code > 0 else masks.short
+        # 止損價由區域上下緣（Python float）換算；止盈價沿用流動性池價位的 np.float64
+        self._open_position(side.direction, idx, date_str, self._close[idx],
+                            float(side.stop[idx]), side.target[idx])
 
     def _open_position(
         self,
@@ -367,7 +364,7 @@ class SmcEngine:
             )
             return
 
-        risk_amount  = self.equity * self.config['risk_per_trade']
+        risk_amount  = self.equity * self.rules.risk_per_trade
         notional     = risk_amount / stop_distance          # 名目本金
         margin       = notional / self.leverage             # 所需保證金
         qty          = notional / entry_price               # 名目 BTC 數量
@@ -382,12 +379,13 @@ class SmcEngine:
         if margin > self.equity or qty <= 0:
             return
 
-        fee = notional * self.config['fee_rate']
+        fee = notional * self.rules.fee_rate
         self.equity -= (margin + fee)
 
         self.position = SmcPosition(
             direction   = direction,
             entry_date  = date_str,
+            entry_idx   = idx,
             entry_price = entry_price,
             qty         = qty,
             margin      = margin,
@@ -405,11 +403,11 @@ class SmcEngine:
 
     def _process_exit(self, idx: int, date_str: str) -> None:
         pos    = self.position
-        close  = self.ohlcv['Close'].iloc[idx]
-        low    = self.ohlcv['Low'].iloc[idx]
-        high   = self.ohlcv['High'].iloc[idx]
-        exit_  = self.config['exit_conditions']
-        signal = self.smc.get_signal_at(idx)
+        close  = self._close[idx]
+        low    = self._low[idx]
+        high   = self._high[idx]
+        rules  = self.rules
+        signal = self.cursor.get_signal_at(idx)
 
         reason     = None
         exit_price = close
@@ -420,22 +418,22 @@ class SmcEngine:
                 reason     = f'liquidated({pos.liq_price:.2f})'
                 exit_price = pos.liq_price
 
-            elif exit_.get('stop_loss_pct', {}).get('enabled') and low <= pos.stop_loss:
+            elif rules.stop_loss_enabled and low <= pos.stop_loss:
                 reason     = f'stop_loss({pos.stop_loss:.2f})'
                 exit_price = pos.stop_loss
 
-            elif (exit_.get('take_profit_liquidity', {}).get('enabled')
+            elif (rules.take_profit_enabled
                   and pos.take_profit > 0 and high >= pos.take_profit):
                 reason     = f'tp_liquidity({pos.take_profit:.2f})'
                 exit_price = pos.take_profit
 
-            elif exit_.get('structure_exit', {}).get('enabled') and signal.bias == 'bearish':
+            elif rules.structure_exit and signal.bias == 'bearish':
                 reason     = 'structure_flip_bearish'
                 exit_price = close
 
-            elif exit_.get('max_holding_bars', {}).get('enabled'):
-                bars_held = idx - self.ohlcv.index.searchsorted(pd.Timestamp(pos.entry_date))
-                if bars_held >= exit_['max_holding_bars']['bars']:
+            elif rules.max_holding_enabled:
+                bars_held = idx - pos.entry_idx
+                if bars_held >= rules.max_holding_bars:
                     reason     = f'max_bars({bars_held})'
                     exit_price = close
 
@@ -444,22 +442,22 @@ class SmcEngine:
                 reason     = f'liquidated({pos.liq_price:.2f})'
                 exit_price = pos.liq_price
 
-            elif exit_.get('stop_loss_pct', {}).get('enabled') and high >= pos.stop_loss:
+            elif rules.stop_loss_enabled and high >= pos.stop_loss:
                 reason     = f'stop_loss({pos.stop_loss:.2f})'
                 exit_price = pos.stop_loss
 
-            elif (exit_.get('take_profit_liquidity', {}).get('enabled')
+            elif (rules.take_profit_enabled
                   and pos.take_profit > 0 and low <= pos.take_profit):
                 reason     = f'tp_liquidity({pos.take_profit:.2f})'
                 exit_price = pos.take_profit
 
-            elif exit_.get('structure_exit', {}).get('enabled') and signal.bias == 'bullish':
+            elif rules.structure_exit and signal.bias == 'bullish':
                 reason     = 'structure_flip_bullish'
                 exit_price = close
 
-            elif exit_.get('max_holding_bars', {}).get('enabled'):
-                bars_held = idx - self.ohlcv.index.searchsorted(pd.Timestamp(pos.entry_date))
-                if bars_held >= exit_['max_holding_bars']['bars']:
+            elif rules.max_holding_enabled:
+                bars_held = idx - pos.entry_idx
+                if bars_held >= rules.max_holding_bars:
                     reason     = f'max_bars({bars_held})'
                     exit_price = close
 
@@ -483,7 +481,7 @@ class SmcEngine:
         else:
             pnl_raw = (pos.entry_price - exit_price) / pos.entry_price * notional
 
-        fee = (pos.qty * exit_price) * self.config['fee_rate']
+        fee = (pos.qty * exit_price) * self.rules.fee_rate
         pnl = pnl_raw - fee
 
         # 強平時 pnl 最多虧損保證金
@@ -521,14 +519,112 @@ class SmcEngine:
     def _update_peak(self, idx: int) -> None:
         pos = self.position
         if pos.direction == 'long':
-            h = self.ohlcv['High'].iloc[idx]
+            h = self._high[idx]
             if h > pos.peak_price:
                 pos.peak_price = h
         else:
-            l = self.ohlcv['Low'].iloc[idx]
+            l = self._low[idx]
             if l < pos.peak_price:
                 pos.peak_price = l
 
+    # =========================================================================
+    # 內部：事件驅動模式
+    # =========================================================================
+
+    def _run_events(self, idx_start: int, idx_end: int) -> None:
+        """
+        只處理會發生事件的 K 線（mode='event'）
+
+        空手時下一個事件是下一根進場 K 線（entry_masks），持倉時是第一根觸發出場條件的 K 線；
+        事件 K 線照常交給 _process_bar（出場後同根可再進場），其間的 K 線只填權益曲線。
+        """
+        candidates = np.flatnonzero(self.entry_masks.direction)
+        idx = idx_start
+        while idx <= idx_end:
+            if self.position is None:
+                k   = np.searchsorted(candidates, idx)
+                nxt = int(candidates[k]) if k < len(candidates) else idx_end + 1
+                nxt = min(nxt, idx_end + 1)
+                self._fill_flat(idx, nxt)
+            else:
+                nxt = min(self._next_exit_bar(idx), idx_end + 1)
+                self._fill_position(idx, nxt)
+            if nxt > idx_end:
+                break
+            self._process_bar(nxt)
+            idx = nxt + 1
+
+    def _next_exit_bar(self, idx: int) -> int:
+        """
+        持倉自 idx 起第一根觸發任一出場條件的 K 線（找不到回傳 len(ohlcv)）
+
+        強平 / 止損 / 止盈為 High / Low 的首次穿越搜尋，結構翻轉查下一根反向偏向，
+        最大持倉根數直接換算；觸發時的出場原因與價格由 _process_exit 依原優先順序決定。
+        """
+        pos   = self.position
+        rules = self.rules
+        if pos.direction == 'long':
+            adverse, favourable, flip = (self._low_rq, 'le'), (self._high_rq, 'ge'), BIAS_BEARISH
+        else:
+            adverse, favourable, flip = (self._high_rq, 'ge'), (self._low_rq, 'le'), BIAS_BULLISH
+
+        levels = []
+        if pos.liq_price > 0:
+            levels.append(adverse + (pos.liq_price,))
+        if rules.stop_loss_enabled:
+            levels.append(adverse + (pos.stop_loss,))
+        if rules.take_profit_enabled and pos.take_profit > 0:
+            levels.append(favourable + (pos.take_profit,))
+
+        bars = [rq.first_crossing_at(idx, level, op) for rq, op, level in levels]
+        if rules.structure_exit:
+            bars.append(int(self._next_bias_bar(flip)[idx]))
+        if rules.max_holding_enabled:
+            bars.append(max(idx, pos.entry_idx + rules.max_holding_bars))
+        return min((b for b in bars if b >= 0), default=len(self._close))
+
+    def _next_bias_bar(self, code: int) -> np.ndarray:
+        """每根 K 線起（含）下一根偏向為 code 的 K 線索引（無則 len(ohlcv)）"""
+        nxt = self._next_bias.get(code)
+        if nxt is None:
+            bias = self.smc.bias_timeline
+            pos  = np.where(bias == code, np.arange(len(bias)), len(bias))
+            nxt  = np.minimum.accumulate(pos[::-1])[::-1]
+            self._next_bias[code] = nxt
+        return nxt
+
+    def _fill_flat(self, start: int, stop: int) -> None:
+        """空手期間 [start, stop) 的權益曲線（權益不變）"""
+        self._equity[start - self._curve_start: stop - self._curve_start] = self.equity
+
+    def _fill_position(self, start: int, stop: int) -> None:
+        """
+        持倉期間 [start, stop)（皆未觸發出場）的峰值追蹤與權益曲線
+
+        權益逐元素套用 _calc_equity 的同一組運算，數值與逐根計算相同。
+        """
+        if start >= stop:
+            return
+        pos = self.position
+        if pos.direction == 'long':
+            high = self._high_rq.max(start, stop - 1)
+            if high > pos.peak_price:
+                pos.peak_price = high
+        else:
+            low = self._low_rq.min(start, stop - 1)
+            if low < pos.peak_price:
+                pos.peak_price = low
+
+        close    = self._close[start:stop]
+        notional = pos.qty * pos.entry_price
+        if pos.direction == 'long':
+            unrealized = (close - pos.entry_price) / pos.entry_price * notional
+        else:
+            unrealized = (pos.entry_price - close) / pos.entry_price * notional
+        self._equity[start - self._curve_start: stop - self._curve_start] = (
+            self.equity + np.maximum(pos.margin + unrealized, 0)
+        )
+
     # =========================================================================
     # 內部：權益計算
     # =========================================================================
@@ -538,7 +634,7 @@ class SmcEngine:
         if self.position is None:
             return self.equity
 
-        close = self.ohlcv['Close'].iloc[idx]
+        close = self._close[idx]
         pos   = self.position
         notional = pos.qty * pos.entry_price
 
@@ -564,32 +660,31 @@ class SmcEngine:
         years        = max(days / 365, 0.01)
         annualized   = (1 + total_return) ** (1 / years) - 1
 
-        win_trades  = [t for t in self.trades if t.pnl > 0]
-        loss_trades = [t for t in self.trades if t.pnl <= 0]
-        total       = len(self.trades)
-        win_rate    = len(win_trades) / total if total > 0 else 0
+        pnl         = np.array([t.pnl for t in self.trades], dtype=np.float64)
+        wins        = pnl[pnl > 0]
+        losses      = pnl[pnl <= 0]
+        total       = len(pnl)
+        win_rate    = len(wins) / total if total > 0 else 0
 
-        avg_win  = np.mean([t.pnl for t in win_trades])  if win_trades  else 0
-        avg_loss = abs(np.mean([t.pnl for t in loss_trades])) if loss_trades else 1
+        avg_win  = np.mean(wins)  if len(wins)   else 0
+        avg_loss = abs(np.mean(losses)) if len(losses) else 1
         avg_rr   = avg_win / avg_loss if avg_loss > 0 else 0
 
-        # 最大回撤
-        peak   = initial
-        max_dd = 0.0
-        for p in self.equity_curve:
-            eq = p['equity']
-            if eq > peak:
-                peak = eq
-            dd = (peak - eq) / peak if peak > 0 else 0
-            if dd > max_dd:
-                max_dd = dd
+        # 統計與 API 輸出一致，皆以取整到 0.01 的權益計算。
+        # 逐根權益為 np.float64（含收盤價 / 損益運算），原本逐點 round(equity, 2) 即委派給
+        # np.round，故整段 np.round 與逐點取整逐位元相同（非 Python float 的 round）
+        curve = np.round(self._equity, 2)
+
+        # 最大回撤：以含初始資金的歷史高點計算（fmax 略過 NaN）
+        peak   = np.fmax.accumulate(np.r_[initial, curve])[1:]
+        dd     = np.divide(peak - curve, peak, out=np.zeros_like(curve), where=peak > 0)
+        max_dd = np.fmax.reduce(dd, initial=0.0)
 
         # Sharpe
-        if len(self.equity_curve) > 1:
-            eqs  = [p['equity'] for p in self.equity_curve]
-            rets = np.diff(eqs) / np.array(eqs[:-1])
-            sharpe = (np.mean(rets) / np.std(rets) * np.sqrt(365)
-                      if np.std(rets) > 0 else 0)
+        if len(curve) > 1:
+            rets   = np.diff(curve) / curve[:-1]
+            std    = np.std(rets)
+            sharpe = np.mean(rets) / std * np.sqrt(365) if std > 0 else 0
         else:
             sharpe = 0.0
 
@@ -599,13 +694,14 @@ class SmcEngine:
             total_return      = total_return,
             annualized_return = annualized,
             total_trades      = total,
-            win_trades        = len(win_trades),
-            loss_trades       = len(loss_trades),
+            win_trades        = len(wins),
+            loss_trades       = len(losses),
             win_rate          = win_rate,
             max_drawdown      = max_dd,
             sharpe_ratio      = sharpe,
             avg_rr            = avg_rr,
             leverage          = self.leverage,
             trades            = [t.to_dict() for t in self.trades],
-            equity_curve      = self.equity_curve,
+            equity            = curve,
+            equity_dates      = self._dates[start_idx:end_idx + 1],
         )
@@ -0,0 +1,160 @@
+"""
+SMC 進場條件遮罩
+
+把 entry_conditions 一次編譯成逐根 K 線的 NumPy 遮罩，以及進場時隱含的止損 / 止盈價：
+- bias      偏向符合（做多 bullish / 做空 bearish）
+- discount  收盤在折扣區（做多 close < equilibrium）/ 溢價區（做空 close > equilibrium）
+- in_ob     收盤落在該方向某個有效 OB 內
+- in_fvg    收盤落在該方向某個有效 FVG 內
+
+回測引擎依遮罩決定每根 K 線是否進場（逐根與事件驅動模式共用），
+分析端點可直接列出「此配置會在哪些 K 線進場」而不必跑回測。
+
+用法：
+    from backtest.smc_entries import compile_entry_masks
+    masks = compile_entry_masks(smc, SmcRules(config))
+    masks.long.entry            # 做多進場 K 線（bool）
+    masks.long.stop[idx]        # 該根進場的止損價
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from core.range_query import interval_cover
+from core.smc import SmcIndicators, ActiveZoneIndex, ZoneTable, BIAS_BULLISH, BIAS_BEARISH
+from .smc_config import SmcRules
+
+
+# =============================================================================
+# 資料結構
+# =============================================================================
+
+@dataclass(frozen=True)
+class SmcEntrySide:
+    """單一方向的逐根進場遮罩（所有陣列長度皆為 K 線數）"""
+    direction: str              # 'long' | 'short'
+    bias:      np.ndarray       # bool：偏向符合
+    discount:  np.ndarray       # bool：折扣區（做多）/ 溢價區（做空）
+    in_ob:     np.ndarray       # bool：收盤在有效 OB 內
+    in_fvg:    np.ndarray       # bool：收盤在有效 FVG 內
+    entry:     np.ndarray       # bool：所有啟用條件成立且止損價有效（方向未允許則全為 False）
+    stop:      np.ndarray       # float64：止損價（OB 優先，否則 FVG），非進場 K 線為 NaN
+    target:    np.ndarray       # float64：止盈價（最近 BSL / SSL，無則 0），非進場 K 線為 NaN
+
+
+@dataclass(frozen=True)
+class SmcEntryMasks:
+    """做多 / 做空兩側的進場遮罩"""
+    long:      SmcEntrySide
+    short:     SmcEntrySide
+    direction: np.ndarray       # int8：1 做多 / -1 做空 / 0 不進場（兩側同時成立時做多優先）
+
+    def entries(self, dates: np.ndarray, close: np.ndarray,
+                start: int = 0, end: int = None) -> list:
+        """
+        [start, end] 區間內的進場 K 線（API 用；不考慮持倉狀態，空手時才會真的進場）
+
+        Returns:
+            [{'time', 'direction', 'price', 'stop', 'target'}, ...]
+        """
+        stop = len(self.direction) if end is None else end + 1
+        records = []
+        for idx in (np.flatnonzero(self.direction[start:stop]) + start).tolist():
+            side = self.long if self.direction[idx] > 0 else self.short
+            records.append({
+                'time':      dates[idx],
+                'direction': side.direction,
+                'price':     round(float(close[idx]), 2),
+                'stop':      round(float(side.stop[idx]), 2),
+                'target':    round(float(side.target[idx]), 2) or None,
+            })
+        return records
+
+
+# =============================================================================
+# 編譯
+# =============================================================================
+
+def compile_entry_masks(smc: SmcIndicators, rules: SmcRules) -> SmcEntryMasks:
+    """
+    將進場規則編譯成逐根遮罩
+
+    偏向與折扣/溢價為時間軸的向量比較；區域條件先以 interval_cover 篩出收盤落在
+    某個有效區域上下緣範圍內的 K 線，只在這些 K 線上以 ActiveZoneIndex 查出
+    「包含收盤價的最近一個有效區域」（與 SmcCursor.find_active_ob / fvg 相同），
+    止損價即由該區域換算。止盈價只在進場 K 線查詢最近流動性池。
+    """
+    close  = smc.features.close
+    cursor = smc.cursor()
+    equilibrium = smc.equilibrium_timeline
+    ob_index    = ActiveZoneIndex(smc.order_block_table)
+    fvg_index   = ActiveZoneIndex(smc.fvg_table)
+
+    sides = {}
+    for side, name, code, allowed in (('long', 'bullish', BIAS_BULLISH, rules.allow_long),
+                                      ('short', 'bearish', BIAS_BEARISH, rules.allow_short)):
+        bias     = smc.bias_timeline == code
+        discount = (close < equilibrium) if side == 'long' else (close > equilibrium)
+        ob_rows  = _zone_rows(ob_index, smc.order_block_table, name, code, close)
+        fvg_rows = _zone_rows(fvg_index, smc.fvg_table, name, code, close)
+        in_ob, in_fvg = ob_rows >= 0, fvg_rows >= 0
+
+        # 止損價：OB 優先，其次 FVG；做多取區域下緣往下、做空取上緣往上加緩衝
+        use_ob  = in_ob & rules.require_ob
+        use_fvg = in_fvg & rules.require_fvg & ~use_ob
+        if side == 'long':
+            edge, buffer = 'bottom', 1 - rules.stop_loss_pct
+        else:
+            edge, buffer = 'top', 1 + rules.stop_loss_pct
+        stop = np.full(len(close), np.nan)
+        stop[use_ob]  = getattr(smc.order_block_table, edge)[ob_rows[use_ob]] * buffer
+        stop[use_fvg] = getattr(smc.fvg_table, edge)[fvg_rows[use_fvg]] * buffer
+
+        entry = (use_ob | use_fvg) & (stop > 0) & allowed
+        if rules.require_bias:
+            entry &= bias
+        if rules.require_discount:
+            entry &= discount
+
+        # 止盈價：進場 K 線以收盤價查詢的最近流動性池（同 SmcSignalView.nearest_bsl / ssl）
+        target = np.full(len(close), np.nan)
+        pick   = 0 if side == 'long' else 1
+        for idx in np.flatnonzero(entry).tolist():
+            level = cursor.get_nearest_liquidity(close[idx], idx)[pick]
+            target[idx] = 0.0 if np.isnan(level) else level
+
+        sides[side] = SmcEntrySide(side, bias, discount, in_ob, in_fvg, entry, stop, target)
+
+    long, short = sides['long'], sides['short']
+    direction = np.where(long.entry, 1, np.where(short.entry, -1, 0)).astype(np.int8)
+    return SmcEntryMasks(long=long, short=short, direction=direction)
+
+
+def _zone_rows(index: ActiveZoneIndex, table: ZoneTable, name: str, code: int,
+               close: np.ndarray) -> np.ndarray:
+    """
+    每根 K 線包含收盤價的最近一個 name 方向有效區域（列索引，無則 -1）
+
+    interval_cover 給出每根 K 線所有有效區域的 [最小下緣, 最大上緣]，
+    落在其外的 K 線不可能有區域包含收盤價，不必查詢。
+
+    cover 內的 K 線逐根以 ActiveZoneIndex.find 查詢（每次 O(log m)），迴圈只走這些 K 線，
+    此即預期的成本上限：「(時間, 價格) 落在哪些區域矩形內、取最後一列」沒有便宜的向量化寫法，
+    改成逐區域以 NumPy 切片覆寫需 O(各區域有效期間總長)，長期未失效的區域會退化為 O(m·n)。
+    遮罩每個配置只編譯一次，不在回測迴圈內。
+    """
+    n     = len(close)
+    found = np.full(n, -1, dtype=np.int64)
+    rows  = np.flatnonzero(table.direction == code)
+    if not len(rows):
+        return found
+
+    start, last = table.idx[rows], table.end[rows] - 1      # 有效期間 [idx, end)
+    top    = interval_cover(n, start, last, table.top[rows], 'max')
+    bottom = interval_cover(n, start, last, table.bottom[rows], 'min')
+    prices = close.tolist()
+    for idx in np.flatnonzero((bottom <= close) & (close <= top)).tolist():
+        row = index.find(name, prices[idx], idx)
+        if row is not None:
+            found[idx] = row
+    return found
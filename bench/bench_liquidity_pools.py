@@ -0,0 +1,87 @@
+"""
+流動性池分群效能基準
+
+比較 detect_liquidity_pools 三種實作隨 pivot 數量的擴展性：
+- loop:   舊版 O(k²) 兩兩比對（_detect_liquidity_pools_loop）
+- greedy: 價格排序 + 二分搜尋，保留貪婪錨點語意（預設）
+- sorted: 純價格滑動視窗分群（greedy=False）
+
+使用方式：
+    python bench/bench_liquidity_pools.py
+    python bench/bench_liquidity_pools.py --sizes 1000 5000 20000 --max-loop 5000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# 確保 root 目錄在 sys.path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from core.smc import detect_liquidity_pools, _detect_liquidity_pools_loop
+
+
+def make_pivots(k: int, seed: int = 0) -> tuple:
+    """
+    產生含 k 個 pivot high 與 k 個 pivot low 的模擬 pivots DataFrame
+
+    價格為在區間內震盪的隨機漫步，讓等高/等低點大量出現。
+    """
+    rng   = np.random.default_rng(seed)
+    n     = 3 * k
+    level = 30_000 + np.cumsum(rng.normal(0, 150, k))
+    level = 30_000 + (level - 30_000) % 8_000          # 折回 [30000, 38000) 區間
+
+    pivot_high = np.full(n, np.nan)
+    pivot_low  = np.full(n, np.nan)
+    pivot_high[0::3] = np.round(level, 0)
+    pivot_low[1::3]  = np.round(level * 0.97, 0)
+
+    index  = pd.date_range('2020-01-01', periods=n, freq='h')
+    pivots = pd.DataFrame({'pivot_high': pivot_high, 'pivot_low': pivot_low}, index=index)
+    ohlcv  = pd.DataFrame({'High': pivot_high, 'Low': pivot_low}, index=index)
+    return pivots, ohlcv
+
+
+def _time(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='流動性池分群效能基準')
+    parser.add_argument('--sizes',    type=int, nargs='+', default=[250, 1000, 4000, 16000, 64000],
+                        help='每側 pivot 數量')
+    parser.add_argument('--max-loop', type=int, default=4000,
+                        help='超過此 pivot 數即略過 O(k²) 迴圈版')
+    parser.add_argument('--tol',      type=float, default=0.002, help='容忍度百分比')
+    parser.add_argument('--repeat',   type=int, default=3, help='每項取最佳的重複次數')
+    args = parser.parse_args()
+
+    print(f'{"pivots":>8} {"loop(s)":>10} {"greedy(s)":>10} {"sorted(s)":>10} {"speedup":>8} {"pools":>6}')
+    for k in args.sizes:
+        pivots, ohlcv = make_pivots(k)
+
+        t_greedy = _time(lambda: detect_liquidity_pools(pivots, ohlcv, args.tol), args.repeat)
+        t_sorted = _time(lambda: detect_liquidity_pools(pivots, ohlcv, args.tol, greedy=False), args.repeat)
+        pools    = detect_liquidity_pools(pivots, ohlcv, args.tol)
+
+        if k <= args.max_loop:
+            t_loop = _time(lambda: _detect_liquidity_pools_loop(pivots, ohlcv, args.tol), 1)
+            assert _detect_liquidity_pools_loop(pivots, ohlcv, args.tol) == pools
+            loop_col, speedup = f'{t_loop:10.4f}', f'{t_loop / t_greedy:7.1f}x'
+        else:
+            loop_col, speedup = f'{"-":>10}', f'{"-":>8}'
+
+        print(f'{k:>8} {loop_col} {t_greedy:10.4f} {t_sorted:10.4f} {speedup} {len(pools):>6}')
+
+
+if __name__ == '__main__':
+    main()
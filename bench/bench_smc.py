@@ -0,0 +1,238 @@
+"""
+SMC 偵測器與回測引擎效能基準
+
+以合成 OHLCV（bench/synthetic.py，固定種子）在不同 K 線數下計時：
+- features / detect_pivots / pivot_pyramid / detect_structure / detect_fvgs /
+  detect_order_blocks / detect_liquidity_pools（各自從原始資料起算，不共用特徵快取）
+- precompute：SmcIndicators 全部指標
+- engine_run / engine_run_event：SmcEngine.run 逐根 / 事件驅動模式（指標已預計算，只量回測迴圈）
+
+每項記錄最佳 / 中位數耗時與 tracemalloc 峰值記憶體，可寫成 JSON；
+--compare 比較兩份結果（或以目前程式碼重跑後與舊結果比較），標出變快 / 變慢的項目。
+
+使用方式：
+    python bench/bench_smc.py --output bench/results/base.json
+    python bench/bench_smc.py --sizes 1000 10000 --only detect_pivots engine_run
+    python bench/bench_smc.py --compare bench/results/base.json            # 重跑並比較
+    python bench/bench_smc.py --compare bench/results/base.json new.json   # 只比較兩份檔案
+"""
+import argparse
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+# 確保 root 目錄在 sys.path
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np
+import pandas as pd
+
+from backtest.smc_config import load_smc_config
+from backtest.smc_engine import SmcEngine
+from bench.synthetic import make_synthetic_ohlcv
+from core.smc import (
+    SmcFeatures, SmcIndicators, PivotPyramid,
+    detect_pivots, detect_structure, detect_fvgs,
+    detect_order_blocks, detect_liquidity_pools,
+)
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+
+# =============================================================================
+# 基準項目
+# =============================================================================
+
+def build_cases(ohlcv: pd.DataFrame) -> dict:
+    """
+    回傳 {名稱: 無參數函式}
+
+    偵測器的上游輸入（pivots、structure）先算好，計時只涵蓋該偵測器本身；
+    偵測器不傳 features，每次呼叫都從原始 OHLCV 起算。
+    """
+    smc       = SmcIndicators(ohlcv).precompute()
+    lookback  = smc.pivot_lookback
+    pivots    = smc.pivots
+    structure = smc.structure
+    config    = load_smc_config({
+        'start_date': str(ohlcv.index[min(200, len(ohlcv) - 1)].date()),
+        'timeframe':  '1h',
+    })
+
+    def features():
+        f = SmcFeatures(ohlcv)
+        return f.atr, f.body, f.last_bullish_idx, f.last_bearish_idx
+
+    return {
+        'features':               features,
+        'detect_pivots':          lambda: detect_pivots(ohlcv['High'], ohlcv['Low'], lookback),
+        'pivot_pyramid':          lambda: PivotPyramid(ohlcv['High'], ohlcv['Low']),
+        'detect_structure':       lambda: detect_structure(ohlcv, pivots, lookback),
+        'detect_fvgs':            lambda: detect_fvgs(ohlcv, smc.fvg_min_size_atr),
+        'detect_order_blocks':    lambda: detect_order_blocks(ohlcv, structure, smc.displacement_atr),
+        'detect_liquidity_pools': lambda: detect_liquidity_pools(pivots, ohlcv, smc.lp_tolerance_pct),
+        'precompute':             lambda: SmcIndicators(ohlcv).precompute(),
+        'engine_run':             lambda: SmcEngine(ohlcv, config, indicators=smc).run(),
+        'engine_run_event':       lambda: SmcEngine(ohlcv, config, indicators=smc).run(mode='event'),
+    }
+
+
+def measure(fn, repeat: int) -> dict:
+    """最佳 / 中位數耗時（秒）與單次執行的 tracemalloc 峰值（位元組）"""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+
+    # 記憶體另跑一次：tracemalloc 會拖慢執行，不與計時混在一起
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'best_s':     min(times),
+        'median_s':   statistics.median(times),
+        'repeat':     repeat,
+        'peak_bytes': peak,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() if out.returncode == 0 else ''
+    except (OSError, subprocess.SubprocessError):
+        return ''
+
+
+def run_benchmarks(sizes: list, only: list, repeat: int, seed: int) -> dict:
+    results = []
+    for n in sizes:
+        t0    = time.perf_counter()
+        ohlcv = make_synthetic_ohlcv(n, seed=seed)
+        cases = build_cases(ohlcv)
+        print(f'\n[{n:,} bars] 資料與輸入準備 {time.perf_counter() - t0:.2f}s')
+
+        for name, fn in cases.items():
+            if only and name not in only:
+                continue
+            row = {'bench': name, 'bars': n, **measure(fn, repeat)}
+            results.append(row)
+            print(f'  {name:<24} best {row["best_s"]:9.4f}s  median {row["median_s"]:9.4f}s  '
+                  f'peak {row["peak_bytes"] / 1e6:9.1f} MB')
+
+    return {
+        'meta': {
+            'created':  datetime.now().isoformat(timespec='seconds'),
+            'commit':   _git_commit(),
+            'python':   platform.python_version(),
+            'numpy':    np.__version__,
+            'pandas':   pd.__version__,
+            'machine':  platform.machine(),
+            'platform': platform.platform(),
+            'seed':     seed,
+            'repeat':   repeat,
+        },
+        'results': results,
+    }
+
+
+# =============================================================================
+# 比較
+# =============================================================================
+
+def compare(old: dict, new: dict, tolerance: float) -> list:
+    """
+    逐項比較兩份結果（以 best_s 判斷），回傳超出容忍度而變慢的項目
+
+    只列出兩邊都有的 (bench, bars)；比值 = 新 / 舊。
+    """
+    old_rows = {(r['bench'], r['bars']): r for r in old['results']}
+    slower   = []
+
+    print(f'\n舊: {old["meta"].get("commit") or "?"} ({old["meta"].get("created", "")})'
+          f'  新: {new["meta"].get("commit") or "?"} ({new["meta"].get("created", "")})')
+    print(f'{"bench":<24} {"bars":>10} {"old(s)":>10} {"new(s)":>10} {"time":>7} {"mem":>7}')
+    for row in new['results']:
+        key = (row['bench'], row['bars'])
+        base = old_rows.get(key)
+        if base is None:
+            continue
+        ratio     = row['best_s'] / base['best_s'] if base['best_s'] > 0 else float('inf')
+        mem_ratio = row['peak_bytes'] / base['peak_bytes'] if base['peak_bytes'] > 0 else float('inf')
+        if ratio > 1 + tolerance:
+            flag = '  slower'
+            slower.append(key)
+        elif ratio < 1 - tolerance:
+            flag = '  faster'
+        else:
+            flag = ''
+        print(f'{row["bench"]:<24} {row["bars"]:>10,} {base["best_s"]:10.4f} {row["best_s"]:10.4f} '
+              f'{ratio:6.2f}x {mem_ratio:6.2f}x{flag}')
+    return slower
+
+
+def _load(path: str) -> dict:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SMC 偵測器與回測引擎效能基準')
+    parser.add_argument('--sizes',     type=int, nargs='+', default=DEFAULT_SIZES, help='K 線數')
+    parser.add_argument('--only',      nargs='+', default=[], help='只跑指定項目（例如 detect_pivots）')
+    parser.add_argument('--repeat',    type=int, default=3, help='每項重複次數（取最佳與中位數）')
+    parser.add_argument('--seed',      type=int, default=0, help='合成資料亂數種子')
+    parser.add_argument('--output',    help='結果 JSON 路徑')
+    parser.add_argument('--compare',   nargs='+', metavar='JSON',
+                        help='OLD [NEW]：只給 OLD 時以目前程式碼重跑（沿用 OLD 的 K 線數與種子）後比較')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='比較時視為持平的相對誤差（預設 10%%）')
+    args = parser.parse_args()
+
+    # 基準只看耗時，關掉偵測器的進度日誌
+    logging.disable(logging.INFO)
+
+    if args.compare and len(args.compare) > 2:
+        parser.error('--compare 最多兩個檔案')
+
+    if args.compare and len(args.compare) == 2:
+        old, new = _load(args.compare[0]), _load(args.compare[1])
+    else:
+        old = _load(args.compare[0]) if args.compare else None
+        sizes, seed = args.sizes, args.seed
+        if old is not None:
+            sizes = sorted({r['bars'] for r in old['results']})
+            seed  = old['meta'].get('seed', seed)
+            if not args.only:
+                args.only = sorted({r['bench'] for r in old['results']})
+        new = run_benchmarks(sizes, args.only, args.repeat, seed)
+
+        if args.output:
+            path = Path(args.output)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(new, indent=2, ensure_ascii=False), encoding='utf-8')
+            print(f'\n結果已寫入 {path}')
+
+    if old is not None:
+        slower = compare(old, new, args.tolerance)
+        if slower:
+            print(f'\n{len(slower)} 項變慢超過 {args.tolerance:.0%}')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,9 @@ FinPackV2 核心模組（BTC-USD SMC 版）
 提供以下功能：
 - BTC-USD OHLCV 資料抓取與快取（data.py）
 - Smart Money Concepts 指標計算（smc.py）
+- 區間極值索引（range_query.py）
+- 增量式 SMC 指標（smc_stream.py）
+- SMC 指標 LRU 快取（smc_cache.py）
 - 資料容器（container.py）
 """
 from .config import (
@@ -17,11 +20,18 @@ from .data import (
     save_btc_cache,
     slice_ohlcv,
 )
+from .range_query import RangeQuery, interval_cover
 from .smc import (
-    SmcIndicators, SmcSignals,
+    SmcIndicators, SmcSignals, SmcSignalView, SmcCursor, SmcFeatures,
     FVG, OrderBlock, StructurePoint, LiquidityPool,
-    detect_pivots, detect_structure, detect_fvgs,
+    ZoneTable, FvgTable, OrderBlockTable, LiquidityPoolTable, ActiveZoneIndex,
+    detect_pivots, PivotPyramid, pivot_strength,
+    detect_structure, detect_structure_arrays, detect_fvgs,
     detect_order_blocks, detect_liquidity_pools,
+    detect_fvg_table, detect_order_block_table, detect_liquidity_pool_table,
+    structure_bias_timeline,
 )
+from .smc_stream import SmcStream
+from .smc_cache import SmcIndicatorCache, smc_cache
 from .container import BtcDataContainer, container
 from .smc_service import SmcSignalService, smc_service
@@ -22,6 +22,7 @@ BTC_CACHE_FILE  = CACHE_DIR / "btc_1d.pkl"   # 預設快取（其他 timeframe 
 # =============================================================================
 CACHE_MAX_STALENESS_DAYS  = 1   # 日線：最多允許 1 天過期
 CACHE_MAX_STALENESS_HOURS = 4   # 小時線：最多允許 4 小時過期
+SMC_CACHE_MAX_BYTES = 512 * 1024 * 1024   # SMC 指標快取（smc_cache）記憶體上限
 
 # =============================================================================
 # 資料參數
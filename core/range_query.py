@@ -0,0 +1,232 @@
+"""
+區間極值索引（稀疏表）
+
+對一個固定的價格陣列建立一次，之後任意區間 [a, b] 的最大 / 最小值為 O(1)，
+「自 a 起第一次 / 至 b 止最後一次穿越門檻」的搜尋為 O(log n)。
+Pivot 視窗、流動性池被掃、區域生命週期與停損 / 停利觸價檢查都是這類查詢，
+同一份 OHLCV 的索引由 SmcFeatures 快取，各偵測器與回測共用。
+
+用法：
+    from core.range_query import RangeQuery
+    rq = RangeQuery(ohlcv['High'].to_numpy())
+    rq.max(10, 20)                         # high[10:21] 的最大值
+    rq.range_max(starts, ends)             # 向量化
+    rq.first_crossing(starts, levels, 'gt')  # 第一根 high > level 的 K 線
+"""
+import operator
+
+import numpy as np
+
+
+# op: (極值表種類, 「區間內未穿越」判斷)
+_CROSSING_OPS = {
+    'le': ('min', np.greater),
+    'lt': ('min', np.greater_equal),
+    'ge': ('max', np.less),
+    'gt': ('max', np.less_equal),
+}
+
+# 純量版的「區間內未穿越」判斷
+_SCALAR_NO_CROSS = {
+    'le': operator.gt,
+    'lt': operator.ge,
+    'ge': operator.lt,
+    'gt': operator.le,
+}
+
+# 表種類: (NaN 的替代值, 區間合併函式)
+_TABLE_KINDS = {
+    'max': (-np.inf, np.maximum),
+    'min': (np.inf,  np.minimum),
+}
+
+
+class RangeQuery:
+    """
+    靜態 float64 陣列的區間極值索引
+
+    max / min 稀疏表於第一次使用時各自建立（O(n log n) 時間與記憶體），之後唯讀，
+    可安全地跨執行緒共用。NaN 不參與比較：區間極值略過 NaN（同 np.fmax / fmin），
+    全為 NaN 或空區間回傳 NaN；穿越搜尋中 NaN 永不穿越。區間皆為閉區間 [start, end]。
+    """
+
+    def __init__(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if values.flags.writeable:
+            values = values.copy()          # 呼叫端之後修改原陣列不影響索引
+            values.setflags(write=False)
+        self.values = values
+        self._tables: dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def nbytes(self) -> int:
+        """已建立稀疏表的總位元組數（不含原始陣列）"""
+        return sum(levels.nbytes for levels in self._tables.values())
+
+    def _levels(self, kind: str) -> np.ndarray:
+        """levels[k, i] = values[i : i + 2^k] 的極值（NaN 與超出尾端的位置以 ±inf 填補）"""
+        levels = self._tables.get(kind)
+        if levels is None:
+            fill, reduce = _TABLE_KINDS[kind]
+            n = len(self.values)
+            depth  = max(n, 1).bit_length()
+            levels = np.full((depth, n), fill)
+            levels[0] = np.where(np.isnan(self.values), fill, self.values)
+            for k in range(1, depth):
+                width = 1 << (k - 1)
+                reduce(levels[k - 1, :n - width], levels[k - 1, width:], out=levels[k, :n - width])
+            levels.setflags(write=False)
+            # 並行建立時各自計算，先寫入者保留
+            levels = self._tables.setdefault(kind, levels)
+        return levels
+
+    # ── 區間極值 ──────────────────────────────────────────────────────────
+
+    def _query(self, kind: str, starts, ends) -> np.ndarray:
+        fill, reduce = _TABLE_KINDS[kind]
+        starts = np.maximum(np.asarray(starts, dtype=np.int64), 0)
+        ends   = np.minimum(np.asarray(ends, dtype=np.int64), len(self.values) - 1)
+        valid  = starts <= ends
+
+        result = np.full(starts.shape, np.nan)
+        if not valid.any():
+            return result
+        levels = self._levels(kind)
+        lo, hi = starts[valid], ends[valid]
+        k      = np.log2(hi - lo + 1).astype(np.int64)
+        width  = np.left_shift(1, k)
+        extreme = reduce(levels[k, lo], levels[k, hi - width + 1])
+        result[valid] = np.where(extreme == fill, np.nan, extreme)
+        return result
+
+    def range_max(self, starts, ends) -> np.ndarray:
+        """每組 [starts[k], ends[k]] 的最大值（向量化）"""
+        return self._query('max', starts, ends)
+
+    def range_min(self, starts, ends) -> np.ndarray:
+        """每組 [starts[k], ends[k]] 的最小值（向量化）"""
+        return self._query('min', starts, ends)
+
+    def max(self, start: int, end: int) -> float:
+        """values[start : end + 1] 的最大值"""
+        return self._scalar('max', start, end)
+
+    def min(self, start: int, end: int) -> float:
+        """values[start : end + 1] 的最小值"""
+        return self._scalar('min', start, end)
+
+    def _scalar(self, kind: str, start: int, end: int) -> float:
+        fill, reduce = _TABLE_KINDS[kind]
+        start, end = max(start, 0), min(end, len(self.values) - 1)
+        if start > end:
+            return np.nan
+        levels = self._levels(kind)
+        k = (end - start + 1).bit_length() - 1
+        extreme = float(reduce(levels[k, start], levels[k, end - (1 << k) + 1]))
+        return np.nan if extreme == fill else extreme
+
+    # ── 穿越搜尋 ──────────────────────────────────────────────────────────
+
+    def first_crossing(self, starts, thresholds, op: str) -> np.ndarray:
+        """
+        對每組 (starts[k], thresholds[k]) 找出第一個 j >= starts[k]
+        使 values[j] <op> thresholds[k] 成立（op: 'le' | 'lt' | 'ge' | 'gt'）
+
+        以稀疏表做二分下降，每組 O(log n)；門檻為 NaN 或找不到時回傳 -1。
+        """
+        kind, no_cross = _CROSSING_OPS[op]
+        starts     = np.asarray(starts, dtype=np.int64)
+        thresholds = np.asarray(thresholds, dtype=np.float64)
+        n = len(self.values)
+
+        result = np.full(len(starts), -1, dtype=np.int64)
+        if n == 0 or len(starts) == 0:
+            return result
+        levels = self._levels(kind)
+
+        pos     = np.maximum(starts, 0)
+        pending = (pos < n) & ~np.isnan(thresholds)
+        for k in range(len(levels) - 1, -1, -1):
+            width = 1 << k
+            can   = pending & (pos + width <= n)
+            block = levels[k, np.where(can, pos, 0)]
+            pos   = np.where(can & no_cross(block, thresholds), pos + width, pos)
+
+        found = pending & (pos < n)
+        result[found] = pos[found]
+        return result
+
+    def first_crossing_at(self, start: int, threshold: float, op: str) -> int:
+        """first_crossing 的單筆純量版（逐筆事件查詢用，省去向量化的陣列開銷）"""
+        n = len(self.values)
+        if start >= n or threshold != threshold:
+            return -1
+        levels   = self._levels(_CROSSING_OPS[op][0])
+        no_cross = _SCALAR_NO_CROSS[op]
+        pos = max(start, 0)
+        for k in range(len(levels) - 1, -1, -1):
+            width = 1 << k
+            if pos + width <= n and no_cross(levels[k, pos], threshold):
+                pos += width
+        return pos if pos < n else -1
+
+    def last_crossing(self, ends, thresholds, op: str) -> np.ndarray:
+        """
+        對每組 (ends[k], thresholds[k]) 找出最後一個 j <= ends[k]
+        使 values[j] <op> thresholds[k] 成立；規則同 first_crossing
+        """
+        kind, no_cross = _CROSSING_OPS[op]
+        ends       = np.asarray(ends, dtype=np.int64)
+        thresholds = np.asarray(thresholds, dtype=np.float64)
+        n = len(self.values)
+
+        result = np.full(len(ends), -1, dtype=np.int64)
+        if n == 0 or len(ends) == 0:
+            return result
+        levels = self._levels(kind)
+
+        # pos 為搜尋區間的右開端點：values[pos:end+1] 皆未穿越
+        pos     = np.minimum(ends, n - 1) + 1
+        pending = (pos > 0) & ~np.isnan(thresholds)
+        for k in range(len(levels) - 1, -1, -1):
+            width = 1 << k
+            can   = pending & (pos - width >= 0)
+            block = levels[k, np.where(can, pos - width, 0)]
+            pos   = np.where(can & no_cross(block, thresholds), pos - width, pos)
+
+        found = pending & (pos > 0)
+        result[found] = pos[found] - 1
+        return result
+
+
+def interval_cover(n: int, starts, ends, values, kind: str = 'max') -> np.ndarray:
+    """
+    區間覆蓋極值：out[j] = 所有包含 j 的閉區間 [starts[k], ends[k]] 之 values[k] 的極值
+
+    RangeQuery 的反向操作（區間寫入、單點讀出），用於「idx 時任一有效區域的上緣最大值」
+    這類逐根 K 線的遮罩。每個區間拆成兩個 2 的冪次長度區塊寫入，再由上往下推到單點，
+    整體 O(n log n + m)。沒有區間覆蓋的位置為 -inf（max）/ +inf（min）；NaN 值與空區間略過。
+    """
+    fill, reduce = _TABLE_KINDS[kind]
+    starts = np.maximum(np.asarray(starts, dtype=np.int64), 0)
+    ends   = np.minimum(np.asarray(ends, dtype=np.int64), n - 1)
+    values = np.asarray(values, dtype=np.float64)
+    keep   = (starts <= ends) & ~np.isnan(values)
+    starts, ends, values = starts[keep], ends[keep], values[keep]
+
+    depth  = max(n, 1).bit_length()
+    levels = np.full((depth, n), fill)
+    if len(starts):
+        k = np.log2(ends - starts + 1).astype(np.int64)
+        reduce.at(levels, (k, starts), values)
+        reduce.at(levels, (k, ends - np.left_shift(1, k) + 1), values)
+
+    # levels[k, i] 涵蓋 [i, i + 2^k)：拆成左右兩半推到下一層
+    for k in range(depth - 1, 0, -1):
+        half = 1 << (k - 1)
+        reduce(levels[k - 1], levels[k], out=levels[k - 1])
+        reduce(levels[k - 1, half:], levels[k, :n - half], out=levels[k - 1, half:])
+    return levels[0].copy()
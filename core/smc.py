@@ -11,11 +11,17 @@ Smart Money Concepts (SMC) 指標計算模組
 
 所有計算均在確認時刻標記，避免前瞻偏差（Look-ahead Bias）。
 """
+import bisect
+import heapq
 import logging
+import threading
+from collections.abc import Sequence
 import numpy as np
 import pandas as pd
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Optional, Union
+
+from .range_query import RangeQuery
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +40,7 @@ class FVG:
     bottom: float       # 缺口下緣
     mid: float          # 缺口中點
     filled: bool = False
+    filled_at: Optional[int] = None     # 首次被收盤填補的 K 線索引（None = 尚未填補）
 
     @property
     def size(self) -> float:
@@ -51,6 +58,7 @@ class OrderBlock:
     body_top: float     # 實體上緣
     body_bottom: float  # 實體下緣
     valid: bool = True
+    invalidated_at: Optional[int] = None  # 首次被收盤穿越而失效的 K 線索引（None = 仍有效）
 
     @property
     def mid(self) -> float:
@@ -76,6 +84,7 @@ class LiquidityPool:
     level: float        # 流動性價格水平
     count: int          # 等高/等低點數量
     swept: bool = False
+    swept_at: Optional[int] = None      # 首次被高/低點穿越的 K 線索引（None = 尚未被掃）
 
 
 @dataclass
@@ -99,11 +108,616 @@ class SmcSignals:
     nearest_ssl: float = 0.0             # sell-side liquidity
 
 
+class _LazyField:
+    """SmcSignalView 的惰性欄位：第一次讀取時計算，結果存入同名的底線 slot"""
+
+    def __init__(self, compute):
+        self.compute = compute
+        self.__doc__ = compute.__doc__
+
+    def __set_name__(self, owner, name):
+        self.slot = owner.__dict__['_' + name]
+
+    def __get__(self, view, owner=None):
+        if view is None:
+            return self
+        try:
+            return self.slot.__get__(view, owner)
+        except AttributeError:
+            value = self.compute(view)
+            self.slot.__set__(view, value)
+            return value
+
+
+def _nan_to_zero(value: float) -> float:
+    return value if not np.isnan(value) else 0.0
+
+
+class SmcSignalView:
+    """
+    單根 K 線的 SMC 訊號（SmcIndicators.get_signal_at 的回傳值）
+
+    欄位與 SmcSignals 相同，但只在第一次讀取時由 SmcIndicators 的預計算結果求值；
+    只讀 bias 的呼叫端不必建立有效區域列表或查詢流動性池。
+    """
+
+    __slots__ = (
+        'smc', 'idx', 'cursor',
+        '_date', '_bias',
+        '_active_bullish_fvgs', '_active_bearish_fvgs',
+        '_active_bullish_obs', '_active_bearish_obs',
+        '_last_swing_high', '_last_swing_low', '_equilibrium',
+        '_nearest_liquidity', '_nearest_bsl', '_nearest_ssl',
+    )
+
+    def __init__(self, smc: 'SmcIndicators', idx: int, cursor: Optional['SmcCursor'] = None):
+        self.smc    = smc
+        self.idx    = idx
+        self.cursor = cursor if cursor is not None else smc
+
+    @_LazyField
+    def date(self) -> str:
+        return self.smc.features.dates[self.idx]
+
+    @_LazyField
+    def bias(self) -> str:
+        return self.smc.get_current_bias(self.idx)
+
+    @_LazyField
+    def active_bullish_fvgs(self) -> list:
+        return self.smc.get_active_fvgs('bullish', self.idx)
+
+    @_LazyField
+    def active_bearish_fvgs(self) -> list:
+        return self.smc.get_active_fvgs('bearish', self.idx)
+
+    @_LazyField
+    def active_bullish_obs(self) -> list:
+        return self.smc.get_active_obs('bullish', self.idx)
+
+    @_LazyField
+    def active_bearish_obs(self) -> list:
+        return self.smc.get_active_obs('bearish', self.idx)
+
+    @_LazyField
+    def last_swing_high(self) -> float:
+        return _nan_to_zero(self.smc._timeline_at(self.smc.swing_high_timeline, self.idx))
+
+    @_LazyField
+    def last_swing_low(self) -> float:
+        return _nan_to_zero(self.smc._timeline_at(self.smc.swing_low_timeline, self.idx))
+
+    @_LazyField
+    def equilibrium(self) -> float:
+        """折扣/溢價分界"""
+        return _nan_to_zero(self.smc._timeline_at(self.smc.equilibrium_timeline, self.idx))
+
+    @_LazyField
+    def nearest_liquidity(self) -> tuple:
+        """以收盤價查詢的 (nearest_bsl, nearest_ssl)，nan 表示不存在"""
+        return self.cursor.get_nearest_liquidity(self.smc.features.close[self.idx], self.idx)
+
+    @_LazyField
+    def nearest_bsl(self) -> float:
+        """buy-side liquidity"""
+        return _nan_to_zero(self.nearest_liquidity[0])
+
+    @_LazyField
+    def nearest_ssl(self) -> float:
+        """sell-side liquidity"""
+        return _nan_to_zero(self.nearest_liquidity[1])
+
+    def to_signals(self) -> SmcSignals:
+        """求出所有欄位，轉為 SmcSignals dataclass"""
+        return SmcSignals(**{f: getattr(self, f) for f in SmcSignals.__dataclass_fields__})
+
+    def __repr__(self) -> str:
+        return f'SmcSignalView(idx={self.idx}, date={self.date!r})'
+
+
+# =============================================================================
+# 欄位式區域表
+# =============================================================================
+
+def _readonly(values, dtype) -> np.ndarray:
+    arr = np.array(values, dtype=dtype)
+    arr.setflags(write=False)
+    return arr
+
+
+class ZoneTable(Sequence):
+    """
+    欄位式區域表（SmcIndicators 中 FVG / OB / 流動性池的主要表示）
+
+    每個區域一列，欄位為等長的唯讀 NumPy 陣列：
+        idx        區域成立的 K 線索引（int64）
+        direction  +1 = DIRECTIONS[0]，-1 = DIRECTIONS[1]（int8）
+        top / bottom / mid   上緣 / 下緣 / 中點（float64）
+        end        生命週期結束的 K 線（填補 / 失效 / 被掃；未結束為 n_bars）
+    列順序即偵測順序。篩選、序列化直接讀欄位；以索引或迭代存取時才建立
+    對應的 dataclass，供沿用 list 的呼叫端相容。每次存取都建立新物件，
+    修改它不會寫回表格，也不會影響其他呼叫端。
+    """
+
+    DIRECTIONS = ('bullish', 'bearish')
+    EXTRA_COLUMNS: tuple = ()
+
+    def __init__(self, columns: dict, dates: np.ndarray, n_bars: int):
+        """
+        Args:
+            columns: 欄位陣列（mid / end 可省略：mid 取上下緣平均、end 預設未結束）
+            dates:   每根 K 線的日期字串（SmcFeatures.dates）
+            n_bars:  K 線總數
+        """
+        top, bottom = columns['top'], columns['bottom']
+        mid = columns.get('mid')
+        end = columns.get('end')
+        self.columns = {
+            'idx':       _readonly(columns['idx'], np.int64),
+            'direction': _readonly(columns['direction'], np.int8),
+            'top':       _readonly(top, np.float64),
+            'bottom':    _readonly(bottom, np.float64),
+            'mid':       _readonly((np.asarray(top) + np.asarray(bottom)) / 2 if mid is None else mid,
+                                   np.float64),
+            'end':       _readonly(np.full(len(columns['idx']), n_bars) if end is None else end,
+                                   np.int64),
+        }
+        for name, dtype in self.EXTRA_COLUMNS:
+            self.columns[name] = _readonly(columns[name], dtype)
+        for name, arr in self.columns.items():
+            setattr(self, name, arr)
+
+        self.n_bars = n_bars
+        self._dates = dates
+
+    def __len__(self) -> int:
+        return len(self.idx)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(f'{type(self).__name__} index out of range')
+        return self._make_view(i)
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({len(self)} zones)'
+
+    def _make_view(self, i: int):
+        raise NotImplementedError
+
+    def _replace(self, **columns) -> 'ZoneTable':
+        return type(self)({**self.columns, **columns}, self._dates, self.n_bars)
+
+    # ------------------------------------------------------------------
+    # 欄位衍生
+    # ------------------------------------------------------------------
+
+    @property
+    def dates(self) -> np.ndarray:
+        """各列的日期字串（object 陣列）"""
+        return self._dates[self.idx]
+
+    @property
+    def direction_names(self) -> np.ndarray:
+        """各列的方向名稱（object 陣列）"""
+        return np.where(self.direction > 0, *self.DIRECTIONS).astype(object)
+
+    @property
+    def ended(self) -> np.ndarray:
+        """資料結束前是否已結束生命週期（bool 陣列）"""
+        return self.end < self.n_bars
+
+    def _direction_name(self, i: int) -> str:
+        return self.DIRECTIONS[0] if self.direction[i] > 0 else self.DIRECTIONS[1]
+
+    def _end_at(self, i: int) -> Optional[int]:
+        end = int(self.end[i])
+        return end if end < self.n_bars else None
+
+    # ------------------------------------------------------------------
+    # 查詢
+    # ------------------------------------------------------------------
+
+    def active_rows(self, direction: str, at_idx: int) -> np.ndarray:
+        """at_idx 時有效（idx <= at_idx < end）且方向相符的列索引（依列順序）"""
+        code = {self.DIRECTIONS[0]: 1, self.DIRECTIONS[1]: -1}.get(direction, 0)
+        return np.flatnonzero(
+            (self.direction == code) & (self.idx <= at_idx) & (at_idx < self.end)
+        )
+
+    def active(self, direction: str, at_idx: int) -> list:
+        """at_idx 時有效的區域（dataclass view，依列順序）"""
+        return [self[i] for i in self.active_rows(direction, at_idx).tolist()]
+
+    def _crossing_end(self, rules: dict, offset: int = 0) -> np.ndarray:
+        """
+        各方向以 _first_crossing 求生命週期結束 K 線
+
+        rules: {direction code: (values, op, thresholds)}，自 idx + offset 起搜尋；
+        values 可為陣列或 RangeQuery（傳入 SmcFeatures 的索引可避免重建稀疏表）
+        """
+        end = np.full(len(self), self.n_bars, dtype=np.int64)
+        for code, (values, op, thresholds) in rules.items():
+            rows = np.flatnonzero(self.direction == code)
+            if len(rows) == 0:
+                continue
+            hits = _first_crossing(values, self.idx[rows] + offset, thresholds[rows], op)
+            end[rows] = np.where(hits >= 0, hits, self.n_bars)
+        return end
+
+
+class FvgTable(ZoneTable):
+    """FVG 欄位表；end 為首次收盤穿越 mid 的 K 線"""
+
+    def _make_view(self, i: int) -> FVG:
+        filled_at = self._end_at(i)
+        return FVG(
+            idx=int(self.idx[i]),
+            date=self._dates[self.idx[i]],
+            direction=self._direction_name(i),
+            top=float(self.top[i]),
+            bottom=float(self.bottom[i]),
+            mid=float(self.mid[i]),
+            filled=filled_at is not None,
+            filled_at=filled_at,
+        )
+
+    def resolve_fills(self, close: Union[np.ndarray, RangeQuery]) -> 'FvgTable':
+        """
+        回傳填入填補 K 線的新表
+
+        自 FVG 完成當根起第一根穿越 mid 的收盤（Bullish：收盤 <= mid；Bearish：收盤 >= mid）。
+        """
+        return self._replace(end=self._crossing_end({
+            1:  (close, 'le', self.mid),
+            -1: (close, 'ge', self.mid),
+        }))
+
+
+class OrderBlockTable(ZoneTable):
+    """Order Block 欄位表；end 為首次收盤穿越 OB 邊界的 K 線"""
+
+    EXTRA_COLUMNS = (('body_top', np.float64), ('body_bottom', np.float64))
+
+    def _make_view(self, i: int) -> OrderBlock:
+        invalidated_at = self._end_at(i)
+        return OrderBlock(
+            idx=int(self.idx[i]),
+            date=self._dates[self.idx[i]],
+            direction=self._direction_name(i),
+            top=float(self.top[i]),
+            bottom=float(self.bottom[i]),
+            body_top=float(self.body_top[i]),
+            body_bottom=float(self.body_bottom[i]),
+            valid=invalidated_at is None,
+            invalidated_at=invalidated_at,
+        )
+
+    def resolve_invalidations(self, close: Union[np.ndarray, RangeQuery]) -> 'OrderBlockTable':
+        """
+        回傳填入失效 K 線的新表
+
+        自 OB 所在 K 線起第一根穿越邊界的收盤（Bullish：收盤 < bottom；Bearish：收盤 > top）。
+        """
+        return self._replace(end=self._crossing_end({
+            1:  (close, 'lt', self.bottom),
+            -1: (close, 'gt', self.top),
+        }))
+
+
+class LiquidityPoolTable(ZoneTable):
+    """流動性池欄位表；top = bottom = mid = level，end 為首次被高/低點穿越的 K 線"""
+
+    DIRECTIONS    = ('buy_side', 'sell_side')
+    EXTRA_COLUMNS = (('count', np.int64),)
+
+    def _make_view(self, i: int) -> LiquidityPool:
+        swept_at = self._end_at(i)
+        return LiquidityPool(
+            idx=int(self.idx[i]),
+            date=self._dates[self.idx[i]],
+            direction=self._direction_name(i),
+            level=self.mid[i],      # 保持 np.float64（與 np.mean 群集價位相同）
+            count=int(self.count[i]),
+            swept=swept_at is not None,
+            swept_at=swept_at,
+        )
+
+    @property
+    def level(self) -> np.ndarray:
+        return self.mid
+
+    def resolve_sweeps(
+        self,
+        high: Union[np.ndarray, RangeQuery],
+        low: Union[np.ndarray, RangeQuery],
+    ) -> 'LiquidityPoolTable':
+        """
+        回傳填入被掃 K 線的新表
+
+        池成形（最後一個組成點）之後第一根穿越水平的 K 線
+        （Buy-side：High > level；Sell-side：Low < level）。
+        """
+        return self._replace(end=self._crossing_end({
+            1:  (high, 'gt', self.mid),
+            -1: (low, 'lt', self.mid),
+        }, offset=1))
+
+
+class ActiveZoneIndex:
+    """
+    活躍區域的區間索引：回答「idx 時方向 D、包含價格 P 的最近一個有效區域」
+
+    「最近」為列順序最後者，與由後往前掃描 get_active_* 結果的舊寫法相同。
+    每個方向以區域上下緣的壓縮座標建立線段樹，區域 [bottom, top] 拆到 O(log m) 個節點，
+    節點以 max-heap 保存列序號。推進到 idx 時加入 idx_row <= idx 的列；
+    已結束（end <= idx）的列在查詢時才自 heap 頂端移除。查詢沿價格所在葉節點往上取
+    各節點 heap 頂端的最大列序號，攤銷 O(log m)。查詢索引往回時自頭重建。
+    """
+
+    def __init__(self, table: ZoneTable):
+        self.table  = table
+        self._trees = {
+            code: _ZoneSegmentTree(table, np.flatnonzero(table.direction == code))
+            for code in (1, -1)
+        }
+
+    def find(self, direction: str, price: float, at_idx: int) -> Optional[int]:
+        """at_idx 時包含 price 的最後一列（列索引），無則 None"""
+        code = {self.table.DIRECTIONS[0]: 1, self.table.DIRECTIONS[1]: -1}.get(direction)
+        if code is None or np.isnan(price):
+            return None
+        row = self._trees[code].query(price, at_idx)
+        return row if row >= 0 else None
+
+
+class _ZoneSegmentTree:
+    """單一方向的區域線段樹（葉節點：座標點與相鄰座標之間的開區間交錯排列）"""
+
+    def __init__(self, table: ZoneTable, rows: np.ndarray):
+        bottom, top = table.bottom[rows], table.top[rows]
+        rows = rows[(bottom <= top)]                     # NaN 或上下顛倒的區域不含任何價格
+        bottom, top = table.bottom[rows], table.top[rows]
+
+        coords = np.unique(np.concatenate([bottom, top]))
+        self._coords = coords.tolist()
+        self._size   = 1
+        while self._size < max(2 * len(coords) - 1, 1):
+            self._size *= 2
+
+        order = np.argsort(table.idx[rows], kind='stable')
+        self._rows  = rows[order].tolist()
+        self._start = table.idx[rows][order].tolist()
+        self._lo    = (2 * np.searchsorted(coords, bottom[order])).tolist()
+        self._hi    = (2 * np.searchsorted(coords, top[order])).tolist()
+        self._end   = table.end
+        self._reset()
+
+    def _reset(self) -> None:
+        self._heaps: dict = {}
+        self._pos = 0
+        self._at  = -1
+
+    def _advance(self, at_idx: int) -> None:
+        if at_idx < self._at:
+            self._reset()
+        size, heaps = self._size, self._heaps
+        while self._pos < len(self._rows) and self._start[self._pos] <= at_idx:
+            k   = self._pos
+            key = -self._rows[k]
+            lo, hi = self._lo[k] + size, self._hi[k] + size + 1
+            while lo < hi:
+                if lo & 1:
+                    heapq.heappush(heaps.setdefault(lo, []), key)
+                    lo += 1
+                if hi & 1:
+                    hi -= 1
+                    heapq.heappush(heaps.setdefault(hi, []), key)
+                lo >>= 1
+                hi >>= 1
+            self._pos += 1
+        self._at = at_idx
+
+    def query(self, price: float, at_idx: int) -> int:
+        self._advance(at_idx)
+        coords = self._coords
+        k = bisect.bisect_left(coords, price)
+        if k < len(coords) and coords[k] == price:
+            leaf = 2 * k
+        elif 0 < k < len(coords):
+            leaf = 2 * k - 1
+        else:
+            return -1
+
+        best, end, heaps = -1, self._end, self._heaps
+        node = leaf + self._size
+        while node:
+            heap = heaps.get(node)
+            if heap:
+                while heap and end[-heap[0]] <= at_idx:
+                    heapq.heappop(heap)
+                if heap and -heap[0] > best:
+                    best = -heap[0]
+            node >>= 1
+        return best
+
+
+# =============================================================================
+# K 線特徵快取
+# =============================================================================
+
+class SmcFeatures:
+    """
+    K 線衍生特徵庫（惰性計算，每份資料只計算一次）
+
+    所有偵測器共用同一份 TR / ATR / 實體大小 / 多空 K 線旗標，
+    避免每個偵測器各自以 pandas 重算。數值特徵為連續 float64 陣列，
+    旗標為 bool 陣列；皆為唯讀，可安全地在多個偵測器與策略間共用。
+
+    使用方式：
+        features = SmcFeatures(ohlcv_df)
+        atr = features.atr          # np.ndarray (float64)
+    """
+
+    ATR_PERIOD = 14
+
+    def __init__(self, ohlcv: pd.DataFrame):
+        self.ohlcv = ohlcv
+        self._cache: dict[str, np.ndarray] = {}
+        self._ranges: dict[str, RangeQuery] = {}
+
+    def _get(self, name: str, compute) -> np.ndarray:
+        arr = self._cache.get(name)
+        if arr is None:
+            arr = np.ascontiguousarray(compute())
+            arr.setflags(write=False)
+            self._cache[name] = arr
+        return arr
+
+    def __len__(self) -> int:
+        return len(self.ohlcv)
+
+    @property
+    def nbytes(self) -> int:
+        """已計算特徵陣列與區間極值索引的總位元組數"""
+        return (sum(arr.nbytes for arr in self._cache.values())
+                + sum(rq.nbytes for rq in self._ranges.values()))
+
+    def range_query(self, name: str) -> RangeQuery:
+        """
+        特徵陣列的區間極值索引（每個特徵只建立一次）
+
+        例：features.range_query('high').max(a, b) 為 high[a:b+1] 的最大值。
+        """
+        rq = self._ranges.get(name)
+        if rq is None:
+            rq = self._ranges.setdefault(name, RangeQuery(getattr(self, name)))
+        return rq
+
+    # ── 原始 OHLC ──────────────────────────────────────────────────────────
+
+    @property
+    def open(self) -> np.ndarray:
+        return self._get('open', lambda: self.ohlcv['Open'].to_numpy(dtype=np.float64))
+
+    @property
+    def high(self) -> np.ndarray:
+        return self._get('high', lambda: self.ohlcv['High'].to_numpy(dtype=np.float64))
+
+    @property
+    def low(self) -> np.ndarray:
+        return self._get('low', lambda: self.ohlcv['Low'].to_numpy(dtype=np.float64))
+
+    @property
+    def close(self) -> np.ndarray:
+        return self._get('close', lambda: self.ohlcv['Close'].to_numpy(dtype=np.float64))
+
+    @property
+    def dates(self) -> np.ndarray:
+        """每根 K 線的日期標籤（等同 str(ohlcv.index[i])[:10]）"""
+        def compute():
+            index = self.ohlcv.index
+            if isinstance(index, pd.DatetimeIndex):
+                return index.strftime('%Y-%m-%d').to_numpy(dtype=object)
+            return np.array([str(ts)[:10] for ts in index], dtype=object)
+        return self._get('dates', compute)
+
+    # ── 衍生特徵 ──────────────────────────────────────────────────────────
+
+    @property
+    def tr(self) -> np.ndarray:
+        """True Range：max(H-L, |H-前收|, |L-前收|)，略過 NaN"""
+        def compute():
+            prev_close = np.r_[np.nan, self.close[:-1]]
+            return np.fmax.reduce([
+                self.high - self.low,
+                np.abs(self.high - prev_close),
+                np.abs(self.low - prev_close),
+            ])
+        return self._get('tr', compute)
+
+    @property
+    def atr(self) -> np.ndarray:
+        """ATR（14 根 TR 簡單平均，前 13 根為 NaN）"""
+        # 沿用 pandas rolling mean 的累加方式，確保數值與既有結果逐位元一致
+        return self._get('atr', lambda: pd.Series(self.tr).rolling(self.ATR_PERIOD).mean().to_numpy())
+
+    @property
+    def body(self) -> np.ndarray:
+        """K 線實體大小 |Close - Open|"""
+        return self._get('body', lambda: np.abs(self.close - self.open))
+
+    @property
+    def is_bullish(self) -> np.ndarray:
+        """看漲 K 線（Close > Open）"""
+        return self._get('is_bullish', lambda: self.close > self.open)
+
+    @property
+    def is_bearish(self) -> np.ndarray:
+        """看跌 K 線（Close < Open）"""
+        return self._get('is_bearish', lambda: self.close < self.open)
+
+    @property
+    def bullish_body(self) -> np.ndarray:
+        """看漲 K 線的實體大小，其餘為 NaN（供位移 K 線的區間搜尋）"""
+        return self._get('bullish_body', lambda: np.where(self.is_bullish, self.body, np.nan))
+
+    @property
+    def bearish_body(self) -> np.ndarray:
+        """看跌 K 線的實體大小，其餘為 NaN（供位移 K 線的區間搜尋）"""
+        return self._get('bearish_body', lambda: np.where(self.is_bearish, self.body, np.nan))
+
+    @property
+    def last_bullish_idx(self) -> np.ndarray:
+        """i 以前（含 i）最近一根看漲 K 線的索引（int64，-1 表示不存在）"""
+        return self._get('last_bullish_idx', lambda: _last_true_index(self.is_bullish))
+
+    @property
+    def last_bearish_idx(self) -> np.ndarray:
+        """i 以前（含 i）最近一根看跌 K 線的索引（int64，-1 表示不存在）"""
+        return self._get('last_bearish_idx', lambda: _last_true_index(self.is_bearish))
+
+
+def _last_true_index(flags: np.ndarray) -> np.ndarray:
+    """對每個 i 回傳 flags[:i+1] 中最後一個 True 的索引（無則 -1）"""
+    positions = np.where(flags, np.arange(len(flags), dtype=np.int64), -1)
+    return np.maximum.accumulate(positions) if len(positions) else positions
+
+
+def _first_crossing(
+    values: Union[np.ndarray, RangeQuery],
+    starts: np.ndarray,
+    thresholds: np.ndarray,
+    op: str,
+) -> np.ndarray:
+    """
+    向量化首次穿越搜尋
+
+    對每組 (starts[k], thresholds[k]) 找出第一個 j >= starts[k]
+    使 values[j] <op> thresholds[k] 成立（op: 'le' | 'lt' | 'ge' | 'gt'）。
+    values 可傳入已建立的 RangeQuery（例如 SmcFeatures.range_query('close')）以共用稀疏表；
+    傳入陣列時臨時建立。NaN 視為不穿越；門檻為 NaN 或找不到時回傳 -1。
+    """
+    rq = values if isinstance(values, RangeQuery) else RangeQuery(values)
+    return rq.first_crossing(starts, thresholds, op)
+
+
 # =============================================================================
 # Pivot 高低點偵測
 # =============================================================================
 
-def detect_pivots(high: pd.Series, low: pd.Series, lookback: int = 5) -> pd.DataFrame:
+def detect_pivots(
+    high: pd.Series,
+    low: pd.Series,
+    lookback: int = 5,
+    features: Optional[SmcFeatures] = None,
+) -> pd.DataFrame:
     """
     偵測擺動高低點（右側確認，存在 lookback 根的延遲）
 
@@ -112,6 +726,9 @@ def detect_pivots(high: pd.Series, low: pd.Series, lookback: int = 5) -> pd.Data
 
     注意：pivot 在 i+lookback 根 K 線後才能確認，在此時刻標記（無前瞻偏差）。
 
+    置中視窗的最大/最小值以 RangeQuery 一次查詢（傳入 features 時共用其 high / low 索引），
+    結果與逐根迴圈版 _detect_pivots_loop() 完全一致（含平手：等於視窗極值即為 pivot）。
+
     Returns:
         DataFrame: columns=['pivot_high', 'pivot_low']
             - pivot_high: 高點價格（NaN 表示非 pivot）
@@ -122,6 +739,137 @@ def detect_pivots(high: pd.Series, low: pd.Series, lookback: int = 5) -> pd.Data
     pivot_high = np.full(n, np.nan)
     pivot_low  = np.full(n, np.nan)
 
+    if n >= 2 * lookback + 1:
+        high_rq, low_rq = _high_low_ranges(high, low, features)
+        h = high_rq.values
+        l = low_rq.values
+
+        # 區間極值略過 NaN，與 pandas Series.max() / min() 行為一致
+        pos     = np.arange(lookback, n - lookback, dtype=np.int64)
+        win_max = high_rq.range_max(pos - lookback, pos + lookback)
+        win_min = low_rq.range_min(pos - lookback, pos + lookback)
+
+        center = slice(lookback, n - lookback)
+        is_ph = h[center] == win_max
+        is_pl = l[center] == win_min
+        pivot_high[center] = np.where(is_ph, h[center], np.nan)
+        pivot_low[center]  = np.where(is_pl, l[center], np.nan)
+
+    result = pd.DataFrame({
+        'pivot_high': pivot_high,
+        'pivot_low':  pivot_low,
+    }, index=high.index)
+
+    return result
+
+
+def _high_low_ranges(high, low, features: Optional[SmcFeatures] = None) -> tuple:
+    """high / low 的 RangeQuery：有 features 時取其快取，否則臨時建立"""
+    if features is not None:
+        return features.range_query('high'), features.range_query('low')
+    return (
+        high if isinstance(high, RangeQuery) else RangeQuery(np.asarray(high, dtype=np.float64)),
+        low if isinstance(low, RangeQuery) else RangeQuery(np.asarray(low, dtype=np.float64)),
+    )
+
+
+def pivot_strength(
+    high: Union[np.ndarray, RangeQuery],
+    low: Union[np.ndarray, RangeQuery],
+) -> tuple:
+    """
+    每根 K 線的 Pivot 強度：第 i 根是 lookback = k 的 pivot 若且唯若 k <= strength[i]
+
+    strength = min(左側可用根數, 右側可用根數, 到前後最近一根「嚴格更高（低）」K 線的距離 - 1)。
+    平手不破壞 pivot、NaN 不參與比較，與 detect_pivots 相同；價格為 NaN 的 K 線強度為 -1。
+    最近的更高 / 更低 K 線以 RangeQuery.first_crossing / last_crossing 各搜尋一次；
+    可直接傳入 SmcFeatures 已建立的 RangeQuery。
+
+    Returns:
+        (high_strength, low_strength)  int64 陣列
+    """
+    result = []
+    for rq, op in zip(_high_low_ranges(high, low), ('gt', 'lt')):
+        values = rq.values
+        n   = len(values)
+        pos = np.arange(n, dtype=np.int64)
+        strength = np.minimum(pos, n - 1 - pos)
+
+        nxt = rq.first_crossing(pos + 1, values, op)
+        strength = np.where(nxt >= 0, np.minimum(strength, nxt - pos - 1), strength)
+
+        prev = rq.last_crossing(pos - 1, values, op)
+        strength = np.where(prev >= 0, np.minimum(strength, pos - prev - 1), strength)
+
+        result.append(np.where(np.isnan(values), -1, strength))
+    return tuple(result)
+
+
+class PivotPyramid:
+    """
+    多個 lookback 的 Pivot 高低點（一次計算）
+
+    以 pivot_strength 求出每根 K 線的強度後，任一 lookback 的 pivot 都是一次比較。
+    high_mask / low_mask 為 K 線 × lookback 的 bool 矩陣（欄位順序同 lookbacks）。
+
+    使用方式：
+        pyramid = PivotPyramid(ohlcv['High'], ohlcv['Low'], range(2, 21))
+        pyramid.high_mask[:, 3]          # lookback = 5 的 pivot high 旗標
+        pyramid.pivots(5)                # 與 detect_pivots(high, low, 5) 相同
+    """
+
+    def __init__(
+        self,
+        high: pd.Series,
+        low: pd.Series,
+        lookbacks=range(2, 21),
+        features: Optional[SmcFeatures] = None,
+    ):
+        high_rq, low_rq = _high_low_ranges(high, low, features)
+        self.index     = high.index
+        self.high      = high_rq.values
+        self.low       = low_rq.values
+        self.lookbacks = np.asarray(list(lookbacks), dtype=np.int64)
+        self.high_strength, self.low_strength = pivot_strength(high_rq, low_rq)
+        for arr in (self.high_strength, self.low_strength):
+            arr.setflags(write=False)
+        self._masks: Optional[tuple] = None
+
+    def _get_masks(self) -> tuple:
+        if self._masks is None:
+            high_mask = self.high_strength[:, None] >= self.lookbacks[None, :]
+            low_mask  = self.low_strength[:, None] >= self.lookbacks[None, :]
+            high_mask.setflags(write=False)
+            low_mask.setflags(write=False)
+            self._masks = (high_mask, low_mask)
+        return self._masks
+
+    @property
+    def high_mask(self) -> np.ndarray:
+        """pivot high 旗標矩陣（n × len(lookbacks)）"""
+        return self._get_masks()[0]
+
+    @property
+    def low_mask(self) -> np.ndarray:
+        """pivot low 旗標矩陣（n × len(lookbacks)）"""
+        return self._get_masks()[1]
+
+    def pivots(self, lookback: int) -> pd.DataFrame:
+        """指定 lookback 的 Pivot（格式同 detect_pivots；強度與範圍無關，任一 lookback 皆可）"""
+        is_ph = self.high_strength >= lookback
+        is_pl = self.low_strength >= lookback
+        return pd.DataFrame({
+            'pivot_high': np.where(is_ph, self.high, np.nan),
+            'pivot_low':  np.where(is_pl, self.low, np.nan),
+        }, index=self.index)
+
+
+def _detect_pivots_loop(high: pd.Series, low: pd.Series, lookback: int = 5) -> pd.DataFrame:
+    """detect_pivots() 的逐根迴圈參考實作（O(n·lookback)，供驗證向量化版本使用）"""
+    n = len(high)
+    pivot_high = np.full(n, np.nan)
+    pivot_low  = np.full(n, np.nan)
+
     for i in range(lookback, n - lookback):
         window_high = high.iloc[i - lookback: i + lookback + 1]
         window_low  = low.iloc[i - lookback: i + lookback + 1]
@@ -144,10 +892,52 @@ def detect_pivots(high: pd.Series, low: pd.Series, lookback: int = 5) -> pd.Data
 # BOS / CHOCH 偵測
 # =============================================================================
 
+# 每根 K 線的結構事件代碼（detect_structure_arrays 的 codes 陣列）
+STRUCTURE_NONE          = 0
+STRUCTURE_BULLISH_BOS   = 1
+STRUCTURE_BULLISH_CHOCH = 2
+STRUCTURE_BEARISH_BOS   = -1
+STRUCTURE_BEARISH_CHOCH = -2
+
+STRUCTURE_EVENT_NAMES = {
+    STRUCTURE_BULLISH_BOS:   'bullish_bos',
+    STRUCTURE_BULLISH_CHOCH: 'bullish_choch',
+    STRUCTURE_BEARISH_BOS:   'bearish_bos',
+    STRUCTURE_BEARISH_CHOCH: 'bearish_choch',
+}
+
+# 每根 K 線的市場偏向代碼（SmcIndicators.bias_timeline）
+BIAS_NEUTRAL = 0
+BIAS_BULLISH = 1
+BIAS_BEARISH = -1
+
+BIAS_NAMES = {
+    BIAS_NEUTRAL: 'neutral',
+    BIAS_BULLISH: 'bullish',
+    BIAS_BEARISH: 'bearish',
+}
+
+
+def structure_bias_timeline(codes: np.ndarray) -> np.ndarray:
+    """
+    由結構事件代碼前向填補出每根 K 線的市場偏向
+
+    Args:
+        codes: detect_structure_arrays() 的 codes 陣列
+
+    Returns:
+        int8 陣列（BIAS_* 常數）：第 i 根為 i 以前（含）最後一個事件的方向
+    """
+    direction = np.sign(codes).astype(np.int8)
+    last_event = _last_true_index(direction != 0)
+    return np.where(last_event >= 0, direction[np.maximum(last_event, 0)], BIAS_NEUTRAL).astype(np.int8)
+
+
 def detect_structure(
     ohlcv: pd.DataFrame,
     pivots: pd.DataFrame,
-    lookback: int = 5
+    lookback: int = 5,
+    features: Optional[SmcFeatures] = None,
 ) -> list:
     """
     偵測 BOS / CHOCH 市場結構事件
@@ -161,6 +951,97 @@ def detect_structure(
     Returns:
         list of StructurePoint（按時間順序）
     """
+    features = features if features is not None else SmcFeatures(ohlcv)
+    events, _ = detect_structure_arrays(
+        features.close,
+        pivots['pivot_high'].to_numpy(dtype=np.float64),
+        pivots['pivot_low'].to_numpy(dtype=np.float64),
+        features.dates,
+        lookback,
+    )
+    return events
+
+
+def detect_structure_arrays(
+    close: np.ndarray,
+    pivot_high: np.ndarray,
+    pivot_low: np.ndarray,
+    dates: np.ndarray,
+    lookback: int = 5,
+) -> tuple:
+    """
+    BOS / CHOCH 狀態機（純陣列版，規則同 detect_structure）
+
+    Args:
+        close:      收盤價陣列
+        pivot_high: detect_pivots() 的 pivot_high 欄（NaN 表示非 pivot）
+        pivot_low:  detect_pivots() 的 pivot_low 欄
+        dates:      預先計算的日期標籤陣列（SmcFeatures.dates）
+        lookback:   pivot 確認延遲根數
+
+    Returns:
+        (events, codes)
+            - events: list of StructurePoint（與 detect_structure 相同）
+            - codes:  每根 K 線的事件代碼（int8，STRUCTURE_* 常數，0 = 無事件）
+    """
+    n      = len(close)
+    codes  = np.zeros(n, dtype=np.int8)
+    events = []
+
+    # 轉為 Python list，迴圈內只做純 float 運算（x != x 即 NaN）
+    close_l = close.tolist()
+    ph_l    = pivot_high.tolist()
+    pl_l    = pivot_low.tolist()
+
+    # 追蹤最近有效的 swing high/low（已確認的）
+    last_swing_high = np.nan
+    last_swing_low  = np.nan
+    current_bias    = 0      # 1 = bullish, -1 = bearish, 0 = neutral
+
+    for i in range(lookback * 2, n):
+        c = close_l[i]
+
+        # 更新 swing high/low（只接受 i - lookback 以前已確認的 pivot）
+        confirmed_idx = i - lookback
+        if confirmed_idx >= 0:
+            ph = ph_l[confirmed_idx]
+            pl = pl_l[confirmed_idx]
+            if ph == ph and (last_swing_high != last_swing_high or ph > last_swing_high):
+                last_swing_high = ph
+            if pl == pl and (last_swing_low != last_swing_low or pl < last_swing_low):
+                last_swing_low = pl
+
+        if last_swing_high == last_swing_high and c > last_swing_high:
+            code = STRUCTURE_BULLISH_CHOCH if current_bias == -1 else STRUCTURE_BULLISH_BOS
+            broken_level    = last_swing_high
+            current_bias    = 1
+            last_swing_high = np.nan
+        elif last_swing_low == last_swing_low and c < last_swing_low:
+            code = STRUCTURE_BEARISH_CHOCH if current_bias == 1 else STRUCTURE_BEARISH_BOS
+            broken_level    = last_swing_low
+            current_bias    = -1
+            last_swing_low  = np.nan
+        else:
+            continue
+
+        codes[i] = code
+        events.append(StructurePoint(
+            idx=i,
+            date=dates[i],
+            event=STRUCTURE_EVENT_NAMES[code],
+            broken_level=broken_level,
+            close=c,
+        ))
+
+    return events, codes
+
+
+def _detect_structure_loop(
+    ohlcv: pd.DataFrame,
+    pivots: pd.DataFrame,
+    lookback: int = 5
+) -> list:
+    """detect_structure() 的 pandas 逐根參考實作（供驗證使用）"""
     close  = ohlcv['Close']
     n      = len(close)
     events = []
@@ -228,7 +1109,11 @@ def detect_structure(
 # FVG 偵測
 # =============================================================================
 
-def detect_fvgs(ohlcv: pd.DataFrame, min_size_atr_ratio: float = 0.1) -> list:
+def detect_fvgs(
+    ohlcv: pd.DataFrame,
+    min_size_atr_ratio: float = 0.1,
+    features: Optional[SmcFeatures] = None,
+) -> list:
     """
     偵測公平價值缺口（Fair Value Gap）
 
@@ -236,14 +1121,66 @@ def detect_fvgs(ohlcv: pd.DataFrame, min_size_atr_ratio: float = 0.1) -> list:
     Bearish FVG: 三根 K 線中，High[i] < Low[i-2]
 
     第 i 根 K 線收盤即可確認，無前瞻偏差。
+    輸出順序與 _detect_fvgs_loop() 相同（依 idx 排序，同一根先 bullish 後 bearish）。
 
     Args:
         ohlcv: OHLCV DataFrame
         min_size_atr_ratio: FVG 最小大小 / ATR 比例（過濾雜訊小缺口）
+        features: 共用的 SmcFeatures（省略時臨時建立）
 
     Returns:
         list of FVG
     """
+    return list(detect_fvg_table(ohlcv, min_size_atr_ratio, features))
+
+
+def detect_fvg_table(
+    ohlcv: pd.DataFrame,
+    min_size_atr_ratio: float = 0.1,
+    features: Optional[SmcFeatures] = None,
+) -> FvgTable:
+    """
+    detect_fvgs() 的欄位表版本
+
+    缺口遮罩與 ATR 尺寸過濾皆以 NumPy 陣列一次計算，不建立任何 FVG 物件。
+    """
+    features = features if features is not None else SmcFeatures(ohlcv)
+    n = len(features)
+    if n < 3:
+        return FvgTable(
+            {'idx': [], 'direction': [], 'top': [], 'bottom': []}, features.dates, n
+        )
+
+    h   = features.high
+    l   = features.low
+    atr = features.atr  # 14 根 ATR，用於過濾過小缺口
+
+    # 第 i 根（i >= 2）對應的最小缺口；ATR 尚未就緒時不過濾
+    atr_i    = atr[2:]
+    min_size = np.where(np.isnan(atr_i), 0.0, atr_i * min_size_atr_ratio)
+
+    bull_gap = l[2:] - h[:-2]
+    bear_gap = l[:-2] - h[2:]
+    bull_idx = np.flatnonzero((bull_gap > 0) & (bull_gap >= min_size)) + 2
+    bear_idx = np.flatnonzero((bear_gap > 0) & (bear_gap >= min_size)) + 2
+
+    # 合併兩個方向：依 idx 排序，同一根 K 線 bullish（0）優先於 bearish（1）
+    idx_all = np.concatenate([bull_idx, bear_idx])
+    is_bear = np.concatenate([np.zeros(len(bull_idx), dtype=bool), np.ones(len(bear_idx), dtype=bool)])
+    order   = np.lexsort((is_bear, idx_all))
+    idx_all = idx_all[order]
+    is_bear = is_bear[order]
+
+    return FvgTable({
+        'idx':       idx_all,
+        'direction': np.where(is_bear, -1, 1),
+        'top':       np.where(is_bear, l[idx_all - 2], l[idx_all]),
+        'bottom':    np.where(is_bear, h[idx_all], h[idx_all - 2]),
+    }, features.dates, n)
+
+
+def _detect_fvgs_loop(ohlcv: pd.DataFrame, min_size_atr_ratio: float = 0.1) -> list:
+    """detect_fvgs() 的逐根迴圈參考實作（供驗證向量化版本使用）"""
     high  = ohlcv['High']
     low   = ohlcv['Low']
     close = ohlcv['Close']
@@ -302,9 +1239,9 @@ def update_fvg_fill_status(fvgs: list, ohlcv: pd.DataFrame, at_idx: int) -> None
         if fvg.filled:
             continue
         if fvg.direction == 'bullish' and close <= fvg.mid:
-            fvg.filled = True
+            fvg.filled, fvg.filled_at = True, at_idx
         elif fvg.direction == 'bearish' and close >= fvg.mid:
-            fvg.filled = True
+            fvg.filled, fvg.filled_at = True, at_idx
 
 
 # =============================================================================
@@ -315,7 +1252,8 @@ def detect_order_blocks(
     ohlcv: pd.DataFrame,
     structure_events: list,
     displacement_atr_ratio: float = 1.5,
-    lookback: int = 10
+    lookback: int = 10,
+    features: Optional[SmcFeatures] = None,
 ) -> list:
     """
     偵測訂單區塊（Order Block）
@@ -328,10 +1266,81 @@ def detect_order_blocks(
         structure_events: detect_structure() 的結果
         displacement_atr_ratio: 位移 K 線實體大小 / ATR 的最小倍數
         lookback: 往前搜尋 OB 的最大 K 線數
+        features: 共用的 SmcFeatures（省略時臨時建立）
 
     Returns:
         list of OrderBlock
     """
+    return list(detect_order_block_table(
+        ohlcv, structure_events, displacement_atr_ratio, lookback, features
+    ))
+
+
+def detect_order_block_table(
+    ohlcv: pd.DataFrame,
+    structure_events: list,
+    displacement_atr_ratio: float = 1.5,
+    lookback: int = 10,
+    features: Optional[SmcFeatures] = None,
+) -> OrderBlockTable:
+    """
+    detect_order_blocks() 的欄位表版本
+
+    所有事件一次向量化處理：位移 K 線以方向遮罩實體陣列（bullish_body / bearish_body）
+    的 RangeQuery.last_crossing 求出，每個事件 O(log n)、與 lookback 無關；
+    OB 則查 SmcFeatures 預先計算的「最近一根看跌/看漲 K 線索引」陣列，每個事件 O(1)。
+    """
+    features = features if features is not None else SmcFeatures(ohlcv)
+    n        = len(features)
+    events   = [e for e in structure_events if 'bullish' in e.event or 'bearish' in e.event]
+    if not events or lookback <= 0:
+        return OrderBlockTable({
+            'idx': [], 'direction': [], 'top': [], 'bottom': [],
+            'body_top': [], 'body_bottom': [],
+        }, features.dates, n)
+
+    ev_idx   = np.array([e.idx for e in events], dtype=np.int64)
+    ev_bull  = np.array(['bullish' in e.event for e in events], dtype=bool)
+    min_body = features.atr[ev_idx] * displacement_atr_ratio
+
+    # 位移起點：idx 以前最後一根實體 >= min_body 的同向 K 線，須落在 (max(idx - lookback, 0), idx]
+    # （min_body 為 NaN 時查無結果）
+    disp_idx = np.full(len(events), -1, dtype=np.int64)
+    for bull, name in ((True, 'bullish_body'), (False, 'bearish_body')):
+        rows = ev_bull == bull
+        if rows.any():
+            disp_idx[rows] = features.range_query(name).last_crossing(
+                ev_idx[rows], min_body[rows], 'ge'
+            )
+    has_disp = disp_idx > np.maximum(ev_idx - lookback, 0)
+
+    # OB = 位移 K 線之前（視窗 (max(disp - lookback, 0), disp - 1]）的最後一根反向 K 線
+    prev   = np.maximum(disp_idx - 1, 0)
+    ob_idx = np.where(ev_bull, features.last_bearish_idx[prev], features.last_bullish_idx[prev])
+    has_ob = has_disp & (ob_idx > np.maximum(disp_idx - lookback, 0))
+
+    ob_idx  = ob_idx[has_ob]
+    ob_bull = ev_bull[has_ob]
+    open_   = features.open[ob_idx]
+    close   = features.close[ob_idx]
+
+    return OrderBlockTable({
+        'idx':         ob_idx,
+        'direction':   np.where(ob_bull, 1, -1),
+        'top':         features.high[ob_idx],
+        'bottom':      features.low[ob_idx],
+        'body_top':    np.where(ob_bull, open_, close),
+        'body_bottom': np.where(ob_bull, close, open_),
+    }, features.dates, n)
+
+
+def _detect_order_blocks_loop(
+    ohlcv: pd.DataFrame,
+    structure_events: list,
+    displacement_atr_ratio: float = 1.5,
+    lookback: int = 10
+) -> list:
+    """detect_order_blocks() 的逐根迴圈參考實作（供驗證使用）"""
     open_  = ohlcv['Open']
     high   = ohlcv['High']
     low    = ohlcv['Low']
@@ -419,23 +1428,6 @@ def detect_order_blocks(
     return obs
 
 
-def invalidate_order_blocks(obs: list, ohlcv: pd.DataFrame, at_idx: int) -> None:
-    """
-    使已失效的 OB 標記為 invalid（in-place）
-
-    Bullish OB 失效：收盤 < OB.bottom
-    Bearish OB 失效：收盤 > OB.top
-    """
-    close = ohlcv['Close'].iloc[at_idx]
-    for ob in obs:
-        if not ob.valid:
-            continue
-        if ob.direction == 'bullish' and close < ob.bottom:
-            ob.valid = False
-        elif ob.direction == 'bearish' and close > ob.top:
-            ob.valid = False
-
-
 # =============================================================================
 # 流動性池偵測
 # =============================================================================
@@ -444,19 +1436,190 @@ def detect_liquidity_pools(
     pivots: pd.DataFrame,
     ohlcv: pd.DataFrame,
     tolerance_pct: float = 0.002,
-    min_count: int = 2
+    min_count: int = 2,
+    greedy: bool = True,
+    features: Optional[SmcFeatures] = None,
 ) -> list:
     """
     偵測流動性池（等高/等低）
 
+    以價格排序的 pivot 索引做分群，價格皆為正時複雜度 O(k log k)（k = pivot 數）：
+    - greedy=True（預設，相容模式）：保留原本「依時間順序取錨點，吸收之後所有
+      容忍度內且未被使用的 pivot」的貪婪語意，結果與 _detect_liquidity_pools_loop() 相同；
+      每個錨點只需在價格排序陣列中二分搜尋容忍度視窗。
+    - greedy=False：純價格滑動視窗分群（由低到高，以視窗起點為基準），
+      不再依時間順序決定錨點。
+
     Args:
         pivots: detect_pivots() 結果
         tolerance_pct: 視為「等高/等低」的容忍百分比（預設 0.2%）
         min_count: 最少幾個點才構成流動性池
+        greedy: 是否使用與舊版相同的貪婪錨點語意
+        features: 共用的 SmcFeatures（僅用於日期標籤，省略時臨時建立）
+
+    Returns:
+        list of LiquidityPool（先 buy-side 後 sell-side，各自依錨點時間排序）
+    """
+    return list(detect_liquidity_pool_table(
+        pivots, ohlcv, tolerance_pct, min_count, greedy, features
+    ))
+
+
+def detect_liquidity_pool_table(
+    pivots: pd.DataFrame,
+    ohlcv: pd.DataFrame,
+    tolerance_pct: float = 0.002,
+    min_count: int = 2,
+    greedy: bool = True,
+    features: Optional[SmcFeatures] = None,
+) -> LiquidityPoolTable:
+    """detect_liquidity_pools() 的欄位表版本（列順序相同）"""
+    features = features if features is not None else SmcFeatures(ohlcv)
+    cluster  = _cluster_levels_greedy if greedy else _cluster_levels_sorted
+    columns  = {'idx': [], 'direction': [], 'mid': [], 'count': []}
+
+    for column, code in (('pivot_high', 1), ('pivot_low', -1)):
+        values = pivots[column].to_numpy(dtype=np.float64)
+        idx    = np.flatnonzero(~np.isnan(values))
+        levels = values[idx]
+
+        for members in cluster(levels, tolerance_pct, min_count):
+            columns['idx'].append(idx[max(members)])
+            columns['direction'].append(code)
+            columns['mid'].append(np.mean(levels[members]))
+            columns['count'].append(len(members))
+
+    columns['top'] = columns['bottom'] = columns['mid']
+    return LiquidityPoolTable(columns, features.dates, len(features))
+
+
+def _cluster_levels_greedy(
+    levels: np.ndarray,
+    tolerance_pct: float,
+    min_count: int,
+    include_unformed: bool = False,
+) -> list:
+    """
+    貪婪錨點分群（相容模式）
+
+    依時間順序處理錨點；pivot 依價格排序後位置固定，尚存集合（未處理且未被使用的 pivot）
+    以「下一個尚存位置」指標陣列（路徑壓縮）表示：移除為攤銷 O(log k)，
+    列舉容忍度視窗時只走訪尚存者。已處理的錨點必早於之後所有錨點，故可直接移除。
+
+    複雜度：價格皆為正時 O(k log k)（每個錨點二分搜尋視窗；成形群集的候選隨即移除，
+    未成形群集的候選少於 min_count 個，重複走訪有限）。非正價格的錨點沿用 NumPy
+    除法語意逐一比對所有尚存 pivot，每個 O(k)。
+
+    Args:
+        include_unformed: 一併回傳未達 min_count 的錨點群集（供增量模式重建狀態）
+
+    Returns:
+        list of list[int]：每個群集的 pivot 序號（依時間排序，首個為錨點）
+    """
+    k = len(levels)
+    order     = np.lexsort((np.arange(k), levels))        # 價格排序，平手依時間
+    order_l   = order.tolist()                             # 排序位置 -> pivot 序號
+    sorted_lv = levels[order].tolist()                     # 排序後價格（供 bisect）
+    rank      = np.empty(k, dtype=np.int64)
+    rank[order] = np.arange(k)
+    rank      = rank.tolist()                              # pivot 序號 -> 排序位置
+    nxt       = list(range(k + 1))                         # 排序位置 -> 下一個尚存位置（k 為哨兵）
+    level_l   = levels.tolist()
+    used      = np.zeros(k, dtype=bool)
+    clusters  = []
+
+    def next_alive(i: int) -> int:
+        root = i
+        while nxt[root] != root:
+            root = nxt[root]
+        while nxt[i] != root:
+            nxt[i], i = root, nxt[i]
+        return root
+
+    def alive_between(lo: int, hi: int) -> list:
+        found = []
+        i = next_alive(lo)
+        while i < hi:
+            found.append(order_l[i])
+            i = next_alive(i + 1)
+        return found
+
+    def remove(pos: int) -> None:
+        nxt[rank[pos]] = rank[pos] + 1
+
+    for anchor in range(k):
+        if used[anchor]:
+            continue
+        remove(anchor)
+        h1 = level_l[anchor]
+
+        if h1 > 0:
+            # 放寬視窗後再以原始公式精確過濾，避免浮點邊界誤差
+            span = h1 * tolerance_pct * (1 + 1e-9) + 1e-12
+            lo = bisect.bisect_left(sorted_lv, h1 - span)
+            hi = bisect.bisect_right(sorted_lv, h1 + span)
+            candidates = sorted(
+                pos for pos in alive_between(lo, hi)
+                if abs(level_l[pos] - h1) / h1 <= tolerance_pct
+            )
+        else:
+            # 非正價格：沿用 NumPy 除法語意（除以 0 得 inf/nan）逐一比對
+            with np.errstate(divide='ignore', invalid='ignore'):
+                candidates = sorted(
+                    pos for pos in alive_between(0, k)
+                    if np.abs(levels[pos] - levels[anchor]) / levels[anchor] <= tolerance_pct
+                )
+        members = [anchor] + candidates
+        if len(members) >= min_count:
+            clusters.append(members)
+            for pos in candidates:
+                used[pos] = True
+                remove(pos)
+        elif include_unformed:
+            clusters.append(members)
+
+    return clusters
+
+
+def _cluster_levels_sorted(levels: np.ndarray, tolerance_pct: float, min_count: int) -> list:
+    """
+    純價格滑動視窗分群
+
+    價格由低到高排序，以視窗起點為基準，吸收容忍度內的連續價格；
+    群集不足 min_count 時視窗起點右移一格。
 
     Returns:
-        list of LiquidityPool
+        list of list[int]：每個群集的 pivot 序號（依時間排序），群集依首個成員時間排序
     """
+    k = len(levels)
+    order     = np.lexsort((np.arange(k), levels))
+    sorted_lv = levels[order]
+    clusters  = []
+
+    start = 0
+    while start < k:
+        anchor = sorted_lv[start]
+        if anchor > 0:
+            end = int(np.searchsorted(sorted_lv, anchor * (1 + tolerance_pct), side='right'))
+        else:
+            end = start + 1
+        if end - start >= min_count:
+            clusters.append(sorted(order[start:end].tolist()))
+            start = end
+        else:
+            start += 1
+
+    clusters.sort(key=lambda members: members[0])
+    return clusters
+
+
+def _detect_liquidity_pools_loop(
+    pivots: pd.DataFrame,
+    ohlcv: pd.DataFrame,
+    tolerance_pct: float = 0.002,
+    min_count: int = 2
+) -> list:
+    """detect_liquidity_pools() 的 O(k²) 兩兩比對參考實作（供驗證使用）"""
     pools = []
 
     # Buy-side liquidity (等高，止損集中在上方)
@@ -520,6 +1683,63 @@ def detect_liquidity_pools(
     return pools
 
 
+class _LiquidityLadder:
+    """
+    依 K 線索引推進的有效流動性價位（各側排序），最近 BSL / SSL 以 bisect 查詢
+
+    池在 lp.idx 加入、在 swept_at 移除；查詢索引往回時自頭重播。
+    回測依序查詢時每個池只進出一次。
+    """
+
+    def __init__(self, pools: LiquidityPoolTable):
+        live  = ~np.isnan(pools.level)
+        swept = live & pools.ended
+        bars  = np.concatenate([pools.idx[live], pools.end[swept]])
+        order = np.argsort(bars, kind='stable')
+
+        added  = np.concatenate([np.ones(live.sum(), dtype=bool), np.zeros(swept.sum(), dtype=bool)])
+        sides  = np.concatenate([pools.direction[live], pools.direction[swept]])
+        levels = np.concatenate([pools.level[live], pools.level[swept]])
+
+        # 價位保持 np.float64 純量（與 LiquidityPool.level 相同），止盈價取整結果不變
+        self._bars   = bars[order].tolist()
+        self._events = list(zip(
+            self._bars, added[order].tolist(), sides[order].tolist(), list(levels[order])
+        ))
+        self._reset()
+
+    def _reset(self) -> None:
+        self._levels = {1: [], -1: []}   # buy-side / sell-side
+        self._pos    = 0
+        self._at     = -1
+
+    def _advance(self, idx: int) -> None:
+        if idx < self._at:
+            self._reset()
+        end = bisect.bisect_right(self._bars, idx)
+        for _, added, direction, level in self._events[self._pos:end]:
+            levels = self._levels[direction]
+            if added:
+                bisect.insort(levels, level)
+            else:
+                del levels[bisect.bisect_left(levels, level)]
+        self._pos = end
+        self._at  = idx
+
+    def nearest(self, price: float, idx: int) -> tuple:
+        """idx 時價格上方最近的 BSL、下方最近的 SSL（無則 nan）"""
+        self._advance(idx)
+        if np.isnan(price):
+            return np.nan, np.nan
+
+        bsl = self._levels[1]
+        i   = bisect.bisect_right(bsl, price)
+        ssl = self._levels[-1]
+        j   = bisect.bisect_left(ssl, price)
+        return (bsl[i] if i < len(bsl) else np.nan,
+                ssl[j - 1] if j > 0 else np.nan)
+
+
 # =============================================================================
 # SMC 指標彙整類
 # =============================================================================
@@ -532,9 +1752,28 @@ class SmcIndicators:
         smc = SmcIndicators(ohlcv_df)
         signal = smc.get_signal_at(idx)
 
-    所有計算在首次存取時執行，後續使用快取。
+    所有計算在首次存取時執行，後續使用快取。偵測結果（欄位表、時間序列）皆為唯讀，
+    precompute() 之後可由多個回測同時共用；依查詢索引推進的狀態放在 SmcCursor，
+    每次回測用 cursor() 另建一份。with_params() 以不同參數衍生新實例時，
+    沿用所有上游輸入未變的結果。
     """
 
+    # 各惰性結果所依賴的參數（with_params 依此判斷可沿用者；特徵只依賴 ohlcv）
+    _ARTIFACT_PARAMS = {
+        '_features':             (),
+        '_pivot_pyramid':        (),
+        '_pivots':               ('pivot_lookback',),
+        '_structure':            ('pivot_lookback',),
+        '_structure_codes':      ('pivot_lookback',),
+        '_bias_timeline':        ('pivot_lookback',),
+        '_swing_high_timeline':  ('pivot_lookback',),
+        '_swing_low_timeline':   ('pivot_lookback',),
+        '_equilibrium_timeline': ('pivot_lookback',),
+        '_fvg_table':            ('fvg_min_size_atr',),
+        '_ob_table':             ('pivot_lookback', 'displacement_atr'),
+        '_lp_table':             ('pivot_lookback', 'lp_tolerance_pct'),
+    }
+
     def __init__(
         self,
         ohlcv: pd.DataFrame,
@@ -557,78 +1796,270 @@ class SmcIndicators:
         self.displacement_atr   = displacement_atr
         self.lp_tolerance_pct   = lp_tolerance_pct
 
+        self._features: Optional[SmcFeatures]  = None
         self._pivots: Optional[pd.DataFrame]   = None
+        self._pivot_pyramid: Optional[PivotPyramid] = None
         self._structure: Optional[list]        = None
-        self._fvgs: Optional[list]             = None
-        self._obs: Optional[list]              = None
-        self._lp: Optional[list]               = None
+        self._structure_codes: Optional[np.ndarray] = None
+        self._bias_timeline: Optional[np.ndarray]   = None
+        self._swing_high_timeline: Optional[np.ndarray]  = None
+        self._swing_low_timeline: Optional[np.ndarray]   = None
+        self._equilibrium_timeline: Optional[np.ndarray] = None
+        self._fvg_table: Optional[FvgTable]          = None
+        self._ob_table: Optional[OrderBlockTable]    = None
+        self._lp_table: Optional[LiquidityPoolTable] = None
+        # 未指定游標的查詢（find_active_* / get_nearest_liquidity）各執行緒各用一份
+        self._local = threading.local()
+
+    @property
+    def params(self) -> dict:
+        """SMC 偵測參數（與 smc_config 的同名欄位對應）"""
+        return {
+            'pivot_lookback':   self.pivot_lookback,
+            'fvg_min_size_atr': self.fvg_min_size_atr,
+            'displacement_atr': self.displacement_atr,
+            'lp_tolerance_pct': self.lp_tolerance_pct,
+        }
+
+    @property
+    def nbytes(self) -> int:
+        """
+        已計算結果的估計記憶體用量（位元組）
+
+        計入特徵、Pivot、時間序列與區域欄位表的陣列；結構事件以每筆約 200 位元組估計，
+        dataclass view 不計（可隨時重建）。供 smc_cache 控制記憶體預算。
+        """
+        total = 0
+        if self._features is not None:
+            total += self._features.nbytes
+        if self._pivots is not None:
+            total += int(self._pivots.memory_usage(index=True, deep=False).sum())
+        if self._structure is not None:
+            total += 200 * len(self._structure)
+        for arr in (self._structure_codes, self._bias_timeline, self._swing_high_timeline,
+                    self._swing_low_timeline, self._equilibrium_timeline):
+            if arr is not None:
+                total += arr.nbytes
+        for table in (self._fvg_table, self._ob_table, self._lp_table):
+            if table is not None:
+                total += sum(arr.nbytes for arr in table.columns.values())
+        return total
+
+    def with_params(self, **changes) -> 'SmcIndicators':
+        """
+        以部分不同的 SMC 參數衍生新實例，沿用上游輸入未變的已計算結果
+
+        例：只改 displacement_atr 時沿用特徵、Pivot、結構、FVG 與流動性池，
+        只重算 Order Block；只改 lp_tolerance_pct 時只重算流動性池。
+        未計算過的結果在新實例中照常惰性計算。
+        """
+        unknown = set(changes) - set(self.params)
+        if unknown:
+            raise TypeError(f'未知的 SMC 參數: {sorted(unknown)}')
+
+        params  = {**self.params, **changes}
+        derived = SmcIndicators(self.ohlcv, **params)
+        for attr, deps in self._ARTIFACT_PARAMS.items():
+            value = getattr(self, attr)
+            if value is not None and all(params[k] == self.params[k] for k in deps):
+                setattr(derived, attr, value)
+        return derived
+
+    def precompute(self) -> 'SmcIndicators':
+        """一次算完所有惰性結果；之後的讀取不再寫入實例，可跨執行緒共用"""
+        _ = self.bias_timeline
+        _ = self.equilibrium_timeline
+        _ = self.fvg_table
+        _ = self.order_block_table
+        _ = self.liquidity_pool_table
+        return self
+
+    def cursor(self) -> 'SmcCursor':
+        """建立單次回測專用的查詢游標"""
+        return SmcCursor(self)
+
+    @property
+    def _default_cursor(self) -> 'SmcCursor':
+        cursor = getattr(self._local, 'cursor', None)
+        if cursor is None:
+            cursor = self._local.cursor = SmcCursor(self)
+        return cursor
+
+    @property
+    def features(self) -> SmcFeatures:
+        """共用 K 線特徵（TR / ATR / 實體 / 多空旗標），供偵測器與策略讀取"""
+        if self._features is None:
+            self._features = SmcFeatures(self.ohlcv)
+        return self._features
+
+    @property
+    def pivot_pyramid(self) -> PivotPyramid:
+        """
+        所有 lookback 共用的 Pivot 強度（參數掃描用）
+
+        計算後 pivots 直接由強度比較取得；with_params 衍生的實例一併沿用，
+        掃描 pivot_lookback 時不再重跑 detect_pivots。
+        """
+        if self._pivot_pyramid is None:
+            logger.info('[SMC] 計算 Pivot 強度...')
+            self._pivot_pyramid = PivotPyramid(
+                self.ohlcv['High'], self.ohlcv['Low'], features=self.features
+            )
+        return self._pivot_pyramid
 
     @property
     def pivots(self) -> pd.DataFrame:
         if self._pivots is None:
-            logger.info('[SMC] 計算 Pivot 高低點...')
-            self._pivots = detect_pivots(
-                self.ohlcv['High'], self.ohlcv['Low'], self.pivot_lookback
-            )
+            if self._pivot_pyramid is not None:
+                self._pivots = self._pivot_pyramid.pivots(self.pivot_lookback)
+            else:
+                logger.info('[SMC] 計算 Pivot 高低點...')
+                self._pivots = detect_pivots(
+                    self.ohlcv['High'], self.ohlcv['Low'], self.pivot_lookback,
+                    features=self.features,
+                )
         return self._pivots
 
     @property
     def structure(self) -> list:
         if self._structure is None:
             logger.info('[SMC] 偵測市場結構 (BOS/CHOCH)...')
-            self._structure = detect_structure(self.ohlcv, self.pivots, self.pivot_lookback)
+            self._structure, self._structure_codes = detect_structure_arrays(
+                self.features.close,
+                self.pivots['pivot_high'].to_numpy(dtype=np.float64),
+                self.pivots['pivot_low'].to_numpy(dtype=np.float64),
+                self.features.dates,
+                self.pivot_lookback,
+            )
         return self._structure
 
     @property
-    def fvgs(self) -> list:
-        if self._fvgs is None:
+    def structure_codes(self) -> np.ndarray:
+        """每根 K 線的結構事件代碼（int8，STRUCTURE_* 常數）"""
+        if self._structure_codes is None:
+            _ = self.structure
+        return self._structure_codes
+
+    @property
+    def fvg_table(self) -> FvgTable:
+        """FVG 欄位表（含填補 K 線）"""
+        if self._fvg_table is None:
             logger.info('[SMC] 偵測 FVG...')
-            self._fvgs = detect_fvgs(self.ohlcv, self.fvg_min_size_atr)
-        return self._fvgs
+            table = detect_fvg_table(self.ohlcv, self.fvg_min_size_atr, features=self.features)
+            self._fvg_table = table.resolve_fills(self.features.range_query('close'))
+        return self._fvg_table
 
     @property
-    def order_blocks(self) -> list:
-        if self._obs is None:
+    def order_block_table(self) -> OrderBlockTable:
+        """Order Block 欄位表（含失效 K 線）"""
+        if self._ob_table is None:
             logger.info('[SMC] 偵測 Order Block...')
-            self._obs = detect_order_blocks(
-                self.ohlcv, self.structure, self.displacement_atr
+            table = detect_order_block_table(
+                self.ohlcv, self.structure, self.displacement_atr,
+                features=self.features,
             )
-        return self._obs
+            self._ob_table = table.resolve_invalidations(self.features.range_query('close'))
+        return self._ob_table
 
     @property
-    def liquidity_pools(self) -> list:
-        if self._lp is None:
+    def liquidity_pool_table(self) -> LiquidityPoolTable:
+        """流動性池欄位表（含被掃 K 線）"""
+        if self._lp_table is None:
             logger.info('[SMC] 偵測流動性池...')
-            self._lp = detect_liquidity_pools(
-                self.pivots, self.ohlcv, self.lp_tolerance_pct
+            table = detect_liquidity_pool_table(
+                self.pivots, self.ohlcv, self.lp_tolerance_pct,
+                features=self.features,
             )
-        return self._lp
+            self._lp_table = table.resolve_sweeps(
+                self.features.range_query('high'), self.features.range_query('low')
+            )
+        return self._lp_table
+
+    @property
+    def fvgs(self) -> list:
+        """FVG list（每次呼叫皆為新建的 dataclass，修改不影響 fvg_table）"""
+        return list(self.fvg_table)
+
+    @property
+    def order_blocks(self) -> list:
+        """Order Block list（每次呼叫皆為新建的 dataclass，修改不影響 order_block_table）"""
+        return list(self.order_block_table)
+
+    @property
+    def liquidity_pools(self) -> list:
+        """流動性池 list（每次呼叫皆為新建的 dataclass，修改不影響 liquidity_pool_table）"""
+        return list(self.liquidity_pool_table)
+
+    @property
+    def bias_timeline(self) -> np.ndarray:
+        """
+        每根 K 線的市場偏向（int8：BIAS_BULLISH=1 / BIAS_BEARISH=-1 / BIAS_NEUTRAL=0）
+
+        由結構事件前向填補，結構偵測後計算一次；可直接用於向量化策略。
+        """
+        if self._bias_timeline is None:
+            timeline = structure_bias_timeline(self.structure_codes)
+            timeline.setflags(write=False)
+            self._bias_timeline = timeline
+        return self._bias_timeline
 
     def get_current_bias(self, up_to_idx: int) -> str:
         """取得 up_to_idx 時的市場偏向（'bullish' | 'bearish' | 'neutral'）"""
-        bias = 'neutral'
-        for event in self.structure:
-            if event.idx > up_to_idx:
-                break
-            if 'bullish' in event.event:
-                bias = 'bullish'
-            elif 'bearish' in event.event:
-                bias = 'bearish'
-        return bias
+        timeline = self.bias_timeline
+        if up_to_idx < 0 or len(timeline) == 0:
+            return 'neutral'
+        return BIAS_NAMES[int(timeline[min(up_to_idx, len(timeline) - 1)])]
 
     def get_active_fvgs(self, direction: str, up_to_idx: int) -> list:
-        """取得 up_to_idx 前仍有效（未填補）的 FVG"""
-        return [f for f in self.fvgs
-                if f.direction == direction
-                and f.idx <= up_to_idx
-                and not f.filled]
+        """取得 up_to_idx 時仍有效（已完成、尚未填補）的 FVG"""
+        return self.fvg_table.active(direction, up_to_idx)
 
     def get_active_obs(self, direction: str, up_to_idx: int) -> list:
-        """取得 up_to_idx 前仍有效的 OB"""
-        return [ob for ob in self.order_blocks
-                if ob.direction == direction
-                and ob.idx <= up_to_idx
-                and ob.valid]
+        """取得 up_to_idx 時仍有效（尚未被收盤穿越）的 OB"""
+        return self.order_block_table.active(direction, up_to_idx)
+
+    def _compute_swing_timelines(self) -> None:
+        """一次向量化前向填補最近 swing high / low 與折扣/溢價分界"""
+        ph = self.pivots['pivot_high'].to_numpy(dtype=np.float64)
+        pl = self.pivots['pivot_low'].to_numpy(dtype=np.float64)
+
+        last_ph = _last_true_index(~np.isnan(ph))
+        last_pl = _last_true_index(~np.isnan(pl))
+        swing_high  = np.where(last_ph >= 0, ph[np.maximum(last_ph, 0)], np.nan)
+        swing_low   = np.where(last_pl >= 0, pl[np.maximum(last_pl, 0)], np.nan)
+        equilibrium = (swing_low + swing_high) / 2
+
+        for arr in (swing_high, swing_low, equilibrium):
+            arr.setflags(write=False)
+        self._swing_high_timeline  = swing_high
+        self._swing_low_timeline   = swing_low
+        self._equilibrium_timeline = equilibrium
+
+    @property
+    def swing_high_timeline(self) -> np.ndarray:
+        """每根 K 線以前（含）最近的 pivot high（float64，NaN 表示尚無）"""
+        if self._swing_high_timeline is None:
+            self._compute_swing_timelines()
+        return self._swing_high_timeline
+
+    @property
+    def swing_low_timeline(self) -> np.ndarray:
+        """每根 K 線以前（含）最近的 pivot low（float64，NaN 表示尚無）"""
+        if self._swing_low_timeline is None:
+            self._compute_swing_timelines()
+        return self._swing_low_timeline
+
+    @property
+    def equilibrium_timeline(self) -> np.ndarray:
+        """每根 K 線的折扣/溢價分界（(swing_low + swing_high) / 2，任一缺值則 NaN）"""
+        if self._equilibrium_timeline is None:
+            self._compute_swing_timelines()
+        return self._equilibrium_timeline
+
+    def _timeline_at(self, timeline: np.ndarray, up_to_idx: int) -> float:
+        if up_to_idx < 0 or len(timeline) == 0:
+            return np.nan
+        return float(timeline[min(up_to_idx, len(timeline) - 1)])
 
     def get_swing_range(self, up_to_idx: int) -> tuple:
         """
@@ -637,37 +2068,16 @@ class SmcIndicators:
         Returns:
             (swing_low, swing_high)
         """
-        swing_high = np.nan
-        swing_low  = np.nan
-
-        # 往前找最近的 pivot high/low
-        for i in range(min(up_to_idx, len(self.pivots) - 1), -1, -1):
-            ph = self.pivots['pivot_high'].iloc[i]
-            pl = self.pivots['pivot_low'].iloc[i]
-            if np.isnan(swing_high) and not np.isnan(ph):
-                swing_high = ph
-            if np.isnan(swing_low) and not np.isnan(pl):
-                swing_low = pl
-            if not np.isnan(swing_high) and not np.isnan(swing_low):
-                break
-
-        return swing_low, swing_high
+        return (self._timeline_at(self.swing_low_timeline, up_to_idx),
+                self._timeline_at(self.swing_high_timeline, up_to_idx))
 
     def is_in_discount(self, price: float, up_to_idx: int) -> bool:
         """判斷當前價格是否在折扣區（< 50% 擺動中點）"""
-        swing_low, swing_high = self.get_swing_range(up_to_idx)
-        if np.isnan(swing_low) or np.isnan(swing_high):
-            return False
-        equilibrium = (swing_low + swing_high) / 2
-        return price < equilibrium
+        return price < self._timeline_at(self.equilibrium_timeline, up_to_idx)
 
     def is_in_premium(self, price: float, up_to_idx: int) -> bool:
         """判斷當前價格是否在溢價區（> 50% 擺動中點）"""
-        swing_low, swing_high = self.get_swing_range(up_to_idx)
-        if np.isnan(swing_low) or np.isnan(swing_high):
-            return False
-        equilibrium = (swing_low + swing_high) / 2
-        return price > equilibrium
+        return price > self._timeline_at(self.equilibrium_timeline, up_to_idx)
 
     def price_in_fvg(self, price: float, fvg: FVG) -> bool:
         """判斷價格是否在 FVG 內"""
@@ -677,36 +2087,24 @@ class SmcIndicators:
         """判斷價格是否在 OB 內"""
         return ob.bottom <= price <= ob.top
 
+    def find_active_fvg(self, direction: str, price: float, up_to_idx: int) -> Optional[FVG]:
+        """up_to_idx 時包含 price 的最近一個有效 FVG（區間索引查詢），無則 None"""
+        return self._default_cursor.find_active_fvg(direction, price, up_to_idx)
+
+    def find_active_ob(self, direction: str, price: float, up_to_idx: int) -> Optional[OrderBlock]:
+        """up_to_idx 時包含 price 的最近一個有效 OB（區間索引查詢），無則 None"""
+        return self._default_cursor.find_active_ob(direction, price, up_to_idx)
+
     def get_nearest_liquidity(self, price: float, up_to_idx: int) -> tuple:
         """
-        取得最近的 buy-side / sell-side 流動性池
+        取得 up_to_idx 時最近的 buy-side / sell-side 流動性池（已成形、尚未被掃）
 
         Returns:
             (nearest_bsl, nearest_ssl)  浮點數或 nan
         """
-        valid_lp = [lp for lp in self.liquidity_pools
-                    if lp.idx <= up_to_idx and not lp.swept]
-
-        bsl_levels = [lp.level for lp in valid_lp
-                      if lp.direction == 'buy_side' and lp.level > price]
-        ssl_levels = [lp.level for lp in valid_lp
-                      if lp.direction == 'sell_side' and lp.level < price]
-
-        nearest_bsl = min(bsl_levels) if bsl_levels else np.nan
-        nearest_ssl = max(ssl_levels) if ssl_levels else np.nan
-
-        return nearest_bsl, nearest_ssl
-
-    def update_at(self, idx: int) -> None:
-        """
-        在回測迴圈中每個 bar 呼叫，更新 FVG 填補狀態 & OB 失效狀態
+        return self._default_cursor.get_nearest_liquidity(price, up_to_idx)
 
-        必須在 get_signal_at 之前呼叫。
-        """
-        update_fvg_fill_status(self.fvgs, self.ohlcv, idx)
-        invalidate_order_blocks(self.order_blocks, self.ohlcv, idx)
-
-    def get_signal_at(self, idx: int) -> SmcSignals:
+    def get_signal_at(self, idx: int) -> SmcSignalView:
         """
         取得指定索引的完整 SMC 訊號
 
@@ -714,30 +2112,50 @@ class SmcIndicators:
             idx: K 線索引（此時刻的資訊，無前瞻偏差）
 
         Returns:
-            SmcSignals 實例
+            SmcSignalView（欄位同 SmcSignals，讀取時才計算；需要 dataclass 時用 to_signals()）
         """
-        date_str = str(self.ohlcv.index[idx])[:10]
-        close    = self.ohlcv['Close'].iloc[idx]
-
-        bias = self.get_current_bias(idx)
-
-        # 折扣/溢價
-        swing_low, swing_high = self.get_swing_range(idx)
-        equilibrium = (swing_low + swing_high) / 2 if not (np.isnan(swing_low) or np.isnan(swing_high)) else np.nan
-
-        # 流動性池
-        nearest_bsl, nearest_ssl = self.get_nearest_liquidity(close, idx)
-
-        return SmcSignals(
-            date=date_str,
-            bias=bias,
-            active_bullish_fvgs=self.get_active_fvgs('bullish', idx),
-            active_bearish_fvgs=self.get_active_fvgs('bearish', idx),
-            active_bullish_obs=self.get_active_obs('bullish', idx),
-            active_bearish_obs=self.get_active_obs('bearish', idx),
-            last_swing_high=swing_high if not np.isnan(swing_high) else 0.0,
-            last_swing_low=swing_low if not np.isnan(swing_low) else 0.0,
-            equilibrium=equilibrium if not np.isnan(equilibrium) else 0.0,
-            nearest_bsl=nearest_bsl if not np.isnan(nearest_bsl) else 0.0,
-            nearest_ssl=nearest_ssl if not np.isnan(nearest_ssl) else 0.0,
-        )
+        return SmcSignalView(self, idx)
+
+
+# =============================================================================
+# 查詢游標（單次回測的推進狀態）
+# =============================================================================
+
+class SmcCursor:
+    """
+    單次回測專用的查詢游標
+
+    持有依查詢索引推進的結構：流動性 ladder 與 FVG / OB 的活躍區域區間索引。
+    SmcIndicators 本身只保存唯讀的偵測結果，多個回測可共用同一實例，
+    各自以 smc.cursor() 取得游標（游標本身不可跨執行緒共用）。
+    """
+
+    def __init__(self, smc: SmcIndicators):
+        self.smc = smc
+        self._lp_ladder: Optional[_LiquidityLadder] = None
+        self._fvg_index: Optional[ActiveZoneIndex]  = None
+        self._ob_index: Optional[ActiveZoneIndex]   = None
+
+    def find_active_fvg(self, direction: str, price: float, up_to_idx: int) -> Optional[FVG]:
+        """up_to_idx 時包含 price 的最近一個有效 FVG，無則 None"""
+        if self._fvg_index is None:
+            self._fvg_index = ActiveZoneIndex(self.smc.fvg_table)
+        row = self._fvg_index.find(direction, price, up_to_idx)
+        return None if row is None else self.smc.fvg_table[row]
+
+    def find_active_ob(self, direction: str, price: float, up_to_idx: int) -> Optional[OrderBlock]:
+        """up_to_idx 時包含 price 的最近一個有效 OB，無則 None"""
+        if self._ob_index is None:
+            self._ob_index = ActiveZoneIndex(self.smc.order_block_table)
+        row = self._ob_index.find(direction, price, up_to_idx)
+        return None if row is None else self.smc.order_block_table[row]
+
+    def get_nearest_liquidity(self, price: float, up_to_idx: int) -> tuple:
+        """up_to_idx 時價格上方最近的 BSL、下方最近的 SSL（無則 nan）"""
+        if self._lp_ladder is None:
+            self._lp_ladder = _LiquidityLadder(self.smc.liquidity_pool_table)
+        return self._lp_ladder.nearest(price, up_to_idx)
+
+    def get_signal_at(self, idx: int) -> SmcSignalView:
+        """同 SmcIndicators.get_signal_at，但流動性查詢使用本游標"""
+        return SmcSignalView(self.smc, idx, self)
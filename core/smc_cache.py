@@ -0,0 +1,177 @@
+"""
+SMC 指標快取（行程共用）
+
+以 (資料指紋, timeframe, pivot_lookback, fvg_min_size_atr, displacement_atr,
+lp_tolerance_pct) 為鍵，快取預計算完成的 SmcIndicators。回測只改資金、槓桿、
+風險或出場設定時，可直接取回已偵測好的指標，不再重跑偵測。
+
+依記憶體預算做 LRU 淘汰，並記錄命中 / 未命中 / 淘汰次數。
+
+用法：
+    from core.smc_cache import smc_cache
+    indicators = smc_cache.get_or_compute(ohlcv, '1d', pivot_lookback=5, ...)
+    smc_cache.stats()
+
+資料指紋需雜湊整份 OHLCV；同一份資料重複查詢時，呼叫端可先以 ohlcv_fingerprint
+算好一次並以 fingerprint= 傳入（smc_service 對預計算資料即如此）。
+"""
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from core.config import SMC_CACHE_MAX_BYTES
+from core.smc import SmcIndicators
+
+logger = logging.getLogger(__name__)
+
+# SmcIndicators 的 SMC 參數（快取鍵的一部分，順序固定）
+SMC_PARAM_KEYS = ('pivot_lookback', 'fvg_min_size_atr', 'displacement_atr', 'lp_tolerance_pct')
+
+
+def ohlcv_fingerprint(ohlcv: pd.DataFrame) -> str:
+    """
+    OHLCV 資料指紋（時間索引 + Open/High/Low/Close 內容的雜湊）
+
+    SMC 指標不讀取 Volume，因此不列入指紋。
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.int64(len(ohlcv)).tobytes())
+    digest.update(np.ascontiguousarray(ohlcv.index.asi8).tobytes())
+    for column in ('Open', 'High', 'Low', 'Close'):
+        digest.update(np.ascontiguousarray(ohlcv[column].to_numpy(dtype=np.float64)).tobytes())
+    return digest.hexdigest()
+
+
+class SmcIndicatorCache:
+    """
+    SmcIndicators 的 LRU 快取（執行緒安全）
+
+    Args:
+        max_bytes: 記憶體預算（以 SmcIndicators.nbytes 估計，含 RangeQuery 稀疏表；
+                   with_params 衍生的項目與來源共用陣列，各自計入，估計偏保守）；
+                   單一項目超過預算時照常回傳但不保留
+
+    稀疏表於第一次查詢時才建立，項目放入後仍可能變大，因此每次命中時重新估計
+    該項目、以差值調整總量（不重掃其他項目），超出預算即依 LRU 淘汰。
+    """
+
+    def __init__(self, max_bytes: int = SMC_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict = OrderedDict()   # key -> (SmcIndicators, nbytes)
+        self._lock    = threading.Lock()
+        self._nbytes  = 0
+        self.hits      = 0
+        self.misses    = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(fingerprint: str, timeframe: str, params: dict) -> tuple:
+        return (fingerprint, timeframe) + tuple(params[k] for k in SMC_PARAM_KEYS)
+
+    def get_or_compute(self, ohlcv: pd.DataFrame, timeframe: str,
+                       fingerprint: str = None, **params) -> SmcIndicators:
+        """
+        取得預計算完成的 SmcIndicators；未命中時計算並放入快取
+
+        Args:
+            ohlcv:       OHLCV DataFrame
+            timeframe:   '1d' | '4h' | '1h'
+            fingerprint: ohlcv_fingerprint(ohlcv)（已知時傳入，省去重新雜湊；None 則現場計算）
+            **params:    SMC_PARAM_KEYS 中的參數
+        """
+        key = self.make_key(fingerprint or ohlcv_fingerprint(ohlcv), timeframe, params)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._remeasure(key)
+                return entry[0]
+            self.misses += 1
+
+            base = self._find_base(key)
+
+        # 計算不持鎖：同鍵同時未命中時各自計算，先放入者保留。
+        # 同一份資料已有其他參數的結果時以 with_params 衍生，只重算受影響的偵測器
+        if base is not None:
+            indicators = base.with_params(**params).precompute()
+        else:
+            indicators = SmcIndicators(ohlcv, **params).precompute()
+        return self._store(key, indicators)
+
+    def _find_base(self, key: tuple) -> 'SmcIndicators | None':
+        """同資料、同 timeframe 中與 key 相同參數最多的項目（平手取最近使用者）"""
+        best, best_shared = None, -1
+        for other, (indicators, _) in reversed(self._entries.items()):
+            if other[:2] != key[:2]:
+                continue
+            shared = sum(a == b for a, b in zip(other[2:], key[2:]))
+            if shared > best_shared:
+                best, best_shared = indicators, shared
+        return best
+
+    def put(self, ohlcv: pd.DataFrame, timeframe: str, indicators: SmcIndicators,
+            fingerprint: str = None) -> None:
+        """放入外部已計算的指標（例如 smc_service 的預計算結果；fingerprint 同 get_or_compute）"""
+        key = self.make_key(fingerprint or ohlcv_fingerprint(ohlcv), timeframe, indicators.params)
+        self._store(key, indicators.precompute())
+
+    def _store(self, key: tuple, indicators: SmcIndicators) -> SmcIndicators:
+        nbytes = indicators.nbytes
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[0]
+            if nbytes > self.max_bytes:
+                logger.info('[SMC Cache] 項目 %.1f MB 超過預算，不保留', nbytes / 1e6)
+                return indicators
+
+            self._entries[key] = (indicators, nbytes)
+            self._nbytes += nbytes
+            self._evict()
+        return indicators
+
+    def _remeasure(self, key: tuple) -> None:
+        """重新估計 key 項目的大小（含之後才建立的稀疏表）並以差值調整總量（呼叫端持鎖）"""
+        indicators, old = self._entries[key]
+        nbytes = indicators.nbytes
+        self._entries[key] = (indicators, nbytes)
+        self._nbytes += nbytes - old
+        self._evict()
+
+    def _evict(self) -> None:
+        """超出預算時淘汰最久未使用者（呼叫端持鎖）"""
+        while self._nbytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._nbytes -= evicted
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """快取統計（項目數、估計記憶體、命中 / 未命中 / 淘汰次數）"""
+        with self._lock:
+            return {
+                'entries':   len(self._entries),
+                'nbytes':    self._nbytes,
+                'max_bytes': self.max_bytes,
+                'hits':      self.hits,
+                'misses':    self.misses,
+                'evictions': self.evictions,
+            }
+
+
+# 全域單例
+smc_cache = SmcIndicatorCache()
@@ -14,6 +14,7 @@ import numpy as np
 import pandas as pd
 
 from core.smc import SmcIndicators
+from core.smc_cache import smc_cache, ohlcv_fingerprint
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +27,8 @@ class SmcSignalService:
         self._cache: dict[str, dict] = {}
         # SmcIndicators 實例快取（供回測引擎直接使用）
         self._indicators: dict[str, SmcIndicators] = {}
+        # 預計算資料的指紋（回測改用其他 SMC 參數時查 smc_cache 不必重新雜湊）
+        self._fingerprints: dict[str, str] = {}
 
     def precompute(self, ohlcv: pd.DataFrame, timeframe: str = '1d') -> None:
         """
@@ -41,15 +44,12 @@ class SmcSignalService:
 
         logger.info('[SMC Service] 開始預計算 %s SMC 信號（共 %d 根K線）...', timeframe, len(ohlcv))
 
-        indicators = SmcIndicators(ohlcv)
-        self._indicators[timeframe] = indicators
-
-        # 觸發全量計算（lazy property 強制求值）
-        _ = indicators.pivots
-        _ = indicators.structure
-        _ = indicators.fvgs
-        _ = indicators.order_blocks
-        _ = indicators.liquidity_pools
+        # 全量計算後才公開：之後的讀取不再寫入實例，回測可直接共用
+        indicators  = SmcIndicators(ohlcv).precompute()
+        fingerprint = ohlcv_fingerprint(ohlcv)
+        self._indicators[timeframe]   = indicators
+        self._fingerprints[timeframe] = fingerprint
+        smc_cache.put(ohlcv, timeframe, indicators, fingerprint=fingerprint)
 
         # 序列化為前端格式
         signals = self._serialize(indicators, ohlcv)
@@ -75,9 +75,21 @@ class SmcSignalService:
         return self._cache.get(timeframe, self._empty_signals())
 
     def get_indicators(self, timeframe: str = '1d') -> SmcIndicators | None:
-        """取得 SmcIndicators 實例（供回測引擎使用）"""
+        """取得預計算完成的 SmcIndicators 實例（唯讀，可供多個回測引擎共用）"""
         return self._indicators.get(timeframe)
 
+    def get_fingerprint(self, timeframe: str, ohlcv: pd.DataFrame) -> str | None:
+        """
+        預計算資料的指紋（供 SmcEngine / smc_cache 使用）
+
+        僅在 ohlcv 即預計算所用的同一個 DataFrame 時回傳（資料重新載入後為新物件），
+        否則回傳 None，由 smc_cache 自行計算。
+        """
+        indicators = self._indicators.get(timeframe)
+        if indicators is None or indicators.ohlcv is not ohlcv:
+            return None
+        return self._fingerprints[timeframe]
+
     def is_ready(self, timeframe: str = '1d') -> bool:
         return timeframe in self._cache
 
@@ -102,38 +114,57 @@ class SmcSignalService:
             else:
                 bos_list.append(record)
 
-        fvg_list = []
-        for fvg in indicators.fvgs:
-            fvg_list.append({
-                'time':      fvg.date,
-                'top':       round(fvg.top, 2),
-                'bottom':    round(fvg.bottom, 2),
-                'mid':       round(fvg.mid, 2),
-                'type':      fvg.direction,   # 'bullish' | 'bearish'
-                'filled':    fvg.filled,
-            })
-
-        ob_list = []
-        for ob in indicators.order_blocks:
-            ob_list.append({
-                'time':        ob.date,
-                'top':         round(ob.top, 2),
-                'bottom':      round(ob.bottom, 2),
-                'body_top':    round(ob.body_top, 2),
-                'body_bottom': round(ob.body_bottom, 2),
-                'type':        ob.direction,   # 'bullish' | 'bearish'
-                'valid':       ob.valid,
-            })
-
-        lp_list = []
-        for lp in indicators.liquidity_pools:
-            lp_list.append({
-                'time':        lp.date,
-                'price':       round(lp.level, 2),
-                'type':        lp.direction,   # 'buy_side' | 'sell_side'
-                'touch_count': lp.count,
-                'swept':       lp.swept,
-            })
+        # FVG / OB / 流動性池直接讀欄位表，不逐一建立 dataclass
+        fvgs = indicators.fvg_table
+        fvg_list = [
+            {
+                'time':   time,
+                'top':    top,
+                'bottom': bottom,
+                'mid':    mid,
+                'type':   kind,     # 'bullish' | 'bearish'
+                'filled': filled,
+            }
+            for time, top, bottom, mid, kind, filled in zip(
+                fvgs.dates.tolist(), _round2(fvgs.top), _round2(fvgs.bottom),
+                _round2(fvgs.mid), fvgs.direction_names.tolist(), fvgs.ended.tolist(),
+            )
+        ]
+
+        obs = indicators.order_block_table
+        ob_list = [
+            {
+                'time':        time,
+                'top':         top,
+                'bottom':      bottom,
+                'body_top':    body_top,
+                'body_bottom': body_bottom,
+                'type':        kind,     # 'bullish' | 'bearish'
+                'valid':       not ended,
+            }
+            for time, top, bottom, body_top, body_bottom, kind, ended in zip(
+                obs.dates.tolist(), _round2(obs.top), _round2(obs.bottom),
+                _round2(obs.body_top), _round2(obs.body_bottom),
+                obs.direction_names.tolist(), obs.ended.tolist(),
+            )
+        ]
+
+        # 流動性池價位逐一以 np.float64 取整（同 round(lp.level, 2)）
+        pools = indicators.liquidity_pool_table
+        lp_list = [
+            {
+                'time':        time,
+                'price':       price,
+                'type':        kind,     # 'buy_side' | 'sell_side'
+                'touch_count': count,
+                'swept':       swept,
+            }
+            for time, price, kind, count, swept in zip(
+                pools.dates.tolist(), [round(level, 2) for level in pools.level],
+                pools.direction_names.tolist(),
+                pools.count.tolist(), pools.ended.tolist(),
+            )
+        ]
 
         # 最後一根 K 線的偏向（供前端顯示）
         last_idx = len(ohlcv) - 1
@@ -171,5 +202,10 @@ class SmcSignalService:
         }
 
 
+def _round2(values: np.ndarray) -> list:
+    """欄位陣列逐一以 round(x, 2) 取到小數第 2 位（Python float，與逐筆 dataclass 寫法相同）"""
+    return [round(x, 2) for x in values.tolist()]
+
+
 # 全域單例
 smc_service = SmcSignalService()
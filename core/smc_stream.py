@@ -0,0 +1,595 @@
+"""
+增量式 SMC 指標模組
+
+SmcIndicators 只能由完整 DataFrame 一次計算；每根新 K 線都要重跑所有偵測器。
+SmcStream 以 append_bar() 逐根餵入資料，攤銷 O(1)（流動性池為 O(log k)）更新：
+- Pivot 高低點（單調佇列維護置中視窗極值）
+- BOS / CHOCH 結構與當前偏向
+- FVG / Order Block 偵測，以及仍有效（未填補 / 未失效）的活躍集合
+- 流動性池（貪婪錨點分群的增量版）與其被掃狀態
+
+偵測結果與對相同資料前綴做批次計算（SmcIndicators(prefix).precompute()）完全一致。
+
+生命週期與批次表的 end 欄位相同：
+- FVG 自其 K 線起、OB 自其本身 K 線起（而非較晚的確認事件；確認時補查其間收盤），
+  直到第一根收盤穿越中點 / 邊界為止
+- 流動性池自最後一個組成點的下一根起，直到第一根 High / Low 穿越水平為止（swept_at）；
+  池因新成員改變時，依新的組成點與水平重新判斷
+
+用法：
+    stream = SmcStream.from_ohlcv(history_df)
+    stream.append_bar(o, h, l, c, v, ts)
+    stream.bias, stream.active_fvgs('bullish')
+"""
+import bisect
+import heapq
+import logging
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from .smc import (
+    FVG, OrderBlock, StructurePoint, LiquidityPool, SmcFeatures,
+    STRUCTURE_BULLISH_BOS, STRUCTURE_BULLISH_CHOCH,
+    STRUCTURE_BEARISH_BOS, STRUCTURE_BEARISH_CHOCH,
+    STRUCTURE_EVENT_NAMES, BIAS_NAMES,
+    _cluster_levels_greedy,
+)
+
+logger = logging.getLogger(__name__)
+
+_NAN = float('nan')
+
+
+# =============================================================================
+# 增量計算工具
+# =============================================================================
+
+class _RollingMean:
+    """
+    固定視窗移動平均（逐筆更新）
+
+    逐步重現 pandas Series.rolling(window).mean() 的 Kahan 補償累加，
+    使增量 ATR 與 SmcFeatures.atr 逐位元一致。
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self._values: deque = deque()
+        self._sum = 0.0
+        self._comp_add = 0.0
+        self._comp_remove = 0.0
+        self._nobs = 0
+        self._neg_ct = 0
+        self._same_ct = 0
+        self._prev = None
+
+    def push(self, val: float) -> float:
+        if self._prev is None:
+            self._prev = val
+        self._values.append(val)
+
+        if len(self._values) > self.window:
+            old = self._values.popleft()
+            if old == old:
+                self._nobs -= 1
+                y = -old - self._comp_remove
+                t = self._sum + y
+                self._comp_remove = t - self._sum - y
+                self._sum = t
+                if math.copysign(1.0, old) < 0:
+                    self._neg_ct -= 1
+
+        if val == val:
+            self._nobs += 1
+            y = val - self._comp_add
+            t = self._sum + y
+            self._comp_add = t - self._sum - y
+            self._sum = t
+            if math.copysign(1.0, val) < 0:
+                self._neg_ct += 1
+            self._same_ct = self._same_ct + 1 if val == self._prev else 1
+            self._prev = val
+
+        if self._nobs < self.window or self._nobs == 0:
+            return _NAN
+        result = self._sum / self._nobs
+        if self._same_ct >= self._nobs:
+            return self._prev
+        if self._neg_ct == 0 and result < 0:
+            return 0.0
+        if self._neg_ct == self._nobs and result > 0:
+            return 0.0
+        return result
+
+
+class _RollingExtreme:
+    """固定視窗最大 / 最小值（單調佇列，略過 NaN）"""
+
+    def __init__(self, window: int, is_max: bool):
+        self.window = window
+        self.is_max = is_max
+        self._dq: deque = deque()
+
+    def push(self, i: int, val: float) -> None:
+        dq = self._dq
+        if val == val:
+            if self.is_max:
+                while dq and dq[-1][1] <= val:
+                    dq.pop()
+            else:
+                while dq and dq[-1][1] >= val:
+                    dq.pop()
+            dq.append((i, val))
+        while dq and dq[0][0] <= i - self.window:
+            dq.popleft()
+
+    @property
+    def value(self) -> float:
+        return self._dq[0][1] if self._dq else _NAN
+
+
+def _lp_match(anchor_level: float, level: float, tolerance_pct: float) -> bool:
+    """流動性池容忍度判斷（與 detect_liquidity_pools 相同公式；錨點為 0 時視為不符）"""
+    if anchor_level == 0:
+        return False
+    return abs(level - anchor_level) / anchor_level <= tolerance_pct
+
+
+class _LiquidityClusterer:
+    """
+    單側（buy-side 或 sell-side）流動性池的增量貪婪分群
+
+    新 pivot 必為時間上最晚的一點，在貪婪語意下只會被「時間最早、容忍度內」的
+    錨點吸收。錨點依價格排序保存，以二分搜尋取得候選。
+    僅當一個含多個成員的未成形群集因此成形（min_count > 2 才可能）時，
+    已被其他錨點吸收的成員會連帶改變，此時整側重新分群。
+
+    被掃狀態：池（重新）建立時補查組成點之後已收到的 K 線（pivot 確認延遲 lookback 根），
+    尚未被掃者依水平放入 heap，由 check_sweeps() 逐根彈出。
+    """
+
+    def __init__(self, direction: str, tolerance_pct: float, min_count: int, prices: list):
+        self.direction     = direction
+        self.tolerance_pct = tolerance_pct
+        self.min_count     = min_count
+        self.levels: list  = []      # pivot 價格（時間順序）
+        self.bars: list    = []      # pivot 所在 K 線索引
+        self._clusters: dict = {}    # 錨點序號 -> 成員序號（時間順序）
+        self._anchor_lv: list = []   # 錨點價格（排序）
+        self._anchor_pos: list = []  # 對應錨點序號
+        self._pools: dict = {}       # 錨點序號 -> LiquidityPool（已成形者）
+        # 掃蕩判斷：buy-side 看 High > level、sell-side 看 Low < level，
+        # 統一為 sign * price > sign * level（prices 與 SmcStream 共用同一 list）
+        self._prices = prices
+        self._sign   = 1 if direction == 'buy_side' else -1
+        self._sweep_heap: list = []  # (sign * level, 序號, 錨點)；池被取代後舊項目延遲丟棄
+        self._pending: dict = {}     # 錨點 -> 目前池在 heap 中的序號
+        self._sweep_seq = 0
+
+    def _matching_anchors(self, level: float) -> list:
+        tol = self.tolerance_pct
+        if level > 0 and tol < 1:
+            lo = bisect.bisect_left(self._anchor_lv, level / (1 + tol) * (1 - 1e-9))
+            hi = bisect.bisect_right(self._anchor_lv, level / (1 - tol) * (1 + 1e-9))
+            neg_end = bisect.bisect_left(self._anchor_lv, 0.0)
+            candidates = self._anchor_pos[:neg_end] + self._anchor_pos[max(lo, neg_end):hi]
+        else:
+            candidates = self._anchor_pos
+        return sorted(a for a in candidates if _lp_match(self.levels[a], level, tol))
+
+    def _add_anchor(self, pos: int) -> None:
+        i = bisect.bisect_right(self._anchor_lv, self.levels[pos])
+        self._anchor_lv.insert(i, self.levels[pos])
+        self._anchor_pos.insert(i, pos)
+        self._clusters[pos] = [pos]
+
+    def _rebuild(self) -> None:
+        clusters = _cluster_levels_greedy(
+            np.array(self.levels), self.tolerance_pct, self.min_count, include_unformed=True
+        )
+        self._clusters   = {members[0]: members for members in clusters}
+        order            = sorted(self._clusters, key=lambda a: (self.levels[a], a))
+        self._anchor_pos = order
+        self._anchor_lv  = [self.levels[a] for a in order]
+        self._pools      = {}
+        self._sweep_heap = []
+        self._pending    = {}
+
+    def add(self, bar: int, level: float, dates: list) -> None:
+        pos = len(self.levels)
+        self.levels.append(level)
+        self.bars.append(bar)
+
+        for anchor in self._matching_anchors(level):
+            members = self._clusters[anchor]
+            formed_before = len(members) >= self.min_count
+            members.append(pos)
+            if formed_before:
+                self._set_pool(anchor, members, dates)
+                return
+            if len(members) >= self.min_count:
+                if len(members) > 2:
+                    # 多成員群集剛成形：其成員對後續錨點的歸屬改變，整側重建
+                    self._rebuild()
+                    for a, m in self._clusters.items():
+                        if len(m) >= self.min_count:
+                            self._set_pool(a, m, dates)
+                else:
+                    self._set_pool(anchor, members, dates)
+                return
+
+        # 未被任何成形群集吸收：成為新錨點
+        self._add_anchor(pos)
+        if self.min_count <= 1:
+            self._set_pool(pos, self._clusters[pos], dates)
+
+    def _set_pool(self, anchor: int, members: list, dates: list) -> None:
+        """建立（或以新成員取代）錨點的池，並判斷其被掃狀態"""
+        last_bar = self.bars[members[-1]]
+        pool = LiquidityPool(
+            idx=last_bar,
+            date=dates[last_bar],
+            direction=self.direction,
+            level=np.mean([self.levels[m] for m in members]),
+            count=len(members),
+        )
+        self._pools[anchor] = pool
+        self._pending.pop(anchor, None)
+
+        # 組成點之後已收到的 K 線（一般為 pivot 確認延遲的 lookback 根）先補查
+        key    = self._sign * pool.level
+        prices = self._prices
+        for j in range(last_bar + 1, len(prices)):
+            if self._sign * prices[j] > key:
+                pool.swept, pool.swept_at = True, j
+                return
+        self._pending[anchor] = self._sweep_seq
+        heapq.heappush(self._sweep_heap, (key, self._sweep_seq, anchor))
+        self._sweep_seq += 1
+
+    def check_sweeps(self, t: int) -> None:
+        """以第 t 根 High / Low 更新被掃狀態（heap 頂端即最先被掃者，攤銷 O(log k)）"""
+        heap  = self._sweep_heap
+        price = self._sign * self._prices[t]
+        while heap and price > heap[0][0]:
+            _, seq, anchor = heapq.heappop(heap)
+            if self._pending.get(anchor) == seq:
+                del self._pending[anchor]
+                pool = self._pools[anchor]
+                pool.swept, pool.swept_at = True, t
+
+    @property
+    def pools(self) -> list:
+        return [self._pools[a] for a in sorted(self._pools)]
+
+
+# =============================================================================
+# 增量 SMC 指標
+# =============================================================================
+
+class SmcStream:
+    """
+    增量式 SMC 指標計算器
+
+    使用方式：
+        stream = SmcStream(pivot_lookback=5)
+        for row in bars:
+            stream.append_bar(row.Open, row.High, row.Low, row.Close, row.Volume, row.Index)
+        stream.structure, stream.active_obs('bullish')
+
+    參數與 SmcIndicators 相同；ob_lookback / lp_min_count 對應
+    detect_order_blocks(lookback) / detect_liquidity_pools(min_count) 的預設值。
+    """
+
+    def __init__(
+        self,
+        pivot_lookback: int = 5,
+        fvg_min_size_atr: float = 0.1,
+        displacement_atr: float = 1.5,
+        lp_tolerance_pct: float = 0.002,
+        ob_lookback: int = 10,
+        lp_min_count: int = 2,
+    ):
+        self.pivot_lookback   = pivot_lookback
+        self.fvg_min_size_atr = fvg_min_size_atr
+        self.displacement_atr = displacement_atr
+        self.lp_tolerance_pct = lp_tolerance_pct
+        self.ob_lookback      = ob_lookback
+        self.lp_min_count     = lp_min_count
+
+        # 原始資料與逐根特徵（Python list，append 為 O(1)）
+        self._open:   list = []
+        self._high:   list = []
+        self._low:    list = []
+        self._close:  list = []
+        self._volume: list = []
+        self._ts:     list = []
+        self._dates:  list = []
+        self._atr:    list = []
+        self._body:   list = []
+        self._bullish: list = []
+        self._bearish: list = []
+        self._last_bullish: list = []
+        self._last_bearish: list = []
+        self._pivot_high: list = []
+        self._pivot_low:  list = []
+
+        window = 2 * pivot_lookback + 1
+        self._high_window = _RollingExtreme(window, is_max=True)
+        self._low_window  = _RollingExtreme(window, is_max=False)
+        self._tr_mean     = _RollingMean(SmcFeatures.ATR_PERIOD)
+
+        # 結構狀態
+        self._last_swing_high = _NAN
+        self._last_swing_low  = _NAN
+        self._bias_code       = 0
+
+        # 偵測結果（時間順序）
+        self.structure:    list = []
+        self.fvgs:         list = []
+        self.order_blocks: list = []
+
+        # 活躍區間：方向 -> {序號: zone}（插入順序即建立順序）
+        self._active_fvgs = {'bullish': {}, 'bearish': {}}
+        self._active_obs  = {'bullish': {}, 'bearish': {}}
+        # 以穿越門檻排序的 heap：(key, 序號)，由 _check_zones() 逐根彈出
+        self._fvg_heaps = {'bullish': [], 'bearish': []}
+        self._ob_heaps  = {'bullish': [], 'bearish': []}
+        self._zone_seq  = 0
+
+        self._lp = {
+            'buy_side':  _LiquidityClusterer('buy_side',  lp_tolerance_pct, lp_min_count, self._high),
+            'sell_side': _LiquidityClusterer('sell_side', lp_tolerance_pct, lp_min_count, self._low),
+        }
+
+    @classmethod
+    def from_ohlcv(cls, ohlcv: pd.DataFrame, **params) -> 'SmcStream':
+        """以既有 OHLCV 歷史逐根建立增量狀態"""
+        stream = cls(**params)
+        volume = ohlcv['Volume'] if 'Volume' in ohlcv else pd.Series(np.nan, index=ohlcv.index)
+        for row in zip(ohlcv['Open'].tolist(), ohlcv['High'].tolist(), ohlcv['Low'].tolist(),
+                       ohlcv['Close'].tolist(), volume.tolist(), ohlcv.index):
+            stream.append_bar(*row)
+        return stream
+
+    def __len__(self) -> int:
+        return len(self._close)
+
+    # =========================================================================
+    # 公開方法
+    # =========================================================================
+
+    def append_bar(self, open, high, low, close, volume, ts) -> int:
+        """
+        餵入一根新 K 線並更新所有指標
+
+        Returns:
+            新 K 線的索引
+        """
+        i = len(self._close)
+        o, h, l, c = float(open), float(high), float(low), float(close)
+
+        prev_close = self._close[-1] if i > 0 else _NAN
+        self._open.append(o)
+        self._high.append(h)
+        self._low.append(l)
+        self._close.append(c)
+        self._volume.append(volume)
+        self._ts.append(ts)
+        self._dates.append(str(ts)[:10])
+
+        # TR / ATR / 實體 / 多空旗標（TR 取最大值時略過 NaN，同 SmcFeatures.tr）
+        tr_parts = [v for v in (h - l, abs(h - prev_close), abs(l - prev_close)) if v == v]
+        self._atr.append(self._tr_mean.push(max(tr_parts) if tr_parts else _NAN))
+        self._body.append(abs(c - o))
+        self._bullish.append(c > o)
+        self._bearish.append(c < o)
+        self._last_bullish.append(i if c > o else (self._last_bullish[-1] if i else -1))
+        self._last_bearish.append(i if c < o else (self._last_bearish[-1] if i else -1))
+        self._pivot_high.append(_NAN)
+        self._pivot_low.append(_NAN)
+
+        self._update_pivots(i)
+        self._lp['buy_side'].check_sweeps(i)
+        self._lp['sell_side'].check_sweeps(i)
+        self._update_structure(i)
+        self._detect_fvg(i)
+        self._check_zones(i)
+        return i
+
+    @property
+    def bias(self) -> str:
+        """當前市場偏向（'bullish' | 'bearish' | 'neutral'）"""
+        return BIAS_NAMES[self._bias_code]
+
+    @property
+    def pivots(self) -> pd.DataFrame:
+        """目前已確認的 pivot（格式同 detect_pivots）"""
+        return pd.DataFrame({
+            'pivot_high': np.array(self._pivot_high, dtype=np.float64),
+            'pivot_low':  np.array(self._pivot_low,  dtype=np.float64),
+        }, index=pd.Index(self._ts))
+
+    @property
+    def liquidity_pools(self) -> list:
+        """目前的流動性池（順序同 detect_liquidity_pools；swept / swept_at 隨新 K 線更新）"""
+        return self._lp['buy_side'].pools + self._lp['sell_side'].pools
+
+    def active_fvgs(self, direction: str) -> list:
+        """目前仍未填補的 FVG（依建立順序）"""
+        return list(self._active_fvgs[direction].values())
+
+    def active_obs(self, direction: str) -> list:
+        """目前仍有效的 OB（依確認順序；生命週期自 OB 本身 K 線起算）"""
+        return list(self._active_obs[direction].values())
+
+    # =========================================================================
+    # 內部：逐根更新
+    # =========================================================================
+
+    def _update_pivots(self, t: int) -> None:
+        """更新置中視窗極值；第 t 根確認 t - lookback 處的 pivot"""
+        lb = self.pivot_lookback
+        self._high_window.push(t, self._high[t])
+        self._low_window.push(t, self._low[t])
+        if t < 2 * lb:
+            return
+
+        i = t - lb
+        if self._high[i] == self._high_window.value:
+            self._pivot_high[i] = self._high[i]
+            self._lp['buy_side'].add(i, self._high[i], self._dates)
+        if self._low[i] == self._low_window.value:
+            self._pivot_low[i] = self._low[i]
+            self._lp['sell_side'].add(i, self._low[i], self._dates)
+
+    def _update_structure(self, t: int) -> None:
+        """BOS / CHOCH 狀態機（規則同 detect_structure_arrays）"""
+        lb = self.pivot_lookback
+        if t < 2 * lb:
+            return
+
+        ph = self._pivot_high[t - lb]
+        pl = self._pivot_low[t - lb]
+        if ph == ph and (self._last_swing_high != self._last_swing_high or ph > self._last_swing_high):
+            self._last_swing_high = ph
+        if pl == pl and (self._last_swing_low != self._last_swing_low or pl < self._last_swing_low):
+            self._last_swing_low = pl
+
+        c = self._close[t]
+        if self._last_swing_high == self._last_swing_high and c > self._last_swing_high:
+            code = STRUCTURE_BULLISH_CHOCH if self._bias_code == -1 else STRUCTURE_BULLISH_BOS
+            broken_level = self._last_swing_high
+            self._bias_code = 1
+            self._last_swing_high = _NAN
+        elif self._last_swing_low == self._last_swing_low and c < self._last_swing_low:
+            code = STRUCTURE_BEARISH_CHOCH if self._bias_code == 1 else STRUCTURE_BEARISH_BOS
+            broken_level = self._last_swing_low
+            self._bias_code = -1
+            self._last_swing_low = _NAN
+        else:
+            return
+
+        event = StructurePoint(
+            idx=t,
+            date=self._dates[t],
+            event=STRUCTURE_EVENT_NAMES[code],
+            broken_level=broken_level,
+            close=c,
+        )
+        self.structure.append(event)
+        self._detect_order_block(event)
+
+    def _detect_order_block(self, event: StructurePoint) -> None:
+        """結構事件確認時偵測 OB（規則同 detect_order_blocks）"""
+        t  = event.idx
+        lb = self.ob_lookback
+        atr_val = self._atr[t]
+        if atr_val != atr_val:
+            return
+        min_body = atr_val * self.displacement_atr
+
+        bullish = 'bullish' in event.event
+        flags   = self._bullish if bullish else self._bearish
+        last_opposite = self._last_bearish if bullish else self._last_bullish
+
+        displacement_idx = None
+        for j in range(t, max(t - lb, 0), -1):
+            if flags[j] and self._body[j] >= min_body:
+                displacement_idx = j
+                break
+        if displacement_idx is None:
+            return
+
+        ob_idx = last_opposite[displacement_idx - 1] if displacement_idx > 0 else -1
+        if ob_idx <= max(displacement_idx - lb, 0):
+            return
+
+        o, c = self._open[ob_idx], self._close[ob_idx]
+        direction = 'bullish' if bullish else 'bearish'
+        ob = OrderBlock(
+            idx=ob_idx,
+            date=self._dates[ob_idx],
+            direction=direction,
+            top=self._high[ob_idx],
+            bottom=self._low[ob_idx],
+            body_top=o if bullish else c,
+            body_bottom=c if bullish else o,
+        )
+        self.order_blocks.append(ob)
+
+        # OB 自其本身 K 線起生效（同 OrderBlockTable.end）；確認事件較晚，先補查 [ob_idx, t) 是否已失效
+        for j in range(ob_idx, t):
+            if self._ob_broken(ob, self._close[j]):
+                ob.valid, ob.invalidated_at = False, j
+                return
+        self._activate(ob, self._active_obs, self._ob_heaps,
+                       -ob.bottom if bullish else ob.top)
+
+    def _detect_fvg(self, t: int) -> None:
+        """第 t 根收盤確認的 FVG（規則同 detect_fvgs）"""
+        if t < 2:
+            return
+        atr_val  = self._atr[t]
+        min_size = atr_val * self.fvg_min_size_atr if atr_val == atr_val else 0.0
+
+        low_t, high_t = self._low[t], self._high[t]
+        high_2, low_2 = self._high[t - 2], self._low[t - 2]
+
+        gap = low_t - high_2
+        if gap > 0 and gap >= min_size:
+            fvg = FVG(idx=t, date=self._dates[t], direction='bullish',
+                      top=low_t, bottom=high_2, mid=(low_t + high_2) / 2)
+            self.fvgs.append(fvg)
+            self._activate(fvg, self._active_fvgs, self._fvg_heaps, -fvg.mid)
+
+        gap = low_2 - high_t
+        if gap > 0 and gap >= min_size:
+            fvg = FVG(idx=t, date=self._dates[t], direction='bearish',
+                      top=low_2, bottom=high_t, mid=(low_2 + high_t) / 2)
+            self.fvgs.append(fvg)
+            self._activate(fvg, self._active_fvgs, self._fvg_heaps, fvg.mid)
+
+    def _activate(self, zone, active: dict, heaps: dict, key: float) -> None:
+        seq = self._zone_seq
+        self._zone_seq += 1
+        active[zone.direction][seq] = zone
+        heapq.heappush(heaps[zone.direction], (key, seq))
+
+    @staticmethod
+    def _ob_broken(ob: OrderBlock, close: float) -> bool:
+        if ob.direction == 'bullish':
+            return close < ob.bottom
+        return close > ob.top
+
+    @staticmethod
+    def _end_fvg(fvg: FVG, t: int) -> None:
+        fvg.filled, fvg.filled_at = True, t
+
+    @staticmethod
+    def _end_ob(ob: OrderBlock, t: int) -> None:
+        ob.valid, ob.invalidated_at = False, t
+
+    def _check_zones(self, t: int) -> None:
+        """以第 t 根收盤更新活躍集合（heap 頂端即最先被穿越者，攤銷 O(log k)）"""
+        c = self._close[t]
+
+        # Bullish FVG：收盤 <= mid 填補（heap 以 -mid 排序）
+        heap, active = self._fvg_heaps['bullish'], self._active_fvgs['bullish']
+        while heap and c <= -heap[0][0]:
+            self._end_fvg(active.pop(heapq.heappop(heap)[1]), t)
+        # Bearish FVG：收盤 >= mid 填補
+        heap, active = self._fvg_heaps['bearish'], self._active_fvgs['bearish']
+        while heap and c >= heap[0][0]:
+            self._end_fvg(active.pop(heapq.heappop(heap)[1]), t)
+        # Bullish OB：收盤 < bottom 失效（heap 以 -bottom 排序）
+        heap, active = self._ob_heaps['bullish'], self._active_obs['bullish']
+        while heap and c < -heap[0][0]:
+            self._end_ob(active.pop(heapq.heappop(heap)[1]), t)
+        # Bearish OB：收盤 > top 失效
+        heap, active = self._ob_heaps['bearish'], self._active_obs['bearish']
+        while heap and c > heap[0][0]:
+            self._end_ob(active.pop(heapq.heappop(heap)[1]), t)
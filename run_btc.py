@@ -145,6 +145,7 @@ def main():
     result = engine.run(
         start_date = config['start_date'],
         end_date   = config.get('end_date'),
+        mode       = 'event',
     )
 
     # 輸出報告
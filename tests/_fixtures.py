@@ -0,0 +1,36 @@
+"""
+測試共用資料
+
+各測試模組共用的模擬 OHLCV 產生器與 SMC 回測設定（非測試模組，pytest 不會收集）。
+"""
+import numpy as np
+import pandas as pd
+
+
+def make_ohlcv(n: int = 600, seed: int = 7) -> pd.DataFrame:
+    """產生模擬 BTC OHLCV（價格取整數以製造平手的高低點）"""
+    rng   = np.random.default_rng(seed)
+    close = 20_000 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    open_ = np.r_[close[0], close[:-1]] * (1 + rng.normal(0, 0.003, n))
+    high  = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, n)))
+    low   = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.01, n)))
+    return pd.DataFrame({
+        'Open':   np.round(open_),
+        'High':   np.round(high),
+        'Low':    np.round(low),
+        'Close':  np.round(close),
+        'Volume': rng.integers(1, 100, n).astype(float),
+    }, index=pd.date_range('2020-01-01', periods=n, freq='D'))
+
+
+# SMC 回測設定（load_smc_config 的輸入）：預設、做空 + 槓桿、放寬進場條件、FVG + 持倉上限
+CONFIGS = [
+    {'start_date': '2020-03-01'},
+    {'start_date': '2020-03-01', 'allow_short': True, 'leverage': 5},
+    {'start_date': '2020-02-01', 'allow_short': True, 'fvg_min_size_atr': 0.0,
+     'entry_conditions': {'require_discount': {'enabled': False},
+                          'require_bias': {'enabled': False}}},
+    {'start_date': '2020-02-01', 'allow_short': True, 'leverage': 20,
+     'entry_conditions': {'require_fvg': {'enabled': True}},
+     'exit_conditions': {'max_holding_bars': {'enabled': True, 'bars': 12}}},
+]
@@ -0,0 +1,120 @@
+"""
+區間極值索引測試
+
+以暴力掃描為參考，驗證 RangeQuery 的區間極值與穿越搜尋（含 NaN、平手、邊界），
+以及 SmcFeatures 對同一份資料只建立一次索引。
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from core.range_query import RangeQuery, interval_cover
+from core.smc import SmcIndicators, SmcFeatures
+from tests._fixtures import make_ohlcv
+
+
+def _values(n: int = 300, seed: int = 11) -> np.ndarray:
+    """整數價格（製造平手）並穿插 NaN"""
+    rng    = np.random.default_rng(seed)
+    values = np.round(rng.normal(100, 5, n))
+    values[rng.choice(n, n // 10, replace=False)] = np.nan
+    values[40:45] = np.nan
+    return values
+
+
+def test_range_extremes_match_scan():
+    """任意閉區間的最大 / 最小值與 np.nanmax / nanmin 相同；全 NaN 或空區間為 NaN"""
+    values = _values()
+    rq     = RangeQuery(values)
+    rng    = np.random.default_rng(0)
+    starts = rng.integers(-3, len(values), 500)
+    ends   = starts + rng.integers(-2, 40, 500)
+
+    expected_max, expected_min = [], []
+    for a, b in zip(starts.tolist(), ends.tolist()):
+        window = values[max(a, 0): b + 1]
+        valid  = window[~np.isnan(window)]
+        expected_max.append(valid.max() if len(valid) else np.nan)
+        expected_min.append(valid.min() if len(valid) else np.nan)
+
+    np.testing.assert_array_equal(rq.range_max(starts, ends), expected_max)
+    np.testing.assert_array_equal(rq.range_min(starts, ends), expected_min)
+    scalar = [rq.max(a, b) for a, b in zip(starts.tolist(), ends.tolist())]
+    np.testing.assert_array_equal(scalar, expected_max)
+    assert np.isnan(rq.max(40, 44)) and np.isnan(rq.min(10, 9))
+
+
+def test_first_and_last_crossing_match_scan():
+    """first_crossing / last_crossing 與逐根掃描相同（NaN 不穿越、NaN 門檻回傳 -1）"""
+    values = _values()
+    rq     = RangeQuery(values)
+    rng    = np.random.default_rng(1)
+    pos    = rng.integers(0, len(values), 400)
+    levels = np.round(rng.normal(100, 8, 400))
+    levels[::37] = np.nan
+    compare = {
+        'le': np.less_equal, 'lt': np.less, 'ge': np.greater_equal, 'gt': np.greater,
+    }
+
+    for op, fn in compare.items():
+        first = rq.first_crossing(pos, levels, op)
+        last  = rq.last_crossing(pos, levels, op)
+        for k, (p, level) in enumerate(zip(pos.tolist(), levels.tolist())):
+            hits = np.flatnonzero(fn(values, level))
+            after, before = hits[hits >= p], hits[hits <= p]
+            assert first[k] == (after[0] if len(after) else -1), (op, p, level)
+            assert last[k] == (before[-1] if len(before) else -1), (op, p, level)
+
+
+def test_first_crossing_at_matches_vectorized():
+    """單筆純量版與向量化版結果相同"""
+    values = _values()
+    rq     = RangeQuery(values)
+    rng    = np.random.default_rng(2)
+    pos    = rng.integers(-1, len(values) + 2, 100)
+    levels = np.round(rng.normal(100, 8, 100))
+    levels[::9] = np.nan
+    for op in ('le', 'lt', 'ge', 'gt'):
+        expected = rq.first_crossing(pos, levels, op)
+        assert [rq.first_crossing_at(p, x, op) for p, x in zip(pos.tolist(), levels.tolist())] \
+            == expected.tolist()
+
+
+def test_interval_cover_matches_scan():
+    """區間覆蓋極值與逐區間寫入相同；未覆蓋處為 ∓inf，NaN 值與空區間略過"""
+    rng = np.random.default_rng(3)
+    for n in (1, 2, 37, 500):
+        starts = rng.integers(-2, n, 60)
+        ends   = starts + rng.integers(-1, n // 3 + 2, 60)
+        values = rng.normal(size=60)
+        values[::7] = np.nan
+        for kind, reduce, fill in (('max', np.fmax, -np.inf), ('min', np.fmin, np.inf)):
+            expected = np.full(n, fill)
+            for a, b, v in zip(starts.tolist(), ends.tolist(), values.tolist()):
+                lo, hi = max(a, 0), min(b, n - 1) + 1
+                expected[lo:hi] = reduce(expected[lo:hi], v)
+            np.testing.assert_array_equal(interval_cover(n, starts, ends, values, kind), expected)
+
+
+def test_features_share_range_index():
+    """同一份 SmcFeatures 的索引只建立一次，且計入 nbytes"""
+    features = SmcFeatures(make_ohlcv(n=200))
+    before   = features.nbytes
+    rq       = features.range_query('high')
+    assert features.range_query('high') is rq
+    rq.max(0, 10)
+    assert features.nbytes > before
+    np.testing.assert_array_equal(rq.values, features.high)
+
+
+def test_indicators_reuse_feature_ranges():
+    """Pivot 與生命週期解析共用 SmcFeatures 的索引，with_params 衍生的實例亦同"""
+    smc = SmcIndicators(make_ohlcv(n=500)).precompute()
+    ranges = dict(smc.features._ranges)
+    assert set(ranges) >= {'high', 'low', 'close'}
+
+    derived = smc.with_params(pivot_lookback=3).precompute()
+    assert derived.features is smc.features
+    assert all(derived.features.range_query(name) is rq for name, rq in ranges.items())
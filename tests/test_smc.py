@@ -0,0 +1,534 @@
+"""
+SMC 指標計算測試
+
+以固定亂數種子產生的模擬 OHLCV，驗證向量化偵測器與逐根迴圈參考實作輸出一致。
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+
+import core.smc as smc_module
+from core.smc import (
+    SmcIndicators, SmcFeatures, SmcSignals, ActiveZoneIndex, PivotPyramid,
+    detect_pivots, _detect_pivots_loop,
+    detect_structure, _detect_structure_loop,
+    detect_fvgs, _detect_fvgs_loop,
+    detect_order_blocks, _detect_order_blocks_loop,
+    detect_liquidity_pools, _detect_liquidity_pools_loop,
+    detect_fvg_table, update_fvg_fill_status, _first_crossing,
+)
+from core.smc_service import _round2
+from tests._fixtures import make_ohlcv
+
+
+OHLCV = make_ohlcv()
+
+
+# =============================================================================
+# K 線特徵
+# =============================================================================
+
+def test_features_match_pandas():
+    """SmcFeatures 的 TR / ATR 與 pandas 寫法逐位元一致"""
+    high, low, close = OHLCV['High'], OHLCV['Low'], OHLCV['Close']
+    tr = pd.concat([
+        high - low,
+        (high - close.shift(1)).abs(),
+        (low  - close.shift(1)).abs()
+    ], axis=1).max(axis=1)
+    atr = tr.rolling(14).mean()
+
+    features = SmcFeatures(OHLCV)
+    np.testing.assert_array_equal(features.tr, tr.to_numpy())
+    np.testing.assert_array_equal(features.atr, atr.to_numpy())
+    np.testing.assert_array_equal(features.body, (close - OHLCV['Open']).abs().to_numpy())
+    assert features.atr.dtype == np.float64 and features.atr.flags['C_CONTIGUOUS']
+    assert not features.atr.flags['WRITEABLE']
+
+
+def test_features_computed_once():
+    """同一份資料的特徵只計算一次，並由所有偵測器共用"""
+    smc = SmcIndicators(OHLCV)
+    atr = smc.features.atr
+    _ = smc.fvgs
+    _ = smc.order_blocks
+    assert smc.features.atr is atr
+
+
+# =============================================================================
+# Pivot 高低點
+# =============================================================================
+
+def test_detect_pivots_matches_loop():
+    """向量化 detect_pivots 與迴圈版逐點一致"""
+    for lookback in (1, 2, 5, 10):
+        fast = detect_pivots(OHLCV['High'], OHLCV['Low'], lookback)
+        ref  = _detect_pivots_loop(OHLCV['High'], OHLCV['Low'], lookback)
+        pd.testing.assert_frame_equal(fast, ref)
+
+
+def test_detect_pivots_ties_and_nan():
+    """平手視為 pivot；NaN 不參與視窗極值"""
+    high = pd.Series([1.0, 3.0, 3.0, 2.0, np.nan, 3.0, 1.0, 1.0])
+    low  = pd.Series([1.0, 0.5, 0.5, 2.0, np.nan, 0.5, 1.0, 1.0])
+    fast = detect_pivots(high, low, 1)
+    ref  = _detect_pivots_loop(high, low, 1)
+    pd.testing.assert_frame_equal(fast, ref)
+    assert fast['pivot_high'].iloc[1] == 3.0 and fast['pivot_high'].iloc[2] == 3.0
+
+
+def test_detect_pivots_short_series():
+    """資料長度不足一個視窗時全部為 NaN"""
+    high = OHLCV['High'].iloc[:5]
+    low  = OHLCV['Low'].iloc[:5]
+    result = detect_pivots(high, low, 5)
+    assert result['pivot_high'].isna().all()
+    assert result['pivot_low'].isna().all()
+
+
+def test_pivot_pyramid_matches_detect_pivots():
+    """一次計算的多 lookback Pivot 與逐一呼叫 detect_pivots 一致（含平手、NaN、短序列）"""
+    ohlcv = OHLCV.copy()
+    ohlcv.iloc[40, ohlcv.columns.get_loc('High')] = np.nan
+    ohlcv.iloc[41, ohlcv.columns.get_loc('Low')]  = np.nan
+    for data in (ohlcv, ohlcv.iloc[:7]):
+        pyramid = PivotPyramid(data['High'], data['Low'], range(0, 12))
+        assert pyramid.high_mask.shape == (len(data), 12)
+        for col, lookback in enumerate(pyramid.lookbacks):
+            expected = detect_pivots(data['High'], data['Low'], int(lookback))
+            pd.testing.assert_frame_equal(pyramid.pivots(int(lookback)), expected)
+            np.testing.assert_array_equal(pyramid.high_mask[:, col], expected['pivot_high'].notna())
+            np.testing.assert_array_equal(pyramid.low_mask[:, col], expected['pivot_low'].notna())
+
+
+# =============================================================================
+# BOS / CHOCH
+# =============================================================================
+
+def test_detect_structure_matches_loop():
+    """陣列狀態機與 pandas 逐根版輸出完全一致"""
+    for lookback in (2, 3, 5):
+        pivots = detect_pivots(OHLCV['High'], OHLCV['Low'], lookback)
+        fast   = detect_structure(OHLCV, pivots, lookback)
+        ref    = _detect_structure_loop(OHLCV, pivots, lookback)
+        assert len(ref) > 0
+        assert fast == ref
+
+
+def test_structure_codes():
+    """事件代碼陣列只在事件 K 線上非零，且與事件名稱對應"""
+    smc    = SmcIndicators(OHLCV)
+    events = smc.structure
+    codes  = smc.structure_codes
+    assert len(codes) == len(OHLCV) and codes.dtype == np.int8
+    assert list(np.flatnonzero(codes)) == [e.idx for e in events]
+    for e in events:
+        code = codes[e.idx]
+        assert (code > 0) == ('bullish' in e.event)
+        assert (abs(code) == 2) == ('choch' in e.event)
+
+
+def test_bias_timeline_matches_event_scan():
+    """偏向陣列查詢與逐事件掃描結果一致（含越界索引）"""
+    smc = SmcIndicators(OHLCV)
+
+    def scan(up_to_idx):
+        bias = 'neutral'
+        for event in smc.structure:
+            if event.idx > up_to_idx:
+                break
+            bias = 'bullish' if 'bullish' in event.event else 'bearish'
+        return bias
+
+    for idx in range(-3, len(OHLCV) + 3):
+        assert smc.get_current_bias(idx) == scan(idx)
+    assert smc.bias_timeline.dtype == np.int8
+    assert not smc.bias_timeline.flags['WRITEABLE']
+
+
+def test_swing_timelines_match_backward_scan():
+    """swing 陣列查詢與逐根往回掃描一致；折扣/溢價判斷以分界為準"""
+    smc = SmcIndicators(OHLCV)
+    ph  = smc.pivots['pivot_high'].to_numpy()
+    pl  = smc.pivots['pivot_low'].to_numpy()
+
+    def scan(up_to_idx):
+        swing_high = swing_low = np.nan
+        for i in range(min(up_to_idx, len(ph) - 1), -1, -1):
+            if np.isnan(swing_high) and not np.isnan(ph[i]):
+                swing_high = ph[i]
+            if np.isnan(swing_low) and not np.isnan(pl[i]):
+                swing_low = pl[i]
+            if not np.isnan(swing_high) and not np.isnan(swing_low):
+                break
+        return swing_low, swing_high
+
+    for idx in range(-2, len(OHLCV) + 2):
+        np.testing.assert_array_equal(smc.get_swing_range(idx), scan(idx))
+        swing_low, swing_high = scan(idx)
+        price = OHLCV['Close'].iloc[min(max(idx, 0), len(OHLCV) - 1)]
+        eq = (swing_low + swing_high) / 2
+        assert smc.is_in_discount(price, idx) == bool(price < eq)
+        assert smc.is_in_premium(price, idx) == bool(price > eq)
+
+
+# =============================================================================
+# FVG
+# =============================================================================
+
+def test_detect_fvgs_matches_loop():
+    """向量化 detect_fvgs 與迴圈版輸出（含順序）一致"""
+    for ratio in (0.0, 0.1, 0.5):
+        assert detect_fvgs(OHLCV, ratio) == _detect_fvgs_loop(OHLCV, ratio)
+
+
+def test_detect_fvgs_short_series():
+    """少於三根 K 線時沒有 FVG"""
+    assert detect_fvgs(OHLCV.iloc[:2]) == []
+
+
+def test_first_crossing_matches_scan():
+    """首次穿越搜尋與逐根掃描一致（含 NaN 值與 NaN 門檻）"""
+    rng    = np.random.default_rng(3)
+    values = np.round(rng.normal(0, 10, 300))
+    values[rng.integers(0, 300, 20)] = np.nan
+    starts     = rng.integers(0, 320, 200)
+    thresholds = np.round(rng.normal(0, 15, 200))
+    thresholds[:5] = np.nan
+    ops = {'le': np.less_equal, 'lt': np.less, 'ge': np.greater_equal, 'gt': np.greater}
+    for op, cmp in ops.items():
+        hits = _first_crossing(values, starts, thresholds, op)
+        for s, thr, hit in zip(starts, thresholds, hits):
+            expected = next((j for j in range(s, len(values)) if cmp(values[j], thr)), -1)
+            assert hit == expected
+
+
+def test_fvg_fill_index_matches_replay():
+    """filled_at 等於從 FVG 完成當根起逐根呼叫 update_fvg_fill_status 的結果"""
+    fvgs = list(detect_fvg_table(OHLCV, 0.1).resolve_fills(OHLCV['Close'].to_numpy()))
+    assert any(f.filled for f in fvgs) and not all(f.filled for f in fvgs)
+    for fvg, ref in zip(fvgs, detect_fvgs(OHLCV, 0.1)):
+        for j in range(ref.idx, len(OHLCV)):
+            update_fvg_fill_status([ref], OHLCV, j)
+        assert fvg == ref
+
+
+def test_active_zones_use_lifecycle_indexes():
+    """idx 時的有效 FVG / OB = 已建立且之後至 idx 為止尚未被收盤穿越"""
+    smc   = SmcIndicators(OHLCV, displacement_atr=0.5)
+    close = OHLCV['Close'].to_numpy()
+    assert smc.order_blocks
+    for idx in range(0, len(close), 37):
+        for direction in ('bullish', 'bearish'):
+            expected = [
+                f for f in smc.fvgs
+                if f.direction == direction and f.idx <= idx and not any(
+                    (close[j] <= f.mid) if direction == 'bullish' else (close[j] >= f.mid)
+                    for j in range(f.idx, idx + 1)
+                )
+            ]
+            assert smc.get_active_fvgs(direction, idx) == expected
+
+            expected = [
+                ob for ob in smc.order_blocks
+                if ob.direction == direction and ob.idx <= idx and not any(
+                    (close[j] < ob.bottom) if direction == 'bullish' else (close[j] > ob.top)
+                    for j in range(ob.idx, idx + 1)
+                )
+            ]
+            assert smc.get_active_obs(direction, idx) == expected
+
+    # filled / valid 為資料結束時的最終狀態
+    assert all(f.filled == (f.filled_at is not None) for f in smc.fvgs)
+    assert all(ob.valid == (ob.invalidated_at is None) for ob in smc.order_blocks)
+
+
+# =============================================================================
+# Order Block
+# =============================================================================
+
+def test_detect_order_blocks_matches_loop():
+    """讀取共用特徵的 detect_order_blocks 與迴圈版一致"""
+    smc = SmcIndicators(OHLCV)
+    for ratio in (0.1, 0.5, 1.0, 1.5):
+        for lookback in (1, 2, 5, 10, 20):
+            fast = detect_order_blocks(OHLCV, smc.structure, ratio, lookback, features=smc.features)
+            ref  = _detect_order_blocks_loop(OHLCV, smc.structure, ratio, lookback)
+            assert fast == ref
+
+
+def test_last_candle_index_arrays():
+    """最近一根看漲/看跌 K 線索引陣列與逐根掃描一致"""
+    features = SmcFeatures(OHLCV)
+    last_bull = last_bear = -1
+    for i in range(len(OHLCV)):
+        if features.is_bullish[i]:
+            last_bull = i
+        if features.is_bearish[i]:
+            last_bear = i
+        assert features.last_bullish_idx[i] == last_bull
+        assert features.last_bearish_idx[i] == last_bear
+
+
+# =============================================================================
+# 流動性池
+# =============================================================================
+
+def test_detect_liquidity_pools_matches_loop():
+    """相容模式（greedy=True）與 O(k²) 迴圈版結果一致"""
+    pivots = detect_pivots(OHLCV['High'], OHLCV['Low'], 2)
+    for tol in (0.0, 0.002, 0.01, 0.05):
+        for min_count in (2, 3):
+            fast = detect_liquidity_pools(pivots, OHLCV, tol, min_count)
+            ref  = _detect_liquidity_pools_loop(pivots, OHLCV, tol, min_count)
+            assert fast == ref
+
+
+def test_detect_liquidity_pools_sorted_mode():
+    """價格滑動視窗模式：每個池的成員都在起點容忍度內，且數量達門檻"""
+    pivots = detect_pivots(OHLCV['High'], OHLCV['Low'], 2)
+    pools  = detect_liquidity_pools(pivots, OHLCV, 0.01, 2, greedy=False)
+    assert pools
+    for lp in pools:
+        assert lp.count >= 2
+        column = 'pivot_high' if lp.direction == 'buy_side' else 'pivot_low'
+        assert not np.isnan(pivots[column].iloc[lp.idx])
+
+
+def test_nearest_liquidity_skips_swept_pools():
+    """最近 BSL / SSL 只取已成形且尚未被高/低點掃過的池（查詢順序不影響結果）"""
+    smc  = SmcIndicators(OHLCV, pivot_lookback=2, lp_tolerance_pct=0.01)
+    high = OHLCV['High'].to_numpy()
+    low  = OHLCV['Low'].to_numpy()
+    assert any(lp.swept for lp in smc.liquidity_pools)
+
+    def brute(price, idx):
+        live = [
+            lp for lp in smc.liquidity_pools if lp.idx <= idx and not (
+                (high[lp.idx + 1:idx + 1] > lp.level).any() if lp.direction == 'buy_side'
+                else (low[lp.idx + 1:idx + 1] < lp.level).any()
+            )
+        ]
+        bsl = [lp.level for lp in live if lp.direction == 'buy_side' and lp.level > price]
+        ssl = [lp.level for lp in live if lp.direction == 'sell_side' and lp.level < price]
+        return (min(bsl) if bsl else np.nan, max(ssl) if ssl else np.nan)
+
+    close = OHLCV['Close'].to_numpy()
+    for idx in list(range(len(close))) + [450, 120, 5, 599]:
+        np.testing.assert_equal(smc.get_nearest_liquidity(close[idx], idx), brute(close[idx], idx))
+
+
+# =============================================================================
+# 欄位式區域表
+# =============================================================================
+
+def _first_bar(values: np.ndarray, start: int, op, threshold: float):
+    """values[start:] 中第一個 op(value, threshold) 成立的索引（無則 None）"""
+    hits = np.flatnonzero(op(values[start:], threshold))
+    return int(start + hits[0]) if len(hits) else None
+
+
+def test_zone_tables_match_resolved_lists():
+    """欄位表的 dataclass view 與 list 版偵測 + 逐根掃描的生命週期結果一致"""
+    smc    = SmcIndicators(OHLCV, pivot_lookback=2, displacement_atr=0.5, lp_tolerance_pct=0.01)
+    close  = OHLCV['Close'].to_numpy()
+    fvgs   = detect_fvgs(OHLCV, smc.fvg_min_size_atr)
+    obs    = detect_order_blocks(OHLCV, smc.structure, smc.displacement_atr)
+    pools  = detect_liquidity_pools(smc.pivots, OHLCV, smc.lp_tolerance_pct)
+    for f in fvgs:
+        op = np.less_equal if f.direction == 'bullish' else np.greater_equal
+        f.filled_at = _first_bar(close, f.idx, op, f.mid)
+        f.filled    = f.filled_at is not None
+    for ob in obs:
+        if ob.direction == 'bullish':
+            ob.invalidated_at = _first_bar(close, ob.idx, np.less, ob.bottom)
+        else:
+            ob.invalidated_at = _first_bar(close, ob.idx, np.greater, ob.top)
+        ob.valid = ob.invalidated_at is None
+    for lp in pools:
+        if lp.direction == 'buy_side':
+            lp.swept_at = _first_bar(OHLCV['High'].to_numpy(), lp.idx + 1, np.greater, lp.level)
+        else:
+            lp.swept_at = _first_bar(OHLCV['Low'].to_numpy(), lp.idx + 1, np.less, lp.level)
+        lp.swept = lp.swept_at is not None
+
+    assert fvgs and obs and pools
+    assert any(f.filled for f in fvgs) and any(lp.swept for lp in pools)
+    assert list(smc.fvg_table) == fvgs
+    assert list(smc.order_block_table) == obs
+    assert list(smc.liquidity_pool_table) == pools
+    assert smc.fvg_table[-1] == fvgs[-1] and smc.fvg_table[:3] == fvgs[:3]
+    # 流動性池價位保持群集平均的 np.float64（round(level, 2) 與 Python float 取整不同）
+    assert all(type(lp.level) is np.float64 for lp in smc.liquidity_pool_table)
+
+
+def test_liquidity_levels_and_serialized_prices_keep_rounding():
+    """最近流動性價位為 np.float64；序列化的 FVG / OB 價格以 Python round 取整"""
+    smc   = SmcIndicators(OHLCV)
+    close = OHLCV['Close'].to_numpy()
+    levels = [level for idx in range(0, len(close), 7)
+              for level in smc.get_nearest_liquidity(close[idx], idx) if not np.isnan(level)]
+    assert levels and all(type(level) is np.float64 for level in levels)
+
+    values = np.array([20848.835, 1.115, 100.045])
+    assert _round2(values) == [20848.83, 1.11, 100.05]
+    assert _round2(values) != np.round(values, 2).tolist()
+
+
+def test_zone_table_views_are_fresh_and_columns_read_only():
+    """每次存取都是新物件，修改 view / list 不影響表格與後續呼叫；欄位陣列不可寫入"""
+    smc   = SmcIndicators(OHLCV)
+    table = smc.fvg_table
+    assert table[0] == table[0] and table[0] is not table[0]
+
+    fvgs = smc.fvgs
+    assert isinstance(fvgs, list) and fvgs == list(table)
+    filled = fvgs[0].filled
+    fvgs[0].filled = not filled
+    table[1].top = -1.0
+    smc.order_blocks[0].valid = False
+    fvgs.clear()
+    assert smc.fvgs[0].filled == filled and table[0].filled == filled
+    assert table[1].top == table.top[1]
+    assert [ob.valid for ob in smc.order_blocks] == (~smc.order_block_table.ended).tolist()
+    assert table.active('bullish', len(OHLCV) - 1) == [
+        f for f in table if f.direction == 'bullish' and not f.filled
+    ]
+    assert table.active('sideways', len(OHLCV) - 1) == []
+    for arr in table.columns.values():
+        assert not arr.flags.writeable
+
+
+def test_active_zone_index_matches_reverse_scan():
+    """區間索引查詢 = 由後往前掃描有效區域、第一個包含價格者（含邊界價與往回查詢）"""
+    smc = SmcIndicators(OHLCV, displacement_atr=0.5, fvg_min_size_atr=0.0)
+    rng = np.random.default_rng(5)
+    for table in (smc.fvg_table, smc.order_block_table):
+        index = ActiveZoneIndex(table)
+        probes = list(range(len(OHLCV))) + [300, 10, 599]
+        for idx in probes:
+            for direction in ('bullish', 'bearish'):
+                active = table.active(direction, idx)
+                prices = [OHLCV['Close'].iloc[idx], np.nan] + [
+                    rng.choice([z.top, z.bottom, z.mid]) for z in active[-3:]
+                ]
+                for price in prices:
+                    expected = next(
+                        (z for z in reversed(active) if z.bottom <= price <= z.top), None
+                    )
+                    row = index.find(direction, price, idx)
+                    assert (None if row is None else table[row]) == expected
+
+
+# =============================================================================
+# 訊號
+# =============================================================================
+
+def test_signal_view_matches_component_queries():
+    """惰性訊號的各欄位與個別查詢方法一致（nan 以 0.0 表示）"""
+    smc = SmcIndicators(OHLCV, pivot_lookback=2, lp_tolerance_pct=0.01)
+    nz  = lambda v: 0.0 if np.isnan(v) else v
+    for idx in range(0, len(OHLCV), 23):
+        close = OHLCV['Close'].iloc[idx]
+        swing_low, swing_high = smc.get_swing_range(idx)
+        bsl, ssl = smc.get_nearest_liquidity(close, idx)
+        expected = SmcSignals(
+            date=str(OHLCV.index[idx])[:10],
+            bias=smc.get_current_bias(idx),
+            active_bullish_fvgs=smc.get_active_fvgs('bullish', idx),
+            active_bearish_fvgs=smc.get_active_fvgs('bearish', idx),
+            active_bullish_obs=smc.get_active_obs('bullish', idx),
+            active_bearish_obs=smc.get_active_obs('bearish', idx),
+            last_swing_high=nz(swing_high),
+            last_swing_low=nz(swing_low),
+            equilibrium=nz((swing_low + swing_high) / 2),
+            nearest_bsl=nz(bsl),
+            nearest_ssl=nz(ssl),
+        )
+        assert smc.get_signal_at(idx).to_signals() == expected
+
+
+def test_signal_view_computes_only_read_fields():
+    """只讀 bias 時不建立有效區域列表；欄位求值後快取"""
+    signal = SmcIndicators(OHLCV).get_signal_at(400)
+    assert signal.bias in ('bullish', 'bearish', 'neutral')
+    for slot in ('_active_bullish_fvgs', '_active_bullish_obs', '_nearest_liquidity'):
+        assert not hasattr(signal, slot)
+    assert signal.active_bullish_fvgs is signal.active_bullish_fvgs
+    assert not hasattr(signal, '__dict__')
+
+
+# =============================================================================
+# 參數衍生
+# =============================================================================
+
+DETECTORS = ('detect_pivots', 'detect_structure_arrays', 'detect_fvg_table',
+             'detect_order_block_table', 'detect_liquidity_pool_table')
+
+
+def _count_detector_calls(monkeypatch) -> dict:
+    calls = dict.fromkeys(DETECTORS, 0)
+    for name in DETECTORS:
+        original = getattr(smc_module, name)
+
+        def counted(*args, _name=name, _original=original, **kwargs):
+            calls[_name] += 1
+            return _original(*args, **kwargs)
+        monkeypatch.setattr(smc_module, name, counted)
+    return calls
+
+
+def _snapshot(smc: SmcIndicators) -> tuple:
+    return (smc.pivots.to_numpy().tobytes(), smc.structure, list(smc.fvgs),
+            list(smc.order_blocks), list(smc.liquidity_pools))
+
+
+def test_with_params_reuses_upstream_artifacts(monkeypatch):
+    """with_params 只重算輸入改變的偵測器，結果與全新計算相同"""
+    base  = SmcIndicators(OHLCV).precompute()
+    calls = _count_detector_calls(monkeypatch)
+
+    derived = base.with_params(displacement_atr=0.5).precompute()
+    assert calls == {**dict.fromkeys(DETECTORS, 0), 'detect_order_block_table': 1}
+    assert derived.features is base.features and derived.fvg_table is base.fvg_table
+
+    calls.update(dict.fromkeys(DETECTORS, 0))
+    base.with_params(lp_tolerance_pct=0.01).precompute()
+    assert calls == {**dict.fromkeys(DETECTORS, 0), 'detect_liquidity_pool_table': 1}
+
+    calls.update(dict.fromkeys(DETECTORS, 0))
+    base.with_params(pivot_lookback=3).precompute()
+    assert calls['detect_fvg_table'] == 0 and calls['detect_pivots'] == 1
+
+    monkeypatch.undo()
+    for changes in ({'displacement_atr': 0.5}, {'lp_tolerance_pct': 0.01},
+                    {'pivot_lookback': 3, 'fvg_min_size_atr': 0.0}):
+        fresh = SmcIndicators(OHLCV, **{**base.params, **changes})
+        assert _snapshot(base.with_params(**changes)) == _snapshot(fresh)
+
+
+def test_pivot_lookback_sweep_uses_pyramid(monkeypatch):
+    """計算過 pivot_pyramid 後，掃描 pivot_lookback 不再呼叫 detect_pivots"""
+    fresh = {k: SmcIndicators(OHLCV, pivot_lookback=k).precompute() for k in (2, 3, 7)}
+    base  = SmcIndicators(OHLCV)
+    _ = base.pivot_pyramid
+    calls = _count_detector_calls(monkeypatch)
+    for lookback, expected in fresh.items():
+        derived = base.with_params(pivot_lookback=lookback)
+        pd.testing.assert_frame_equal(derived.pivots, expected.pivots)
+        assert derived.structure == expected.structure
+    assert calls['detect_pivots'] == 0
+
+
+def test_with_params_rejects_unknown_names():
+    """未知參數名稱拋出 TypeError"""
+    try:
+        SmcIndicators(OHLCV).with_params(lookback=3)
+    except TypeError:
+        pass
+    else:
+        raise AssertionError('expected TypeError')
+
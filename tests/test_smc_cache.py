@@ -0,0 +1,144 @@
+"""
+SMC 指標快取測試
+
+驗證快取鍵、LRU 淘汰與命中統計，以及回測引擎重複執行時不再重跑偵測。
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backtest.smc_config import load_smc_config
+from backtest.smc_engine import SmcEngine
+from core.smc import SmcIndicators
+from core.smc_cache import SmcIndicatorCache, ohlcv_fingerprint, smc_cache
+from tests._fixtures import make_ohlcv
+
+
+OHLCV  = make_ohlcv(n=400, seed=5)
+PARAMS = dict(pivot_lookback=5, fvg_min_size_atr=0.1, displacement_atr=1.5, lp_tolerance_pct=0.002)
+
+
+def test_fingerprint_tracks_prices_not_identity():
+    """內容相同的副本指紋相同；價格或時間變動則不同（Volume 不影響）"""
+    copy = OHLCV.copy()
+    assert ohlcv_fingerprint(copy) == ohlcv_fingerprint(OHLCV)
+    copy['Volume'] += 1
+    assert ohlcv_fingerprint(copy) == ohlcv_fingerprint(OHLCV)
+    copy.iloc[10, copy.columns.get_loc('Close')] += 1
+    assert ohlcv_fingerprint(copy) != ohlcv_fingerprint(OHLCV)
+    assert ohlcv_fingerprint(OHLCV.iloc[:-1]) != ohlcv_fingerprint(OHLCV)
+
+
+def test_cache_hits_and_params_in_key():
+    """相同資料與參數命中；timeframe 或任一 SMC 參數不同則未命中"""
+    cache = SmcIndicatorCache()
+    first = cache.get_or_compute(OHLCV, '1d', **PARAMS)
+    assert cache.get_or_compute(OHLCV.copy(), '1d', **PARAMS) is first
+    assert cache.get_or_compute(OHLCV, '4h', **PARAMS) is not first
+    assert cache.get_or_compute(OHLCV, '1d', **{**PARAMS, 'displacement_atr': 1.0}) is not first
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 3, 3)
+
+
+def test_cache_lru_eviction_by_memory_budget():
+    """超過記憶體預算時淘汰最久未使用者；單項超過預算則不保留"""
+    probe = SmcIndicatorCache().get_or_compute(OHLCV, '1d', **PARAMS)
+    cache = SmcIndicatorCache(max_bytes=int(probe.nbytes * 2.5))
+
+    cache.get_or_compute(OHLCV, 'a', **PARAMS)
+    cache.get_or_compute(OHLCV, 'b', **PARAMS)
+    cache.get_or_compute(OHLCV, 'a', **PARAMS)      # a 變為最近使用
+    cache.get_or_compute(OHLCV, 'c', **PARAMS)      # 淘汰 b
+    assert cache.stats()['evictions'] == 1
+    cache.get_or_compute(OHLCV, 'a', **PARAMS)
+    cache.get_or_compute(OHLCV, 'b', **PARAMS)
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (2, 4)
+    assert stats['nbytes'] <= stats['max_bytes']
+
+    tiny = SmcIndicatorCache(max_bytes=1)
+    tiny.get_or_compute(OHLCV, '1d', **PARAMS)
+    assert len(tiny) == 0
+
+
+def test_cache_counts_range_tables_built_after_store():
+    """放入後才建立的 RangeQuery 稀疏表於下次命中時計入預算，超出即淘汰"""
+    probe = SmcIndicatorCache().get_or_compute(OHLCV, '1d', **PARAMS)
+    cache = SmcIndicatorCache(max_bytes=int(probe.nbytes * 2.2))
+
+    first = cache.get_or_compute(OHLCV, 'a', **PARAMS)
+    cache.get_or_compute(OHLCV, 'b', **PARAMS)
+    assert cache.stats()['nbytes'] == 2 * probe.nbytes
+
+    rq = first.features.range_query('open')
+    rq.range_max([0], [1])
+    rq.range_min([0], [1])
+    assert rq.nbytes and first.nbytes == probe.nbytes + rq.nbytes
+    assert cache.get_or_compute(OHLCV, 'a', **PARAMS) is first
+    stats = cache.stats()
+    assert stats['evictions'] == 1 and len(cache) == 1
+    assert stats['nbytes'] == first.nbytes <= stats['max_bytes']
+
+
+def test_cache_hit_measures_only_the_hit_entry(monkeypatch):
+    """命中只重新估計該項目，總量以差值調整，與逐項加總一致"""
+    cache   = SmcIndicatorCache()
+    entries = [cache.get_or_compute(OHLCV, tf, **PARAMS) for tf in ('a', 'b', 'c', 'd')]
+    entries[1].features.range_query('open').range_max([0], [1])
+
+    measured = []
+    nbytes   = SmcIndicators.nbytes
+    monkeypatch.setattr(SmcIndicators, 'nbytes',
+                        property(lambda self: measured.append(self) or nbytes.fget(self)))
+    assert cache.get_or_compute(OHLCV, 'b', **PARAMS) is entries[1]
+    assert measured == [entries[1]]
+    assert cache.stats()['nbytes'] == sum(nbytes.fget(e) for e in entries)
+
+
+def test_engine_repeat_runs_skip_detection():
+    """只改資金 / 槓桿的回測重用快取中的指標，結果與全新計算相同"""
+    smc_cache.clear()
+    base  = load_smc_config({'start_date': '2020-02-01'})
+    other = load_smc_config({'start_date': '2020-02-01', 'leverage': 3, 'initial_capital': 5000})
+
+    first  = SmcEngine(OHLCV, base)
+    second = SmcEngine(OHLCV.copy(), other)
+    assert second.smc is first.smc
+
+    fresh = SmcEngine(OHLCV, other, indicators=SmcIndicators(OHLCV, **first.smc.params))
+    assert fresh.smc is not first.smc
+    assert second.run().to_dict() == fresh.run().to_dict()
+
+
+def test_cache_miss_derives_from_same_dataset():
+    """同資料其他參數的未命中以 with_params 衍生，沿用未受影響的偵測結果"""
+    cache = SmcIndicatorCache()
+    base  = cache.get_or_compute(OHLCV, '1d', **PARAMS)
+    swept = cache.get_or_compute(OHLCV, '1d', **{**PARAMS, 'displacement_atr': 0.8})
+    assert swept.pivots is base.pivots and swept.fvg_table is base.fvg_table
+    assert swept.order_block_table is not base.order_block_table
+    assert cache.get_or_compute(OHLCV, '4h', **PARAMS).features is not base.features
+
+
+def test_service_fingerprint_skips_rehash(monkeypatch):
+    """smc_service 預計算時算好指紋，回測改用其他參數時傳入，不再雜湊整份資料"""
+    import importlib
+    from core.smc_service import SmcSignalService
+    cache_module = importlib.import_module('core.smc_cache')   # core.smc_cache 屬性為快取單例
+
+    smc_cache.clear()
+    service = SmcSignalService()
+    service.precompute(OHLCV, '4h')
+    fingerprint = service.get_fingerprint('4h', OHLCV)
+    assert fingerprint == ohlcv_fingerprint(OHLCV)
+    assert service.get_fingerprint('4h', OHLCV.copy()) is None
+    assert service.get_fingerprint('1d', OHLCV) is None
+
+    def no_rehash(ohlcv):
+        raise AssertionError('不應重新計算指紋')
+    monkeypatch.setattr(cache_module, 'ohlcv_fingerprint', no_rehash)
+
+    config = load_smc_config({'start_date': '2020-02-01', 'timeframe': '4h', 'displacement_atr': 0.8})
+    engine = SmcEngine(OHLCV, config, indicators=service.get_indicators('4h'), fingerprint=fingerprint)
+    assert engine.smc.features is service.get_indicators('4h').features
+    assert len(smc_cache) == 2
@@ -0,0 +1,174 @@
+"""
+SMC 回測引擎測試
+
+以模擬 OHLCV 驗證引擎在共用指標、不同執行模式下的結果一致性。
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from backtest.smc_config import load_smc_config, SmcRules
+from backtest.smc_engine import SmcEngine
+from core.smc import SmcIndicators
+from tests._fixtures import make_ohlcv, CONFIGS
+
+
+OHLCV = make_ohlcv(n=900, seed=3)
+
+
+def _summary(result) -> tuple:
+    return result.to_dict(), result.trades, result.equity_curve
+
+
+def _typed(value):
+    """遞迴附上型別名稱，讓比較同時檢查數值與型別"""
+    if isinstance(value, dict):
+        return {k: _typed(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_typed(v) for v in value]
+    return type(value).__name__, value
+
+
+# =============================================================================
+# 共用指標
+# =============================================================================
+
+def test_shared_indicators_reused_when_params_match():
+    """參數與資料相同時沿用傳入的指標，否則重新計算"""
+    shared = SmcIndicators(OHLCV).precompute()
+    config = load_smc_config({'start_date': '2020-03-01'})
+    assert SmcEngine(OHLCV, config, indicators=shared).smc is shared
+
+    other = load_smc_config({'start_date': '2020-03-01', 'pivot_lookback': 3})
+    assert SmcEngine(OHLCV, other, indicators=shared).smc is not shared
+    assert SmcEngine(OHLCV.copy(), config, indicators=shared).smc is not shared
+
+
+def test_shared_indicators_concurrent_runs():
+    """多個回測同時共用同一份指標，結果與各自獨立計算相同"""
+    configs = [load_smc_config(c) for c in CONFIGS[:2]] * 3
+    expected = [_summary(SmcEngine(OHLCV, c).run()) for c in configs]
+
+    shared = SmcIndicators(OHLCV).precompute()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(
+            lambda c: _summary(SmcEngine(OHLCV, c, indicators=shared).run()), configs
+        ))
+    assert results == expected
+
+
+# =============================================================================
+# 事件驅動模式
+# =============================================================================
+
+def test_event_mode_matches_bar_mode():
+    """mode='event' 的交易、權益曲線與統計與逐根模式完全相同（含型別）"""
+    hourly = OHLCV.set_index(pd.date_range('2020-01-01', periods=len(OHLCV), freq='h'))
+    for data, start in ((OHLCV, None), (hourly, '2020-01-03')):
+        for c in CONFIGS:
+            config = load_smc_config({**c, 'start_date': start or c['start_date']})
+            bar    = SmcEngine(data, config).run()
+            event  = SmcEngine(data, config).run(mode='event')
+            assert bar.trades, c
+            assert _typed(_summary(event)) == _typed(_summary(bar))
+
+
+def test_event_mode_rejects_unknown_mode():
+    """未知的 mode 直接報錯"""
+    engine = SmcEngine(OHLCV, load_smc_config(CONFIGS[0]))
+    try:
+        engine.run(mode='fast')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('應拋出 ValueError')
+
+
+def test_bar_range_matches_run_window():
+    """bar_range 為回測區間的閉區間索引（預設取 config），與權益曲線的日期一致"""
+    config = load_smc_config({'start_date': '2020-03-01', 'end_date': '2020-05-10'})
+    engine = SmcEngine(OHLCV, config)
+    start, end = engine.bar_range()
+    result = engine.run()
+    assert (result.equity_dates[0], result.equity_dates[-1]) == ('2020-03-01', '2020-05-10')
+    assert len(result.equity) == end - start + 1
+    assert engine.bar_range('2020-03-01T12:00', '2020-03-01') == (start + 1, start)
+    open_ended = SmcEngine(OHLCV, load_smc_config({'start_date': '2020-03-01'}))
+    assert open_ended.bar_range() == (start, len(OHLCV) - 1)
+
+
+# =============================================================================
+# 權益曲線與統計
+# =============================================================================
+
+def test_equity_array_and_lazy_curve():
+    """權益為對齊回測區間的 float64 陣列；dict 清單在存取時才建立，回撤與逐點計算相同"""
+    config = load_smc_config({'start_date': '2020-03-01', 'allow_short': True, 'leverage': 5})
+    engine = SmcEngine(OHLCV, config)
+    result = engine.run()
+    start  = OHLCV.index.searchsorted(pd.Timestamp('2020-03-01'))
+    # 取整與逐點 round(np.float64, 2) 相同
+    assert result.equity.tolist() == [round(e, 2) for e in engine._equity]
+
+    assert result.equity.dtype == np.float64 and len(result.equity) == len(OHLCV) - start
+    assert result._equity_curve is None
+    curve = result.equity_curve
+    assert curve[0] == {'time': '2020-03-01', 'equity': float(result.equity[0])}
+    assert result.equity_curve is curve
+
+    peak, max_dd = config['initial_capital'], 0.0
+    for point in curve:
+        peak   = max(peak, point['equity'])
+        max_dd = max(max_dd, (peak - point['equity']) / peak)
+    assert result.max_drawdown == max_dd
+
+
+# =============================================================================
+# 編譯規則
+# =============================================================================
+
+def test_rules_resolved_once_and_read_only():
+    """巢狀條件解析為布林與數值，實例不可修改"""
+    rules = SmcRules(load_smc_config(CONFIGS[2]))
+    assert (rules.allow_long, rules.allow_short) == (True, True)
+    assert (rules.require_bias, rules.require_discount, rules.require_ob) == (False, False, True)
+    assert rules.stop_loss_pct == 0.02 and rules.max_holding_bars == 30
+
+    for attempt in (lambda: setattr(rules, 'leverage', 3), lambda: delattr(rules, 'fee_rate')):
+        try:
+            attempt()
+        except AttributeError:
+            pass
+        else:
+            raise AssertionError('應拋出 AttributeError')
+
+
+class _ExitRecorder(SmcEngine):
+    """記錄每筆平倉的 (進場索引, 出場索引, 原因)"""
+
+    def _process_bar(self, idx):
+        self.bar = idx
+        super()._process_bar(idx)
+
+    def _close_position(self, date_str, exit_price, reason):
+        self.closed = getattr(self, 'closed', [])
+        self.closed.append((self.position.entry_idx, self.bar, reason))
+        super()._close_position(date_str, exit_price, reason)
+
+
+def test_max_holding_counts_from_entry_bar():
+    """小時線的最大持倉根數自進場 K 線起算，而非進場當日第一根（兩種模式相同）"""
+    hourly = OHLCV.set_index(pd.date_range('2020-01-01', periods=len(OHLCV), freq='h'))
+    config = load_smc_config({**CONFIGS[3], 'start_date': '2020-01-03'})
+    engine = _ExitRecorder(hourly, config)
+    engine.run()
+
+    held = [(entry, exit_) for entry, exit_, reason in engine.closed if reason.startswith('max_bars')]
+    assert held and all(exit_ - entry == 12 for entry, exit_ in held)
+    assert any(hourly.index[entry].hour for entry, _ in held)
+    assert SmcEngine(hourly, config).run(mode='event').trades == [t.to_dict() for t in engine.trades]
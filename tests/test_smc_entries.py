@@ -0,0 +1,95 @@
+"""
+SMC 進場遮罩測試
+
+以逐根查詢（SmcCursor 的區域 / 流動性查詢）為參考，驗證編譯出的遮罩、止損與止盈價，
+以及分析端點用的進場清單。
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from backtest.smc_config import load_smc_config, SmcRules
+from backtest.smc_entries import compile_entry_masks
+from core.smc import SmcIndicators, BIAS_BULLISH
+from tests._fixtures import make_ohlcv, CONFIGS
+
+
+OHLCV = make_ohlcv(n=900, seed=3)
+
+
+def _reference(smc, cursor, rules, side: str, idx: int) -> tuple:
+    """逐根判斷 (是否進場, 止損價, 止盈價)，與遮罩編譯前的引擎寫法相同"""
+    close  = smc.features.close[idx]
+    name   = 'bullish' if side == 'long' else 'bearish'
+    allowed = rules.allow_long if side == 'long' else rules.allow_short
+    if not allowed:
+        return False, None, None
+    if rules.require_bias and smc.get_current_bias(idx) != name:
+        return False, None, None
+    in_zone = smc.is_in_discount if side == 'long' else smc.is_in_premium
+    if rules.require_discount and not in_zone(close, idx):
+        return False, None, None
+
+    zone = None
+    if rules.require_ob:
+        zone = cursor.find_active_ob(name, close, idx)
+    if zone is None and rules.require_fvg:
+        zone = cursor.find_active_fvg(name, close, idx)
+    if zone is None:
+        return False, None, None
+    if side == 'long':
+        stop, target = zone.bottom * (1 - rules.stop_loss_pct), cursor.get_nearest_liquidity(close, idx)[0]
+    else:
+        stop, target = zone.top * (1 + rules.stop_loss_pct), cursor.get_nearest_liquidity(close, idx)[1]
+    return stop > 0, stop, 0.0 if np.isnan(target) else target
+
+
+def test_masks_match_per_bar_checks():
+    """進場遮罩、止損與止盈價與逐根查詢相同"""
+    smc = SmcIndicators(OHLCV).precompute()
+    for c in CONFIGS:
+        rules = SmcRules(load_smc_config(c))
+        masks = compile_entry_masks(smc, rules)
+        for side in (masks.long, masks.short):
+            cursor   = smc.cursor()
+            expected = [_reference(smc, cursor, rules, side.direction, idx) for idx in range(len(OHLCV))]
+            assert side.entry.tolist() == [ok for ok, _, _ in expected], (c, side.direction)
+            for idx in np.flatnonzero(side.entry).tolist():
+                assert (side.stop[idx], side.target[idx]) == expected[idx][1:], (c, idx)
+        assert masks.long.entry.any(), c
+
+
+def test_rule_masks_and_direction():
+    """各條件遮罩不受啟用與否影響；兩側同時成立時做多優先"""
+    smc   = SmcIndicators(OHLCV).precompute()
+    loose = compile_entry_masks(smc, SmcRules(load_smc_config(CONFIGS[2])))
+    base  = compile_entry_masks(smc, SmcRules(load_smc_config({**CONFIGS[2], 'allow_short': False})))
+
+    for name in ('bias', 'discount', 'in_ob', 'in_fvg'):
+        np.testing.assert_array_equal(getattr(loose.short, name), getattr(base.short, name))
+    assert not base.short.entry.any()
+    np.testing.assert_array_equal(
+        loose.direction,
+        np.where(loose.long.entry, 1, np.where(loose.short.entry, -1, 0)),
+    )
+    np.testing.assert_array_equal(loose.long.bias, smc.bias_timeline == BIAS_BULLISH)
+
+
+def test_entries_records():
+    """進場清單只含區間內的進場 K 線，價格取 2 位小數，無止盈為 None"""
+    smc     = SmcIndicators(OHLCV).precompute()
+    masks   = compile_entry_masks(smc, SmcRules(load_smc_config(CONFIGS[1])))
+    dates   = smc.features.dates
+    close   = smc.features.close
+    entries = masks.entries(dates, close, 100, 700)
+
+    bars = [idx for idx in np.flatnonzero(masks.direction).tolist() if 100 <= idx <= 700]
+    assert [e['time'] for e in entries] == [dates[idx] for idx in bars]
+    for record, idx in zip(entries, bars):
+        side = masks.long if masks.direction[idx] > 0 else masks.short
+        assert record['direction'] == side.direction
+        assert record['price'] == round(float(close[idx]), 2)
+        assert record['stop'] == round(float(side.stop[idx]), 2)
+        assert record['target'] == (round(float(side.target[idx]), 2) or None)
@@ -0,0 +1,75 @@
+"""
+增量式 SMC 指標測試
+
+驗證 SmcStream 逐根餵入的結果與對相同資料前綴做批次計算
+（SmcIndicators(prefix).precompute()）完全一致。
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pandas as pd
+
+from bench.synthetic import make_synthetic_ohlcv
+from core.smc import SmcFeatures, SmcIndicators, detect_pivots, detect_liquidity_pool_table
+from core.smc_stream import SmcStream
+
+
+OHLCV = make_synthetic_ohlcv(1200, seed=11)
+
+PREFIXES = (30, 200, 517, 900, len(OHLCV))
+
+
+def _feed(stream: SmcStream, n: int) -> None:
+    while len(stream) < n:
+        i   = len(stream)
+        row = OHLCV.iloc[i]
+        stream.append_bar(row['Open'], row['High'], row['Low'], row['Close'],
+                          row['Volume'], OHLCV.index[i])
+
+
+def test_stream_matches_precompute():
+    """逐根餵入後，各偵測結果、活躍集合與被掃狀態與前綴批次計算一致"""
+    for params in (
+        dict(pivot_lookback=5),
+        dict(pivot_lookback=2, displacement_atr=0.5, lp_tolerance_pct=0.01),
+        dict(pivot_lookback=3, fvg_min_size_atr=0.3, displacement_atr=0.8, lp_tolerance_pct=0.005),
+    ):
+        stream = SmcStream(**params)
+        for n in PREFIXES:
+            _feed(stream, n)
+            smc = SmcIndicators(OHLCV.iloc[:n], **params).precompute()
+
+            pd.testing.assert_frame_equal(stream.pivots, smc.pivots, check_freq=False, check_names=False)
+            assert stream.structure == smc.structure
+            assert stream.fvgs == smc.fvgs
+            assert stream.order_blocks == smc.order_blocks
+            assert stream.liquidity_pools == smc.liquidity_pools
+            assert stream.bias == smc.get_current_bias(n - 1)
+            for direction in ('bullish', 'bearish'):
+                assert stream.active_fvgs(direction) == smc.get_active_fvgs(direction, n - 1)
+                assert stream.active_obs(direction) == smc.get_active_obs(direction, n - 1)
+
+        assert any(lp.swept for lp in stream.liquidity_pools)
+        assert any(not lp.swept for lp in stream.liquidity_pools)
+
+
+def test_stream_pools_min_count_rebuild():
+    """min_count > 2（觸發整側重新分群）時，池與被掃狀態仍與批次表一致"""
+    stream = SmcStream(pivot_lookback=2, lp_tolerance_pct=0.01, lp_min_count=3)
+    for n in PREFIXES:
+        _feed(stream, n)
+        prefix   = OHLCV.iloc[:n]
+        features = SmcFeatures(prefix)
+        pivots   = detect_pivots(prefix['High'], prefix['Low'], 2)
+        table    = detect_liquidity_pool_table(pivots, prefix, 0.01, 3, features=features)
+        table    = table.resolve_sweeps(features.high, features.low)
+        assert stream.liquidity_pools == list(table)
+
+
+def test_stream_bias():
+    """偏向為最後一個結構事件的方向"""
+    stream = SmcStream.from_ohlcv(OHLCV)
+    last = stream.structure[-1].event
+    assert stream.bias == ('bullish' if 'bullish' in last else 'bearish')
+    assert SmcStream().bias == 'neutral'
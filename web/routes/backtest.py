@@ -2,15 +2,15 @@
 SMC 回測 API 路由（BTC-USD 版）
 
 路由：
-- POST /api/backtest/run     執行 BTC-USD SMC 策略回測
-- GET  /api/backtest/config  取得可用條件選項與預設值
+- POST /api/backtest/run      執行 BTC-USD SMC 策略回測
+- POST /api/backtest/entries  列出配置的進場條件成立的 K 線（不執行回測）
+- GET  /api/backtest/config   取得可用條件選項與預設值
 """
 import logging
 import time
-import pandas as pd
 from flask import Blueprint, jsonify, request
 
-from core import container
+from core import container, smc_service
 from backtest.smc_config import SMC_CONDITION_OPTIONS, DEFAULT_SMC_CONFIG, load_smc_config, SmcConfigError
 from backtest.smc_engine import SmcEngine
 
@@ -79,20 +79,23 @@ def run_backtest_route():
 
     # 3. 執行回測（後端引擎）
     try:
-        engine = SmcEngine(ohlcv, config)
+        # SMC 參數與預計算服務相同時直接共用其指標，不重算；不同時以預計算的資料指紋查 smc_cache
+        engine = SmcEngine(
+            ohlcv, config,
+            indicators  = smc_service.get_indicators(timeframe),
+            fingerprint = smc_service.get_fingerprint(timeframe, ohlcv),
+        )
         result = engine.run(
             start_date = config['start_date'],
             end_date   = config.get('end_date'),
+            mode       = 'event',
         )
     except Exception as e:
         logger.exception('[API] SMC 回測引擎異常')
         return jsonify({'success': False, 'error': str(e)}), 500
 
     # 4. BTC Buy & Hold 基準
-    start_ts = min(
-        ohlcv.index.searchsorted(pd.Timestamp(config['start_date'])),
-        len(ohlcv) - 1
-    )
+    start_ts = min(engine.bar_range()[0], len(ohlcv) - 1)
     bh_start  = float(ohlcv['Close'].iloc[start_ts])
     bh_end    = float(ohlcv['Close'].iloc[-1])
     bh_return = (bh_end - bh_start) / bh_start
@@ -120,3 +123,41 @@ def run_backtest_route():
             'trades':       result.trades,
         }
     })
+
+
+@backtest_bp.route('/backtest/entries', methods=['POST'])
+def backtest_entries_route():
+    """
+    列出進場條件成立的 K 線（供圖表標示「此配置會在哪裡進場」，不執行回測）
+
+    Request JSON 同 /backtest/run。回傳區間內每根進場 K 線的方向、收盤價與隱含的止損 / 止盈價；
+    不考慮持倉狀態（實際回測只在空手時進場）。
+    """
+    raw = request.json or {}
+    try:
+        config = load_smc_config(raw)
+    except SmcConfigError as e:
+        logger.warning('[API] 配置驗證失敗: %s', e)
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    timeframe = config['timeframe']
+    ohlcv = container.get_ohlcv(timeframe)
+    if ohlcv.empty:
+        logger.error('[API] 無法取得 %s OHLCV', timeframe)
+        return jsonify({'success': False, 'error': f'無法取得 BTC-USD {timeframe} 資料'}), 503
+
+    try:
+        engine = SmcEngine(
+            ohlcv, config,
+            indicators  = smc_service.get_indicators(timeframe),
+            fingerprint = smc_service.get_fingerprint(timeframe, ohlcv),
+        )
+        start, end = engine.bar_range()
+        features   = engine.smc.features
+        entries  = engine.entry_masks.entries(features.dates, features.close, start, end)
+    except Exception as e:
+        logger.exception('[API] 進場遮罩計算異常')
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    logger.info('[API] POST /backtest/entries | tf=%s 進場 K 線=%d', timeframe, len(entries))
+    return jsonify({'success': True, 'entries': entries})